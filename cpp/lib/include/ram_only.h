@@ -34,6 +34,8 @@
  */
 #pragma once
 
+#include <functional>
+
 #include "database.h"
 #include "document_types.h"
 #include "type_aliases.h"
@@ -42,6 +44,25 @@ using namespace std;
 
 namespace atomdb {
 
+/**
+ * @brief A function returning the next atom of a stream, or a null pointer when it is exhausted.
+ */
+using AtomStream = function<shared_ptr<const Atom>()>;
+
+/**
+ * @brief A stored set of link handles used as operand of the set algebra queries.
+ *
+ * The `kind` selects the set: "pattern" (links matching `key` as link type and `targets` as
+ * target handles, with at least one wildcard), "type" (links of type `key`), "template"
+ * (links matching the type template in `targets`) or "incoming" (links pointing to the atom
+ * whose handle is `key`).
+ */
+struct SetOperand {
+    string kind;
+    string key;
+    StringList targets;
+};
+
 /**
  * @brief Represents an in-memory database for storing and managing atoms, nodes, and links.
  */
@@ -53,8 +74,22 @@ class Database {
     unordered_map<string, StringUnorderedSet> incoming_set;
     unordered_map<string, StringUnorderedSet> patterns;
     unordered_map<string, StringUnorderedSet> templates;
-
-    Database() : node({}), link({}), outgoing_set({}), incoming_set({}), patterns({}), templates({}) {}
+    // toplevel links only, kept next to `patterns` and `templates` for `toplevel_only` queries
+    unordered_map<string, StringUnorderedSet> toplevel_patterns;
+    unordered_map<string, StringUnorderedSet> toplevel_templates;
+    // number of atoms of each named type, kept up to date by every write
+    unordered_map<string, int> type_counts;
+
+    Database()
+        : node({}),
+          link({}),
+          outgoing_set({}),
+          incoming_set({}),
+          patterns({}),
+          templates({}),
+          toplevel_patterns({}),
+          toplevel_templates({}),
+          type_counts({}) {}
 
     ~Database() {
         node.clear();
@@ -63,6 +98,9 @@ class Database {
         incoming_set.clear();
         patterns.clear();
         templates.clear();
+        toplevel_patterns.clear();
+        toplevel_templates.clear();
+        type_counts.clear();
     };
 };
 
@@ -125,6 +163,20 @@ class InMemoryDB : public AtomDB {
 
     const StringList get_link_targets(const string& link_handle) const override;
 
+    /**
+     * @brief Retrieve the names of the nodes with the given handles.
+     * @param node_handles The handles of the nodes.
+     * @return A map from node handle to node name. Handles without a node are not in the map.
+     */
+    const unordered_map<string, string> get_node_names(const StringList& node_handles) const;
+
+    /**
+     * @brief Retrieve the targets of the links with the given handles.
+     * @param link_handles The handles of the links.
+     * @return A map from link handle to its targets. Handles without a link are not in the map.
+     */
+    const unordered_map<string, StringList> get_links_targets(const StringList& link_handles) const;
+
     const StringList get_incoming_links_handles(const string& atom_handle,
                                                 const KwArgs& kwargs = {}) const override;
 
@@ -135,6 +187,121 @@ class InMemoryDB : public AtomDB {
                                                const StringList& target_handles,
                                                const KwArgs& kwargs = {}) const override;
 
+    /**
+     * @brief Retrieve the links matching each of the given patterns.
+     * @param patterns The `(link_type, target_handles)` patterns, as in `get_matched_links`.
+     * @param kwargs Additional arguments, as in `get_matched_links`.
+     * @return The handles of the links matching each pattern, in the order of `patterns`.
+     */
+    const vector<StringUnorderedSet> get_matched_links_many(
+        const vector<pair<string, StringList>>& patterns, const KwArgs& kwargs = {}) const;
+
+    /**
+     * @brief Find the stored set of links matching a pattern with at least one wildcard.
+     * @param link_type The link type, or a wildcard.
+     * @param target_handles The target handles, some of which may be wildcards.
+     * @param toplevel_only Whether to find the set holding only toplevel links.
+     * @return A pointer to the stored set, or a null pointer if no link matches. The set is
+     *         not copied, so the pointer is invalidated by any write to the database.
+     */
+    const StringUnorderedSet* find_pattern_set(const string& link_type,
+                                               const StringList& target_handles,
+                                               bool toplevel_only = false) const;
+
+    /**
+     * @brief Find the stored set of links of the given type.
+     * @param link_type The link type.
+     * @param toplevel_only Whether to find the set holding only toplevel links.
+     * @return A pointer to the stored set, or a null pointer if there is no such link. The set
+     *         is not copied, so the pointer is invalidated by any write to the database.
+     */
+    const StringUnorderedSet* find_type_set(const string& link_type, bool toplevel_only = false) const;
+
+    /**
+     * @brief Find the stored set of links pointing to the given atom.
+     * @param atom_handle The handle of the atom.
+     * @return A pointer to the stored set, or a null pointer if there is no such link. The set
+     *         is not copied, so the pointer is invalidated by any write to the database.
+     */
+    const StringUnorderedSet* find_incoming_set(const string& atom_handle) const;
+
+    /**
+     * @brief Retrieve the links present in all the given sets.
+     *
+     * The smallest set is iterated and its members are looked up in the other ones.
+     *
+     * @param operands The sets to be intersected.
+     * @param kwargs Additional arguments. `toplevel_only` applies to pattern, type and
+     *        template sets.
+     * @return The handles of the links present in every set.
+     */
+    const StringUnorderedSet get_sets_intersection(const vector<SetOperand>& operands,
+                                                   const KwArgs& kwargs = {}) const;
+
+    /**
+     * @brief Retrieve the links present in any of the given sets.
+     * @param operands The sets to be merged.
+     * @param kwargs Additional arguments, as in `get_sets_intersection`.
+     * @return The handles of the links present in at least one set.
+     */
+    const StringUnorderedSet get_sets_union(const vector<SetOperand>& operands,
+                                            const KwArgs& kwargs = {}) const;
+
+    /**
+     * @brief Retrieve the links of the first set that are not present in the other ones.
+     * @param operands The sets, the first one being the set the other ones are subtracted from.
+     * @param kwargs Additional arguments, as in `get_sets_intersection`.
+     * @return The handles of the links present only in the first set.
+     */
+    const StringUnorderedSet get_sets_difference(const vector<SetOperand>& operands,
+                                                 const KwArgs& kwargs = {}) const;
+
+    /**
+     * @brief Count the links present in all the given sets, without building the intersection.
+     * @param operands The sets to be intersected.
+     * @param limit Stop counting once this number is reached (0 for no limit).
+     * @param kwargs Additional arguments, as in `get_sets_intersection`.
+     * @return The number of links present in every set, capped at `limit`.
+     */
+    size_t count_sets_intersection(const vector<SetOperand>& operands,
+                                   size_t limit = 0,
+                                   const KwArgs& kwargs = {}) const;
+
+    /**
+     * @brief Count the links matching the given pattern, without copying them.
+     * @param link_type The link type, or a wildcard.
+     * @param target_handles The target handles, some of which may be wildcards.
+     * @param kwargs Additional arguments. `toplevel_only` counts toplevel links only.
+     * @return The number of matching links.
+     */
+    size_t count_matched_links(const string& link_type,
+                               const StringList& target_handles,
+                               const KwArgs& kwargs = {}) const;
+
+    /**
+     * @brief Count the links of the given type, without copying them.
+     * @param link_type The link type.
+     * @param kwargs Additional arguments, as in `count_matched_links`.
+     * @return The number of links of the given type.
+     */
+    size_t count_matched_type(const string& link_type, const KwArgs& kwargs = {}) const;
+
+    /**
+     * @brief Count the links pointing to the given atom, without copying them.
+     * @param atom_handle The handle of the atom.
+     * @return The number of incoming links.
+     */
+    size_t count_incoming_links(const string& atom_handle) const;
+
+    /**
+     * @brief Count the members of each of the given sets, without copying them.
+     * @param operands The sets to be counted.
+     * @param kwargs Additional arguments, as in `get_sets_intersection`.
+     * @return The number of members of each set, in the order of `operands`.
+     */
+    const vector<size_t> count_sets(const vector<SetOperand>& operands,
+                                    const KwArgs& kwargs = {}) const;
+
     const StringUnorderedSet get_matched_type_template(const StringList& _template,
                                                        const KwArgs& kwargs = {}) const override;
 
@@ -145,6 +312,12 @@ class InMemoryDB : public AtomDB {
 
     const unordered_map<string, int> count_atoms() const override;
 
+    /**
+     * @brief Count the atoms of each named type, without scanning them.
+     * @return A map from each named type to the number of atoms of that type.
+     */
+    const unordered_map<string, int> count_atoms_by_type() const;
+
     void clear_database() override;
 
     const shared_ptr<const Node> add_node(const Node& node_params) override;
@@ -156,6 +329,18 @@ class InMemoryDB : public AtomDB {
 
     void delete_atom(const string& handle) override;
 
+    /**
+     * @brief Delete the given atoms and, in cascade, every link pointing to a deleted atom.
+     *
+     * The closure of the cascade is computed first, walking the incoming sets iteratively,
+     * and the atoms are then removed from the storage and from the indexes without copying
+     * them. Handles of nonexistent atoms are ignored.
+     *
+     * @param handles The handles of the atoms to be deleted.
+     * @return The number of deleted atoms, including the ones deleted in cascade.
+     */
+    size_t delete_atoms(const StringList& handles);
+
     const string create_field_index(const string& atom_type,
                                     const StringList& fields,
                                     const string& named_type = "",
@@ -164,13 +349,41 @@ class InMemoryDB : public AtomDB {
 
     void bulk_insert(const vector<shared_ptr<const Atom>>& documents) override;
 
+    /**
+     * @brief Insert atoms consumed lazily from a stream, in bounded chunks.
+     *
+     * Atoms are pulled from `next_atom` until it returns a null pointer. They are gathered in
+     * chunks of at most `chunk_size` atoms or `max_bytes` approximate bytes, and each chunk is
+     * inserted before the next one is pulled, so the stream is never fully materialised.
+     *
+     * @param next_atom A function returning the next atom, or a null pointer at the end.
+     * @param chunk_size Maximum number of atoms in a chunk.
+     * @param max_bytes Maximum approximate size, in bytes, of the atoms in a chunk.
+     * @return Ingestion statistics: `atom_count`, `node_count`, `link_count`, `failed_count`,
+     *         `chunk_count` and `byte_count`.
+     */
+    const unordered_map<string, long> bulk_insert_stream(const AtomStream& next_atom,
+                                                         size_t chunk_size = 10000,
+                                                         size_t max_bytes = 64000000);
+
     const vector<shared_ptr<const Atom>> retrieve_all_atoms() const override;
 
     void commit(const optional<const vector<Atom>>& buffer = nullopt) override;
 
+    /**
+     * @brief Returns the number of modifications made to the indexes so far.
+     *
+     * Iterators over the stored sets compare it with the value taken when they were created,
+     * so they can detect a modification of the database while they are being consumed.
+     *
+     * @return The modification count.
+     */
+    size_t modification_count() const { return this->modifications; }
+
    protected:
     string database_name;
     Database db;
+    size_t modifications = 0;
 
     const shared_ptr<const Atom> _get_atom(const string& handle) const override;
 
@@ -180,6 +393,13 @@ class InMemoryDB : public AtomDB {
 
     const shared_ptr<const Link> _get_and_delete_link(const string& link_handle);
 
+    /**
+     * @brief Computes a cheap approximation of the memory footprint of an atom.
+     * @param atom The atom whose size is approximated.
+     * @return The approximate size of the atom, in bytes.
+     */
+    static size_t _approximate_atom_size(const Atom& atom);
+
     /**
      * @brief Builds a named type hash template from the given template.
      * @param _template A list of strings representing the template.
@@ -232,10 +452,12 @@ class InMemoryDB : public AtomDB {
      * @param composite_type_hash The hash of the composite type.
      * @param named_type_hash The hash of the named type.
      * @param key The key associated with the template.
+     * @param is_toplevel Whether the key is also added to the toplevel-only templates.
      */
     void _add_templates(const string& composite_type_hash,
                         const string& named_type_hash,
-                        const string& key);
+                        const string& key,
+                        bool is_toplevel);
 
     /**
      * @brief Deletes templates associated with the given document link.
@@ -248,8 +470,77 @@ class InMemoryDB : public AtomDB {
      * @param named_type_hash A string representing the hash of the named type.
      * @param key A string representing the key associated with the patterns.
      * @param targets_hash A list of strings representing the target hashes.
+     * @param is_toplevel Whether the key is also added to the toplevel-only patterns.
+     */
+    void _add_patterns(const string& named_type_hash,
+                       const string& key,
+                       const StringList& targets_hash,
+                       bool is_toplevel);
+
+    /**
+     * @brief Finds the stored set described by an operand of the set algebra queries.
+     * @param operand The operand describing the set.
+     * @param toplevel_only Whether to find the set holding only toplevel links.
+     * @return A pointer to the stored set, or a null pointer if it is empty.
+     * @throws invalid_argument If the kind is unknown or the pattern has no wildcard.
+     */
+    const StringUnorderedSet* _find_operand_set(const SetOperand& operand,
+                                                bool toplevel_only) const;
+
+    /**
+     * @brief Finds the stored sets described by the operands, smallest first.
+     * @param operands The operands describing the sets.
+     * @param toplevel_only Whether to find the sets holding only toplevel links.
+     * @return The pointers to the sets sorted by size, or an empty vector if any set is empty.
+     */
+    vector<const StringUnorderedSet*> _find_intersection_sets(const vector<SetOperand>& operands,
+                                                              bool toplevel_only) const;
+
+    /**
+     * @brief Stores a node, counting it in the type tally if it was not stored yet.
+     * @param handle The handle of the node.
+     * @param node The node to be stored.
+     */
+    void _store_node(const string& handle, shared_ptr<Node> node);
+
+    /**
+     * @brief Stores a link, counting it in the type tally if it was not stored yet.
+     * @param handle The handle of the link.
+     * @param link The link to be stored.
      */
-    void _add_patterns(const string& named_type_hash, const string& key, const StringList& targets_hash);
+    void _store_link(const string& handle, shared_ptr<Link> link);
+
+    /**
+     * @brief Removes a deleted atom from the type tally.
+     * @param named_type The named type of the deleted atom.
+     */
+    void _untally_type(const string& named_type);
+
+    /**
+     * @brief Adds a key to the given set of an index, and to or from the toplevel-only set.
+     * @param index The index holding every key.
+     * @param toplevel_index The index holding only the keys of toplevel links.
+     * @param index_key The key of the set in both indexes.
+     * @param key The key to be added.
+     * @param is_toplevel Whether the key is added to, or removed from, the toplevel-only set.
+     */
+    static void _add_to_index(unordered_map<string, StringUnorderedSet>& index,
+                              unordered_map<string, StringUnorderedSet>& toplevel_index,
+                              const string& index_key,
+                              const string& key,
+                              bool is_toplevel);
+
+    /**
+     * @brief Removes a key from the given set of an index and from the toplevel-only set.
+     * @param index The index holding every key.
+     * @param toplevel_index The index holding only the keys of toplevel links.
+     * @param index_key The key of the set in both indexes.
+     * @param key The key to be removed.
+     */
+    static void _delete_from_index(unordered_map<string, StringUnorderedSet>& index,
+                                   unordered_map<string, StringUnorderedSet>& toplevel_index,
+                                   const string& index_key,
+                                   const string& key);
 
     /**
      * @brief Deletes patterns from the specified document.
@@ -264,13 +555,6 @@ class InMemoryDB : public AtomDB {
      */
     void _delete_link_and_update_index(const string& link_handle);
 
-    /**
-     * @brief Filters out non-top-level elements from the given set of matches.
-     * @param matches The set of matches to be filtered.
-     * @return A set containing only the top-level elements from the input matches.
-     */
-    const StringUnorderedSet _filter_non_toplevel(const StringUnorderedSet& matches) const;
-
     /**
      * @brief Deletes the index of the specified atom.
      * @param atom The atom whose index is to be deleted.
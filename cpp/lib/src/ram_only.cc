@@ -147,6 +147,34 @@ const StringList InMemoryDB::get_link_targets(const string& link_handle) const {
     throw AtomDoesNotExist("Nonexistent atom", "link_handle: " + link_handle);
 }
 
+//------------------------------------------------------------------------------
+const unordered_map<string, string> InMemoryDB::get_node_names(
+    const StringList& node_handles) const {
+    unordered_map<string, string> names;
+    names.reserve(node_handles.size());
+    for (const auto& node_handle : node_handles) {
+        auto it = this->db.node.find(node_handle);
+        if (it != this->db.node.end()) {
+            names.emplace(node_handle, it->second->name);
+        }
+    }
+    return move(names);
+}
+
+//------------------------------------------------------------------------------
+const unordered_map<string, StringList> InMemoryDB::get_links_targets(
+    const StringList& link_handles) const {
+    unordered_map<string, StringList> targets;
+    targets.reserve(link_handles.size());
+    for (const auto& link_handle : link_handles) {
+        auto it = this->db.outgoing_set.find(link_handle);
+        if (it != this->db.outgoing_set.end()) {
+            targets.emplace(link_handle, it->second);
+        }
+    }
+    return move(targets);
+}
+
 //------------------------------------------------------------------------------
 const StringList InMemoryDB::get_incoming_links_handles(const string& atom_handle,
                                                         const KwArgs& kwargs) const {
@@ -195,24 +223,211 @@ const StringUnorderedSet InMemoryDB::get_matched_links(const string& link_type,
         }
     }
 
+    auto patterns_matched =
+        this->find_pattern_set(link_type, target_handles, kwargs.toplevel_only);
+    if (patterns_matched) {
+        return *patterns_matched;
+    }
+    return {};
+}
+
+//------------------------------------------------------------------------------
+const StringUnorderedSet* InMemoryDB::find_pattern_set(const string& link_type,
+                                                       const StringList& target_handles,
+                                                       bool toplevel_only) const {
     auto link_type_hash =
         link_type == WILDCARD ? WILDCARD : ExpressionHasher::named_type_hash(link_type);
 
     auto handles = StringList({link_type_hash});
     handles.insert(handles.end(), target_handles.begin(), target_handles.end());
 
-    StringUnorderedSet patterns_matched;
-    auto it = this->db.patterns.find(ExpressionHasher::composite_hash(handles));
-    if (it != this->db.patterns.end()) {
-        patterns_matched.reserve(it->second.size());
-        patterns_matched.insert(it->second.begin(), it->second.end());
+    const auto& patterns = toplevel_only ? this->db.toplevel_patterns : this->db.patterns;
+    auto it = patterns.find(ExpressionHasher::composite_hash(handles));
+    return it != patterns.end() ? &it->second : nullptr;
+}
+
+//------------------------------------------------------------------------------
+const StringUnorderedSet* InMemoryDB::find_type_set(const string& link_type,
+                                                    bool toplevel_only) const {
+    const auto& templates = toplevel_only ? this->db.toplevel_templates : this->db.templates;
+    auto it = templates.find(ExpressionHasher::named_type_hash(link_type));
+    return it != templates.end() ? &it->second : nullptr;
+}
+
+//------------------------------------------------------------------------------
+const StringUnorderedSet* InMemoryDB::_find_operand_set(const SetOperand& operand,
+                                                        bool toplevel_only) const {
+    if (operand.kind == "pattern") {
+        if (operand.key != WILDCARD and
+            find(operand.targets.begin(), operand.targets.end(), WILDCARD) ==
+                operand.targets.end()) {
+            throw invalid_argument("Pattern operands must have at least one wildcard.");
+        }
+        return this->find_pattern_set(operand.key, operand.targets, toplevel_only);
+    }
+    if (operand.kind == "type") {
+        return this->find_type_set(operand.key, toplevel_only);
+    }
+    if (operand.kind == "template") {
+        auto template_hash = ExpressionHasher::composite_hash(
+            this->_build_named_type_hash_template(operand.targets));
+        const auto& templates = toplevel_only ? this->db.toplevel_templates : this->db.templates;
+        auto it = templates.find(template_hash);
+        return it != templates.end() ? &it->second : nullptr;
+    }
+    if (operand.kind == "incoming") {
+        return this->find_incoming_set(operand.key);
+    }
+    throw invalid_argument("Invalid set operand kind: " + operand.kind);
+}
+
+//------------------------------------------------------------------------------
+vector<const StringUnorderedSet*> InMemoryDB::_find_intersection_sets(
+    const vector<SetOperand>& operands, bool toplevel_only) const {
+    vector<const StringUnorderedSet*> sets;
+    sets.reserve(operands.size());
+    for (const auto& operand : operands) {
+        auto set = this->_find_operand_set(operand, toplevel_only);
+        if (not set or set->empty()) {
+            return {};
+        }
+        sets.push_back(set);
+    }
+    sort(sets.begin(), sets.end(), [](const auto* a, const auto* b) {
+        return a->size() < b->size();
+    });
+    return move(sets);
+}
+
+//------------------------------------------------------------------------------
+const StringUnorderedSet* InMemoryDB::find_incoming_set(const string& atom_handle) const {
+    auto it = this->db.incoming_set.find(atom_handle);
+    return it != this->db.incoming_set.end() ? &it->second : nullptr;
+}
+
+//------------------------------------------------------------------------------
+const vector<StringUnorderedSet> InMemoryDB::get_matched_links_many(
+    const vector<pair<string, StringList>>& patterns, const KwArgs& kwargs) const {
+    vector<StringUnorderedSet> matches;
+    matches.reserve(patterns.size());
+    for (const auto& [link_type, target_handles] : patterns) {
+        matches.emplace_back(this->get_matched_links(link_type, target_handles, kwargs));
+    }
+    return move(matches);
+}
+
+//------------------------------------------------------------------------------
+const StringUnorderedSet InMemoryDB::get_sets_intersection(const vector<SetOperand>& operands,
+                                                           const KwArgs& kwargs) const {
+    auto sets = this->_find_intersection_sets(operands, kwargs.toplevel_only);
+    if (sets.empty()) {
+        return {};
     }
+    StringUnorderedSet intersection;
+    for (const auto& handle : *sets.front()) {
+        if (all_of(sets.begin() + 1, sets.end(), [&handle](const auto* set) {
+                return set->find(handle) != set->end();
+            })) {
+            intersection.insert(handle);
+        }
+    }
+    return move(intersection);
+}
 
-    if (kwargs.toplevel_only) {
-        return this->_filter_non_toplevel(patterns_matched);
+//------------------------------------------------------------------------------
+const StringUnorderedSet InMemoryDB::get_sets_union(const vector<SetOperand>& operands,
+                                                    const KwArgs& kwargs) const {
+    StringUnorderedSet merged;
+    for (const auto& operand : operands) {
+        if (auto set = this->_find_operand_set(operand, kwargs.toplevel_only)) {
+            merged.insert(set->begin(), set->end());
+        }
     }
+    return move(merged);
+}
 
-    return move(patterns_matched);
+//------------------------------------------------------------------------------
+const StringUnorderedSet InMemoryDB::get_sets_difference(const vector<SetOperand>& operands,
+                                                         const KwArgs& kwargs) const {
+    if (operands.empty()) {
+        return {};
+    }
+    auto first = this->_find_operand_set(operands.front(), kwargs.toplevel_only);
+    if (not first) {
+        return {};
+    }
+    vector<const StringUnorderedSet*> others;
+    for (auto it = operands.begin() + 1; it != operands.end(); ++it) {
+        if (auto set = this->_find_operand_set(*it, kwargs.toplevel_only)) {
+            others.push_back(set);
+        }
+    }
+    StringUnorderedSet difference;
+    for (const auto& handle : *first) {
+        if (none_of(others.begin(), others.end(), [&handle](const auto* set) {
+                return set->find(handle) != set->end();
+            })) {
+            difference.insert(handle);
+        }
+    }
+    return move(difference);
+}
+
+//------------------------------------------------------------------------------
+size_t InMemoryDB::count_sets_intersection(const vector<SetOperand>& operands,
+                                           size_t limit,
+                                           const KwArgs& kwargs) const {
+    auto sets = this->_find_intersection_sets(operands, kwargs.toplevel_only);
+    if (sets.empty()) {
+        return 0;
+    }
+    size_t count = 0;
+    for (const auto& handle : *sets.front()) {
+        if (all_of(sets.begin() + 1, sets.end(), [&handle](const auto* set) {
+                return set->find(handle) != set->end();
+            })) {
+            if (++count == limit) {
+                break;
+            }
+        }
+    }
+    return count;
+}
+
+//------------------------------------------------------------------------------
+size_t InMemoryDB::count_matched_links(const string& link_type,
+                                       const StringList& target_handles,
+                                       const KwArgs& kwargs) const {
+    if (link_type != WILDCARD and
+        find(target_handles.begin(), target_handles.end(), WILDCARD) == target_handles.end()) {
+        return this->get_matched_links(link_type, target_handles, kwargs).size();
+    }
+    auto patterns_matched = this->find_pattern_set(link_type, target_handles, kwargs.toplevel_only);
+    return patterns_matched ? patterns_matched->size() : 0;
+}
+
+//------------------------------------------------------------------------------
+size_t InMemoryDB::count_matched_type(const string& link_type, const KwArgs& kwargs) const {
+    auto templates_matched = this->find_type_set(link_type, kwargs.toplevel_only);
+    return templates_matched ? templates_matched->size() : 0;
+}
+
+//------------------------------------------------------------------------------
+size_t InMemoryDB::count_incoming_links(const string& atom_handle) const {
+    auto incoming = this->find_incoming_set(atom_handle);
+    return incoming ? incoming->size() : 0;
+}
+
+//------------------------------------------------------------------------------
+const vector<size_t> InMemoryDB::count_sets(const vector<SetOperand>& operands,
+                                            const KwArgs& kwargs) const {
+    vector<size_t> counts;
+    counts.reserve(operands.size());
+    for (const auto& operand : operands) {
+        auto set = this->_find_operand_set(operand, kwargs.toplevel_only);
+        counts.push_back(set ? set->size() : 0);
+    }
+    return move(counts);
 }
 
 //------------------------------------------------------------------------------
@@ -220,11 +435,10 @@ const StringUnorderedSet InMemoryDB::get_matched_type_template(const StringList&
                                                                const KwArgs& kwargs) const {
     auto hash_base = this->_build_named_type_hash_template(_template);
     auto template_hash = ExpressionHasher::composite_hash(hash_base);
-    auto it = this->db.templates.find(template_hash);
-    if (it != this->db.templates.end()) {
-        if (kwargs.toplevel_only) {
-            return this->_filter_non_toplevel(it->second);
-        }
+    const auto& templates =
+        kwargs.toplevel_only ? this->db.toplevel_templates : this->db.templates;
+    auto it = templates.find(template_hash);
+    if (it != templates.end()) {
         return it->second;
     }
     return {};
@@ -233,12 +447,9 @@ const StringUnorderedSet InMemoryDB::get_matched_type_template(const StringList&
 //------------------------------------------------------------------------------
 const StringUnorderedSet InMemoryDB::get_matched_type(const string& link_type,
                                                       const KwArgs& kwargs) const {
-    auto it = this->db.templates.find(ExpressionHasher::named_type_hash(link_type));
-    if (it != this->db.templates.end()) {
-        if (kwargs.toplevel_only) {
-            return this->_filter_non_toplevel(it->second);
-        }
-        return it->second;
+    auto templates_matched = this->find_type_set(link_type, kwargs.toplevel_only);
+    if (templates_matched) {
+        return *templates_matched;
     }
     return {};
 }
@@ -261,12 +472,20 @@ const unordered_map<string, int> InMemoryDB::count_atoms() const {
 }
 
 //------------------------------------------------------------------------------
-void InMemoryDB::clear_database() { this->db = Database(); }
+const unordered_map<string, int> InMemoryDB::count_atoms_by_type() const {
+    return this->db.type_counts;
+}
+
+//------------------------------------------------------------------------------
+void InMemoryDB::clear_database() {
+    this->db = Database();
+    this->modifications++;
+}
 
 //------------------------------------------------------------------------------
 const shared_ptr<const Node> InMemoryDB::add_node(const Node& node_params) {
     auto node = this->_build_node(node_params);
-    this->db.node[node->handle] = node;
+    this->_store_node(node->handle, node);
     this->_update_index(*node);
     return move(node);
 }
@@ -274,7 +493,7 @@ const shared_ptr<const Node> InMemoryDB::add_node(const Node& node_params) {
 //------------------------------------------------------------------------------
 const shared_ptr<const Link> InMemoryDB::add_link(const Link& link_params, bool toplevel) {
     auto link = this->_build_link(link_params, toplevel);
-    this->db.link[link->handle] = link;
+    this->_store_link(link->handle, link);
     this->_update_index(*link);
     return move(link);
 }
@@ -287,25 +506,59 @@ void InMemoryDB::reindex(
 
 //------------------------------------------------------------------------------
 void InMemoryDB::delete_atom(const string& handle) {
-    auto it = this->db.node.find(handle);
-    if (it != this->db.node.end()) {
-        this->db.node.erase(it);
-        auto it = this->db.incoming_set.find(handle);
-        if (it != this->db.incoming_set.end()) {
-            auto handles = move(it->second);
-            this->db.incoming_set.erase(it);
-            for (const auto& h : handles) {
-                this->_delete_link_and_update_index(h);
+    if (this->delete_atoms({handle}) == 0) {
+        // TODO: log error
+        throw AtomDoesNotExist("Nonexistent atom", "handle: " + handle);
+    }
+}
+
+//------------------------------------------------------------------------------
+size_t InMemoryDB::delete_atoms(const StringList& handles) {
+    this->modifications++;
+    // the closure is computed before anything is deleted, so no recursion is needed
+    StringUnorderedSet closure;
+    StringList pending;
+    for (const auto& handle : handles) {
+        if (this->db.node.contains(handle) or this->db.link.contains(handle)) {
+            if (closure.insert(handle).second) {
+                pending.push_back(handle);
             }
         }
-    } else {
-        try {
-            this->_delete_link_and_update_index(handle);
-        } catch (const AtomDoesNotExist& e) {
-            // TODO: log error
-            throw AtomDoesNotExist("Nonexistent atom", "handle: " + handle);
+    }
+    while (not pending.empty()) {
+        auto it = this->db.incoming_set.find(pending.back());
+        pending.pop_back();
+        if (it == this->db.incoming_set.end()) {
+            continue;
+        }
+        for (const auto& link_handle : it->second) {
+            if (this->db.link.contains(link_handle) and closure.insert(link_handle).second) {
+                pending.push_back(link_handle);
+            }
         }
     }
+
+    for (const auto& handle : closure) {
+        this->db.incoming_set.erase(handle);
+        if (auto it = this->db.node.find(handle); it != this->db.node.end()) {
+            this->_untally_type(it->second->named_type);
+            this->db.node.erase(it);
+            continue;
+        }
+        auto link = this->_get_and_delete_link(handle);
+        this->db.outgoing_set.erase(handle);
+        for (const auto& target : link->targets) {
+            if (not closure.contains(target)) {
+                if (auto it = this->db.incoming_set.find(target);
+                    it != this->db.incoming_set.end()) {
+                    it->second.erase(handle);
+                }
+            }
+        }
+        this->_delete_templates(*link);
+        this->_delete_patterns(*link, link->targets);
+    }
+    return closure.size();
 }
 
 //------------------------------------------------------------------------------
@@ -322,9 +575,9 @@ void InMemoryDB::bulk_insert(const vector<shared_ptr<const Atom>>& documents) {
     try {
         for (const auto& document : documents) {
             if (auto node = dynamic_cast<const Node*>(document.get())) {
-                this->db.node[document->_id] = make_shared<Node>(*node);
+                this->_store_node(document->_id, make_shared<Node>(*node));
             } else if (auto link = dynamic_cast<const Link*>(document.get())) {
-                this->db.link[document->_id] = make_shared<Link>(*link);
+                this->_store_link(document->_id, make_shared<Link>(*link));
             }
             this->_update_index(*document);
         }
@@ -333,6 +586,59 @@ void InMemoryDB::bulk_insert(const vector<shared_ptr<const Atom>>& documents) {
     }
 }
 
+//------------------------------------------------------------------------------
+const unordered_map<string, long> InMemoryDB::bulk_insert_stream(const AtomStream& next_atom,
+                                                                 size_t chunk_size,
+                                                                 size_t max_bytes) {
+    unordered_map<string, long> stats = {{"atom_count", 0},
+                                         {"node_count", 0},
+                                         {"link_count", 0},
+                                         {"failed_count", 0},
+                                         {"chunk_count", 0},
+                                         {"byte_count", 0}};
+    vector<shared_ptr<const Atom>> chunk;
+    chunk.reserve(min(chunk_size, size_t(10000)));
+    size_t chunk_bytes = 0;
+
+    auto flush_chunk = [&]() {
+        for (const auto& document : chunk) {
+            try {
+                if (auto node = dynamic_cast<const Node*>(document.get())) {
+                    this->_store_node(document->_id, make_shared<Node>(*node));
+                    stats["node_count"]++;
+                } else if (auto link = dynamic_cast<const Link*>(document.get())) {
+                    this->_store_link(document->_id, make_shared<Link>(*link));
+                    stats["link_count"]++;
+                } else {
+                    stats["failed_count"]++;
+                    continue;
+                }
+                this->_update_index(*document);
+                stats["atom_count"]++;
+            } catch (const exception& e) {
+                // TODO: log error
+                stats["failed_count"]++;
+            }
+        }
+        stats["chunk_count"]++;
+        stats["byte_count"] += chunk_bytes;
+        chunk.clear();
+        chunk_bytes = 0;
+    };
+
+    while (auto atom = next_atom()) {
+        chunk_bytes += InMemoryDB::_approximate_atom_size(*atom);
+        chunk.emplace_back(move(atom));
+        if (chunk.size() >= chunk_size or chunk_bytes >= max_bytes) {
+            flush_chunk();
+        }
+    }
+    if (not chunk.empty()) {
+        flush_chunk();
+    }
+    return move(stats);
+}
+
 //------------------------------------------------------------------------------
 const vector<shared_ptr<const Atom>> InMemoryDB::retrieve_all_atoms() const {
     try {
@@ -389,13 +695,59 @@ const shared_ptr<const Link> InMemoryDB::_get_link(const string& handle) const {
 const shared_ptr<const Link> InMemoryDB::_get_and_delete_link(const string& link_handle) {
     auto it = this->db.link.find(link_handle);
     if (it != this->db.link.end()) {
-        auto link_document = make_shared<const Link>(*it->second);
+        shared_ptr<const Link> link_document = move(it->second);
+        this->_untally_type(link_document->named_type);
         this->db.link.erase(it);
-        return move(link_document);
+        return link_document;
     }
     return nullptr;
 }
 
+//------------------------------------------------------------------------------
+void InMemoryDB::_store_node(const string& handle, shared_ptr<Node> node) {
+    auto [it, inserted] = this->db.node.insert_or_assign(handle, move(node));
+    if (inserted) {
+        this->db.type_counts[it->second->named_type]++;
+    }
+}
+
+//------------------------------------------------------------------------------
+void InMemoryDB::_store_link(const string& handle, shared_ptr<Link> link) {
+    auto [it, inserted] = this->db.link.insert_or_assign(handle, move(link));
+    if (inserted) {
+        this->db.type_counts[it->second->named_type]++;
+    }
+}
+
+//------------------------------------------------------------------------------
+void InMemoryDB::_untally_type(const string& named_type) {
+    auto it = this->db.type_counts.find(named_type);
+    if (it != this->db.type_counts.end() and --it->second <= 0) {
+        this->db.type_counts.erase(it);
+    }
+}
+
+//------------------------------------------------------------------------------
+size_t InMemoryDB::_approximate_atom_size(const Atom& atom) {
+    size_t size = atom._id.size() + atom.handle.size() + atom.composite_type_hash.size() +
+                  atom.named_type.size();
+    for (const auto& [key, value] : atom.custom_attributes) {
+        size += key.size() + sizeof(value);
+        if (auto str = std::get_if<string>(&value)) {
+            size += str->size();
+        }
+    }
+    if (auto node = dynamic_cast<const Node*>(&atom)) {
+        size += node->name.size();
+    } else if (auto link = dynamic_cast<const Link*>(&atom)) {
+        size += link->named_type_hash.size();
+        for (const auto& target : link->targets) {
+            size += target.size();
+        }
+    }
+    return size;
+}
+
 //------------------------------------------------------------------------------
 const StringList InMemoryDB::_build_named_type_hash_template(const StringList& _template) const {
     StringList hash_template;
@@ -450,51 +802,71 @@ void InMemoryDB::_delete_incoming_set(const string& link_handle, const StringLis
 }
 
 //------------------------------------------------------------------------------
-void InMemoryDB::_add_templates(const string& composite_type_hash,
-                                const string& named_type_hash,
-                                const string& key) {
-    auto it = this->db.templates.find(composite_type_hash);
-    if (it != this->db.templates.end()) {
-        it->second.emplace(key);
+void InMemoryDB::_add_to_index(unordered_map<string, StringUnorderedSet>& index,
+                                unordered_map<string, StringUnorderedSet>& toplevel_index,
+                                const string& index_key,
+                                const string& key,
+                                bool is_toplevel) {
+    index[index_key].emplace(key);
+    if (is_toplevel) {
+        toplevel_index[index_key].emplace(key);
     } else {
-        this->db.templates[composite_type_hash] = StringUnorderedSet({key});
+        auto it = toplevel_index.find(index_key);
+        if (it != toplevel_index.end()) {
+            it->second.erase(key);
+        }
     }
+}
 
-    it = this->db.templates.find(named_type_hash);
-    if (it != this->db.templates.end()) {
-        it->second.emplace(key);
-    } else {
-        this->db.templates[named_type_hash] = StringUnorderedSet({key});
+//------------------------------------------------------------------------------
+void InMemoryDB::_delete_from_index(unordered_map<string, StringUnorderedSet>& index,
+                                    unordered_map<string, StringUnorderedSet>& toplevel_index,
+                                    const string& index_key,
+                                    const string& key) {
+    auto it = index.find(index_key);
+    if (it != index.end()) {
+        it->second.erase(key);
+    }
+    it = toplevel_index.find(index_key);
+    if (it != toplevel_index.end()) {
+        it->second.erase(key);
     }
 }
 
 //------------------------------------------------------------------------------
-void InMemoryDB::_delete_templates(const Link& link_document) {
-    auto it = this->db.templates.find(link_document.composite_type_hash);
-    if (it != this->db.templates.end()) {
-        it->second.erase(link_document._id);
-    }
+void InMemoryDB::_add_templates(const string& composite_type_hash,
+                                const string& named_type_hash,
+                                const string& key,
+                                bool is_toplevel) {
+    _add_to_index(
+        this->db.templates, this->db.toplevel_templates, composite_type_hash, key, is_toplevel);
+    _add_to_index(
+        this->db.templates, this->db.toplevel_templates, named_type_hash, key, is_toplevel);
+}
 
-    it = this->db.templates.find(link_document.named_type_hash);
-    if (it != this->db.templates.end()) {
-        it->second.erase(link_document._id);
-    }
+//------------------------------------------------------------------------------
+void InMemoryDB::_delete_templates(const Link& link_document) {
+    _delete_from_index(this->db.templates,
+                       this->db.toplevel_templates,
+                       link_document.composite_type_hash,
+                       link_document._id);
+    _delete_from_index(this->db.templates,
+                       this->db.toplevel_templates,
+                       link_document.named_type_hash,
+                       link_document._id);
 }
 
 //------------------------------------------------------------------------------
 void InMemoryDB::_add_patterns(const string& named_type_hash,
                                const string& key,
-                               const StringList& targets_hash) {
+                               const StringList& targets_hash,
+                               bool is_toplevel) {
     auto hash_list = StringList({named_type_hash});
     hash_list.insert(hash_list.end(), targets_hash.begin(), targets_hash.end());
     StringList pattern_keys = build_pattern_keys(hash_list);
     for (const auto& pattern_key : pattern_keys) {
-        auto it = this->db.patterns.find(pattern_key);
-        if (it == this->db.patterns.end()) {
-            this->db.patterns[pattern_key] = StringUnorderedSet({key});
-        } else {
-            it->second.emplace(key);
-        }
+        _add_to_index(
+            this->db.patterns, this->db.toplevel_patterns, pattern_key, key, is_toplevel);
     }
 }
 
@@ -504,10 +876,8 @@ void InMemoryDB::_delete_patterns(const Link& link_document, const StringList& t
     hash_list.insert(hash_list.end(), targets_hash.begin(), targets_hash.end());
     StringList pattern_keys = build_pattern_keys(hash_list);
     for (const auto& pattern_key : pattern_keys) {
-        auto it = this->db.patterns.find(pattern_key);
-        if (it != this->db.patterns.end()) {
-            it->second.erase(link_document._id);
-        }
+        _delete_from_index(
+            this->db.patterns, this->db.toplevel_patterns, pattern_key, link_document._id);
     }
 }
 
@@ -519,23 +889,6 @@ void InMemoryDB::_delete_link_and_update_index(const string& link_handle) {
     }
 }
 
-//------------------------------------------------------------------------------
-const StringUnorderedSet InMemoryDB::_filter_non_toplevel(const StringUnorderedSet& matches) const {
-    if (this->db.link.empty()) {
-        return matches;
-    }
-    StringUnorderedSet filtered_matched_targets;
-    for (const auto& link_handle : matches) {
-        auto it = this->db.link.find(link_handle);
-        if (it != this->db.link.end()) {
-            if (it->second->is_toplevel) {
-                filtered_matched_targets.emplace(link_handle);
-            }
-        }
-    }
-    return move(filtered_matched_targets);
-}
-
 //------------------------------------------------------------------------------
 void InMemoryDB::_delete_atom_index(const Atom& atom) {
     const string& atom_handle = atom._id;
@@ -565,13 +918,15 @@ void InMemoryDB::_add_atom_index(const Atom& atom) {
         const string& handle = link->_id;
         this->_add_outgoing_set(handle, link->targets);
         this->_add_incoming_set(handle, link->targets);
-        this->_add_templates(link->composite_type_hash, link->named_type_hash, handle);
-        this->_add_patterns(link->named_type_hash, handle, link->targets);
+        this->_add_templates(
+            link->composite_type_hash, link->named_type_hash, handle, link->is_toplevel);
+        this->_add_patterns(link->named_type_hash, handle, link->targets, link->is_toplevel);
     }
 }
 
 //------------------------------------------------------------------------------
 void InMemoryDB::_update_index(const Atom& atom, bool delete_atom) {
+    this->modifications++;
     if (delete_atom) {
         this->_delete_atom_index(atom);
     } else {
@@ -11,13 +11,18 @@
  * - Functions for converting composite types between C++ lists and Python lists.
  * - Functions for converting C++ objects to Python dictionaries.
  * - Functions for initializing and updating C++ objects from Python representations.
+ * - Functions for iterating lazily over sets stored in a database.
+ * - Functions for converting Python set operands to C++ `SetOperand` objects.
  */
 #pragma once
 
 #include <hyperon_das_atomdb_cpp/database.h>
 #include <hyperon_das_atomdb_cpp/document_types.h>
+#include <hyperon_das_atomdb_cpp/ram_only.h>
 #include <hyperon_das_atomdb_cpp/type_aliases.h>
+#include <nanobind/make_iterator.h>
 #include <nanobind/nanobind.h>
+#include <nanobind/stl/string.h>
 
 using namespace std;
 using namespace atomdb;
@@ -244,4 +249,102 @@ static void init_link(Link& self,
                      targets_documents);
 }
 
+/**
+ * @brief Iterator over the handles of a set of an `InMemoryDB` that detects modifications.
+ *
+ * The iterator points into the set without copying it, so it raises a `RuntimeError` instead
+ * of reading invalidated memory when the database is modified while it is being consumed.
+ * Sets computed on the fly (not stored in the database) are owned by the iterator.
+ */
+struct HandlesIterator {
+    StringUnorderedSet::const_iterator it;
+    const InMemoryDB* db;
+    size_t modification_count;
+    shared_ptr<const StringUnorderedSet> owned;
+
+    const string& operator*() const {
+        this->check();
+        return *this->it;
+    }
+
+    HandlesIterator& operator++() {
+        this->check();
+        ++this->it;
+        return *this;
+    }
+
+    bool operator==(const HandlesIterator& other) const {
+        this->check();
+        return this->it == other.it;
+    }
+
+    void check() const {
+        if (this->db->modification_count() != this->modification_count) {
+            throw runtime_error("InMemoryDB changed during iteration");
+        }
+    }
+};
+
+/**
+ * @brief Creates a Python iterator over the handles of a set of a database.
+ * @param scope The Python scope where the iterator type is registered.
+ * @param db The database the set belongs to.
+ * @param handles A pointer to the stored set, or a null pointer for an empty iterator.
+ * @param limit Maximum number of handles to iterate over (0 for no limit).
+ * @param owned The set iterated over when it is not stored in the database, kept alive by
+ *        the iterator.
+ * @return A Python iterator (`nb::iterator`) yielding the handles without copying the set.
+ *         It raises a `RuntimeError` if the database is modified while it is being consumed.
+ */
+static nb::iterator handles_iterator(nb::handle scope,
+                                     const InMemoryDB& db,
+                                     const StringUnorderedSet* handles,
+                                     size_t limit = 0,
+                                     shared_ptr<const StringUnorderedSet> owned = nullptr) {
+    static const StringUnorderedSet empty;
+    if (owned) {
+        handles = owned.get();
+    } else if (handles == nullptr) {
+        handles = &empty;
+    }
+    auto end = (limit == 0 or limit >= handles->size()) ? handles->end()
+                                                         : next(handles->begin(), limit);
+    auto count = db.modification_count();
+    return nb::make_iterator(scope,
+                             "HandlesIterator",
+                             HandlesIterator{handles->begin(), &db, count, owned},
+                             HandlesIterator{end, &db, count, owned});
+}
+
+/**
+ * @brief Converts Python set operands to C++ `SetOperand` objects.
+ * @param operands An iterable of tuples: `("pattern", link_type, target_handles)`,
+ *        `("type", link_type)`, `("template", template)` or `("incoming", atom_handle)`.
+ * @return A vector of `SetOperand` objects.
+ * @throws invalid_argument If an operand has too few elements.
+ */
+static vector<SetOperand> set_operands_from_python(const nb::iterable& operands) {
+    vector<SetOperand> parsed;
+    for (const auto& item : operands) {
+        auto size = nb::len(item);
+        if (size < 2) {
+            throw invalid_argument("Set operands must have a kind and a value.");
+        }
+        SetOperand operand{nb::cast<string>(item[0])};
+        if (operand.kind == "pattern") {
+            if (size < 3) {
+                throw invalid_argument("Pattern operands must have a link type and targets.");
+            }
+            operand.key = nb::cast<string>(item[1]);
+            operand.targets = nb::cast<StringList>(item[2]);
+        } else if (operand.kind == "template") {
+            operand.targets = nb::cast<StringList>(item[1]);
+        } else {
+            operand.key = nb::cast<string>(item[1]);
+        }
+        parsed.push_back(move(operand));
+    }
+    return move(parsed);
+}
+
 }  // namespace bind_helpers
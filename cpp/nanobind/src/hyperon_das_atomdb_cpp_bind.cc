@@ -268,6 +268,219 @@ NB_MODULE(ext, m) {
     nb::module_ adapters = m.def_submodule("adapters");
     nb::class_<InMemoryDB, AtomDB>(adapters, "InMemoryDB")
         .def(nb::init<const string&>(), "database_name"_a = "das")
+        .def(
+            "bulk_insert_stream",
+            [](InMemoryDB& self, const nb::iterable& documents, size_t chunk_size, size_t max_bytes)
+                -> const unordered_map<string, long> {
+                auto it = nb::iter(documents);
+                auto next_atom = [&it]() -> shared_ptr<const Atom> {
+                    if (it == nb::iterator::sentinel()) return nullptr;
+                    auto atom = nb::cast<shared_ptr<const Atom>>(*it);
+                    ++it;
+                    return atom;
+                };
+                return self.bulk_insert_stream(next_atom, chunk_size, max_bytes);
+            },
+            "documents"_a,
+            nb::kw_only(),
+            "chunk_size"_a = 10000,
+            "max_bytes"_a = 64000000)
+        .def("get_node_names", &InMemoryDB::get_node_names, "node_handles"_a)
+        .def("get_links_targets", &InMemoryDB::get_links_targets, "link_handles"_a)
+        .def(
+            "get_matched_links_many",
+            [](const InMemoryDB& self,
+               const vector<pair<string, StringList>>& patterns,
+               bool toplevel_only = false,
+               const nb::kwargs& _ = {}) -> const vector<StringUnorderedSet> {
+                return self.get_matched_links_many(patterns, {toplevel_only : toplevel_only});
+            },
+            "patterns"_a,
+            nb::kw_only(),
+            "toplevel_only"_a = false,
+            "_"_a = nb::kwargs())
+        .def(
+            "count_atoms",
+            [](const InMemoryDB& self, const optional<const nb::dict>& parameters = nullopt)
+                -> nb::dict {
+                auto counts = nb::cast<nb::dict>(nb::cast(self.count_atoms()));
+                if (parameters and parameters->contains("per_type") and
+                    nb::cast<bool>((*parameters)["per_type"])) {
+                    counts["type_counts"] = nb::cast(self.count_atoms_by_type());
+                }
+                return counts;
+            },
+            "parameters"_a = nullopt)
+        .def(
+            "get_sets_intersection",
+            [](const InMemoryDB& self,
+               const nb::iterable& operands,
+               bool toplevel_only = false,
+               const nb::kwargs& _ = {}) -> const StringUnorderedSet {
+                return self.get_sets_intersection(helpers::set_operands_from_python(operands),
+                                                  {toplevel_only : toplevel_only});
+            },
+            "operands"_a,
+            nb::kw_only(),
+            "toplevel_only"_a = false,
+            "_"_a = nb::kwargs())
+        .def(
+            "get_sets_union",
+            [](const InMemoryDB& self,
+               const nb::iterable& operands,
+               bool toplevel_only = false,
+               const nb::kwargs& _ = {}) -> const StringUnorderedSet {
+                return self.get_sets_union(helpers::set_operands_from_python(operands),
+                                           {toplevel_only : toplevel_only});
+            },
+            "operands"_a,
+            nb::kw_only(),
+            "toplevel_only"_a = false,
+            "_"_a = nb::kwargs())
+        .def(
+            "get_sets_difference",
+            [](const InMemoryDB& self,
+               const nb::iterable& operands,
+               bool toplevel_only = false,
+               const nb::kwargs& _ = {}) -> const StringUnorderedSet {
+                return self.get_sets_difference(helpers::set_operands_from_python(operands),
+                                                {toplevel_only : toplevel_only});
+            },
+            "operands"_a,
+            nb::kw_only(),
+            "toplevel_only"_a = false,
+            "_"_a = nb::kwargs())
+        .def(
+            "count_matched_links",
+            [](const InMemoryDB& self,
+               const string& link_type,
+               const StringList& target_handles,
+               bool toplevel_only = false,
+               const nb::kwargs& _ = {}) -> size_t {
+                return self.count_matched_links(
+                    link_type, target_handles, {toplevel_only : toplevel_only});
+            },
+            "link_type"_a,
+            "target_handles"_a,
+            nb::kw_only(),
+            "toplevel_only"_a = false,
+            "_"_a = nb::kwargs())
+        .def(
+            "count_matched_type",
+            [](const InMemoryDB& self,
+               const string& link_type,
+               bool toplevel_only = false,
+               const nb::kwargs& _ = {}) -> size_t {
+                return self.count_matched_type(link_type, {toplevel_only : toplevel_only});
+            },
+            "link_type"_a,
+            nb::kw_only(),
+            "toplevel_only"_a = false,
+            "_"_a = nb::kwargs())
+        .def(
+            "count_incoming_links",
+            [](const InMemoryDB& self, const string& atom_handle, const nb::kwargs& _ = {})
+                -> size_t { return self.count_incoming_links(atom_handle); },
+            "atom_handle"_a,
+            "_"_a = nb::kwargs())
+        .def(
+            "count_sets",
+            [](const InMemoryDB& self,
+               const nb::iterable& operands,
+               bool toplevel_only = false,
+               const nb::kwargs& _ = {}) -> const vector<size_t> {
+                return self.count_sets(helpers::set_operands_from_python(operands),
+                                       {toplevel_only : toplevel_only});
+            },
+            "operands"_a,
+            nb::kw_only(),
+            "toplevel_only"_a = false,
+            "_"_a = nb::kwargs())
+        .def("delete_atoms", &InMemoryDB::delete_atoms, "handles"_a)
+        .def(
+            "count_sets_intersection",
+            [](const InMemoryDB& self,
+               const nb::iterable& operands,
+               bool toplevel_only = false,
+               size_t limit = 0,
+               const nb::kwargs& _ = {}) -> size_t {
+                return self.count_sets_intersection(helpers::set_operands_from_python(operands),
+                                                    limit,
+                                                    {toplevel_only : toplevel_only});
+            },
+            "operands"_a,
+            nb::kw_only(),
+            "toplevel_only"_a = false,
+            "limit"_a = 0,
+            "_"_a = nb::kwargs())
+        .def(
+            "iter_matched_links",
+            [](const InMemoryDB& self,
+               const string& link_type,
+               const StringList& target_handles,
+               bool toplevel_only = false,
+               size_t limit = 0,
+               const nb::kwargs& _ = {}) -> nb::iterator {
+                if (link_type != WILDCARD and
+                    find(target_handles.begin(), target_handles.end(), WILDCARD) ==
+                        target_handles.end()) {
+                    // concrete patterns match at most one link, there is no stored set
+                    auto matched = make_shared<StringUnorderedSet>(
+                        self.get_matched_links(link_type, target_handles));
+                    if (toplevel_only) {
+                        auto toplevel = self.find_type_set(link_type, true);
+                        erase_if(*matched, [&](const string& handle) {
+                            return not toplevel or not toplevel->contains(handle);
+                        });
+                    }
+                    return helpers::handles_iterator(
+                        nb::type<InMemoryDB>(), self, nullptr, limit, move(matched));
+                }
+                return helpers::handles_iterator(
+                    nb::type<InMemoryDB>(),
+                    self,
+                    self.find_pattern_set(link_type, target_handles, toplevel_only),
+                    limit);
+            },
+            "link_type"_a,
+            "target_handles"_a,
+            nb::kw_only(),
+            "toplevel_only"_a = false,
+            "limit"_a = 0,
+            "_"_a = nb::kwargs(),
+            nb::keep_alive<0, 1>())
+        .def(
+            "iter_matched_type",
+            [](const InMemoryDB& self,
+               const string& link_type,
+               bool toplevel_only = false,
+               size_t limit = 0,
+               const nb::kwargs& _ = {}) -> nb::iterator {
+                return helpers::handles_iterator(nb::type<InMemoryDB>(),
+                                                 self,
+                                                 self.find_type_set(link_type, toplevel_only),
+                                                 limit);
+            },
+            "link_type"_a,
+            nb::kw_only(),
+            "toplevel_only"_a = false,
+            "limit"_a = 0,
+            "_"_a = nb::kwargs(),
+            nb::keep_alive<0, 1>())
+        .def(
+            "iter_incoming_links",
+            [](const InMemoryDB& self,
+               const string& atom_handle,
+               size_t limit = 0,
+               const nb::kwargs& _ = {}) -> nb::iterator {
+                return helpers::handles_iterator(
+                    nb::type<InMemoryDB>(), self, self.find_incoming_set(atom_handle), limit);
+            },
+            "atom_handle"_a,
+            nb::kw_only(),
+            "limit"_a = 0,
+            "_"_a = nb::kwargs(),
+            nb::keep_alive<0, 1>())
         .def("__repr__", [](const InMemoryDB& self) -> string { return "<Atom database InMemory>"; })
         .def("__str__", [](const InMemoryDB& self) -> string { return "<Atom database InMemory>"; });
     // ---------------------------------------------------------------------------------------------
@@ -7,22 +7,43 @@ and updating indexes. The module integrates with MongoDB for persistent storage
 for caching and fast access to frequently used data.
 """
 
+import atexit
 import base64
 import collections
+import contextlib
+import functools
 import itertools
 import pickle
 import re
 import sys
-from copy import deepcopy
+import threading
+import time
+import uuid
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy, deepcopy
+from datetime import datetime
 from enum import Enum
-from typing import Any, Iterable, Mapping, Optional, OrderedDict, TypeAlias
+from typing import (
+    Any,
+    Callable,
+    Container,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    OrderedDict,
+    TypeAlias,
+)
 
-from pymongo import ASCENDING, MongoClient
+from bson import Decimal128, ObjectId, json_util
+from pymongo import ASCENDING, MongoClient, ReplaceOne, ReturnDocument
 from pymongo import errors as pymongo_errors
 from pymongo.collection import Collection
 from pymongo.database import Database
 from redis import Redis
 from redis.cluster import RedisCluster
+from redis.exceptions import AskError, RedisError, ResponseError
 
 from hyperon_das_atomdb.database import (
     WILDCARD,
@@ -37,6 +58,7 @@ from hyperon_das_atomdb.database import (
 )
 from hyperon_das_atomdb.exceptions import (
     AtomDoesNotExist,
+    BulkWriteMongoDBException,
     ConnectionMongoDBException,
     InvalidOperationException,
 )
@@ -50,25 +72,99 @@ DocumentT: TypeAlias = dict[str, Any]
 # pylint: enable=invalid-name
 
 
-def _build_redis_key(prefix: str, key: str | list[Any]) -> str:
+def _build_redis_key(prefix: str, key: str | list[Any], hash_tag: bool = False) -> str:
     """
     Build a Redis key by concatenating the given prefix and key with a colon separator.
 
     Args:
         prefix (str): The prefix to be used in the Redis key.
         key (str): The key to be concatenated with the prefix.
+        hash_tag (bool): Whether to wrap the key in a Redis Cluster hash tag (`{key}`), so
+            every key built from the same value is mapped to the same slot. Defaults to False.
 
     Returns:
         str: The concatenated Redis key.
     """
+    if hash_tag:
+        return prefix + ":{" + str(key) + "}"
     return prefix + ":" + str(key)
 
 
+def _approximate_document_size(value: Any) -> int:
+    """
+    Compute a cheap approximation of the BSON-encoded size of the given value.
+
+    Args:
+        value (Any): The document, or a value within a document, whose size is approximated.
+
+    Returns:
+        int: The approximate size of the value, in bytes.
+    """
+    if isinstance(value, str):
+        return len(value) + 5
+    if isinstance(value, dict):
+        return 5 + sum(len(key) + 2 + _approximate_document_size(v) for key, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return 5 + sum(3 + _approximate_document_size(v) for v in value)
+    return 8
+
+
+def _toplevel_key(key: str) -> str:
+    """
+    Build the key of the set holding only the toplevel links of the given pattern/template set.
+
+    The key keeps the namespace of the given key, if any, so `ns:patterns:<hash>` is mapped to
+    `ns:toplevel_patterns:<hash>`.
+
+    Args:
+        key (str): The key of a pattern or template set.
+
+    Returns:
+        str: The key of the toplevel-only set kept next to it.
+    """
+    position = key.rfind(":", 0, key.rfind(":")) + 1
+    return key[:position] + "toplevel_" + key[position:]
+
+
+def _pack_handle(handle: str) -> str:
+    """
+    Pack a hexadecimal handle into its raw bytes, as stored by the binary handle format.
+
+    The bytes are kept in a string decoded with the `surrogateescape` error handler, which is
+    how the Redis client encodes and decodes them when `redis_binary_handles` is enabled, so
+    they round-trip unchanged. Values that are not hexadecimal are returned unchanged.
+
+    Args:
+        handle (str): The hexadecimal handle.
+
+    Returns:
+        str: The packed handle.
+    """
+    try:
+        return bytes.fromhex(handle).decode("utf-8", "surrogateescape")
+    except ValueError:
+        return handle
+
+
+def _unpack_handle(value: str) -> str:
+    """
+    Unpack a handle packed by `_pack_handle` into its hexadecimal representation.
+
+    Args:
+        value (str): The packed handle.
+
+    Returns:
+        str: The hexadecimal handle.
+    """
+    return value.encode("utf-8", "surrogateescape").hex()
+
+
 class MongoCollectionNames(str, Enum):
     """Enum for MongoDB collection names used in the AtomDB."""
 
     ATOMS = "atoms"
     ATOM_TYPES = "atom_types"
+    ATOM_IDS = "atom_ids"
     DAS_CONFIG = "das_config"
 
 
@@ -79,6 +175,8 @@ class KeyPrefix(str, Enum):
     OUTGOING_SET = "outgoing_set"
     PATTERNS = "patterns"
     TEMPLATES = "templates"
+    TOPLEVEL_PATTERNS = "toplevel_patterns"
+    TOPLEVEL_TEMPLATES = "toplevel_templates"
     NAMED_ENTITIES = "names"
     CUSTOM_INDEXES = "custom_indexes"
 
@@ -91,17 +189,441 @@ class MongoIndexType(str, Enum):
     TEXT = "text"
 
 
-class _HashableDocument:
-    """Class for making documents hashable."""
+# Redis key incremented whenever a custom index is created, so clients reload their catalog
+INDEX_CATALOG_VERSION_KEY = "custom_indexes_version"
+
+# Redis hash holding the `node_count`, `link_count` and `type:<named type>` atom counters, and
+# the field marking them as initialized by `recount`
+ATOM_COUNTERS_KEY = "atom_counters"
+ATOM_COUNTERS_INITIALIZED_FIELD = "initialized"
+
+# Redis keys holding the namespace of the index keys read by clients, the namespace being built
+# by an online reindex, the counter used to name new namespaces and the reindex checkpoints
+INDEX_NAMESPACE_KEY = "index_namespace"
+INDEX_BUILDING_NAMESPACE_KEY = "index_namespace_building"
+INDEX_NAMESPACE_COUNTER_KEY = "index_namespace_counter"
+REINDEX_CHECKPOINTS_KEY = "reindex_checkpoints"
+
+# Prefixes of the index keys rebuilt by `reindex()`, the ones living in a namespace
+INDEX_KEY_PREFIXES = (
+    KeyPrefix.INCOMING_SET,
+    KeyPrefix.OUTGOING_SET,
+    KeyPrefix.PATTERNS,
+    KeyPrefix.TEMPLATES,
+    KeyPrefix.TOPLEVEL_PATTERNS,
+    KeyPrefix.TOPLEVEL_TEMPLATES,
+    KeyPrefix.NAMED_ENTITIES,
+)
+
+# `_id` of the DAS config document holding the last integer atom ID handed out
+ATOM_ID_COUNTER = "atom_id_counter"
+
+# Upper bounds of the `_id` ranges an online reindex splits the atoms collection in
+REINDEX_RANGE_BOUNDS = [*"123456789abcdef", None]
+
+# Instances running background threads, closed when the interpreter exits
+_OPEN_DATABASES: "weakref.WeakSet[RedisMongoDB]" = weakref.WeakSet()
+
+# `$type` aliases of the BSON types in the order MongoDB sorts them, null and missing fields
+# sorting first. Deprecated symbols and the timestamp and regular expression types, which atom
+# documents don't hold, are left out.
+_BSON_SORT_ORDER = [
+    "null",
+    "number",
+    "string",
+    "object",
+    "array",
+    "binData",
+    "objectId",
+    "bool",
+    "date",
+]
+
+
+def _encode_index_props(index_props: dict[str, Any]) -> str:
+    """
+    Encode the properties of a custom index as extended JSON.
+
+    Args:
+        index_props (dict[str, Any]): The properties of the index.
+
+    Returns:
+        str: The encoded properties.
+    """
+    return json_util.dumps(index_props)
+
+
+def _decode_index_props(value: str | bytes) -> dict[str, Any]:
+    """
+    Decode the properties of a custom index stored in Redis.
+
+    Properties stored by older versions as base64-encoded pickles are decoded as well.
+
+    Args:
+        value (str | bytes): The encoded properties.
+
+    Returns:
+        dict[str, Any]: The properties of the index.
+
+    Raises:
+        ValueError: If the decoded value is not a dictionary.
+    """
+    if isinstance(value, bytes):
+        value = value.decode("utf-8")
+    if value.startswith("{"):
+        index_props = json_util.loads(value)
+        if "index_type" in index_props:
+            index_props["index_type"] = MongoIndexType(index_props["index_type"])
+    else:
+        index_props = pickle.loads(base64.b64decode(value))
+    if not isinstance(index_props, dict):
+        raise ValueError("Custom index is not a dictionary")
+    return index_props
+
+
+def _bson_sort_rank(value: Any) -> int | None:
+    """
+    Find the position of the BSON type of a value in `_BSON_SORT_ORDER`.
+
+    Args:
+        value (Any): The value, as decoded by pymongo.
+
+    Returns:
+        int | None: The position, or None if the type is not known.
+    """
+    ranked_types: list[tuple[type | tuple[type, ...], int]] = [
+        (bool, 7),
+        ((int, float, Decimal128), 1),
+        (str, 2),
+        (Mapping, 3),
+        ((list, tuple), 4),
+        (bytes, 5),
+        (ObjectId, 6),
+        (datetime, 8),
+    ]
+    if value is None:
+        return 0
+    for types, rank in ranked_types:
+        if isinstance(value, types):
+            return rank
+    return None
+
+
+def _is_redirection(result: Any) -> bool:
+    """
+    Check whether a pipelined command result is a Redis Cluster redirection.
+
+    Args:
+        result (Any): The result of the command, or the error it raised.
+
+    Returns:
+        bool: True if the command was redirected (`MOVED` or `ASK`) without being executed.
+    """
+    if isinstance(result, AskError):
+        return True
+    return isinstance(result, ResponseError) and str(result).startswith(("MOVED ", "ASK "))
+
+
+class _InsertionBuffer:
+    """
+    Class for buffering documents pending insertion, keyed by handle.
+
+    Adding a document whose handle is already buffered replaces the previous one (last write
+    wins), so every atom is written at most once per flush. The approximate BSON size of the
+    buffered documents is tracked, so callers can flush on a byte budget as well as on a
+    document count.
+    """
+
+    def __init__(self) -> None:
+        self._documents: dict[str, DocumentT] = {}
+        self._sizes: dict[str, int] = {}
+        self.byte_size = 0
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def __bool__(self) -> bool:
+        return bool(self._documents)
+
+    def __contains__(self, handle: object) -> bool:
+        return handle in self._documents
+
+    def add(self, document: DocumentT) -> None:
+        """
+        Add a document to the buffer, replacing any buffered document with the same handle.
+
+        Args:
+            document (DocumentT): The document to be buffered.
+        """
+        handle = document[FieldNames.ID_HASH]
+        size = _approximate_document_size(document)
+        self.byte_size += size - self._sizes.get(handle, 0)
+        self._documents[handle] = document
+        self._sizes[handle] = size
+
+    def documents(self) -> list[DocumentT]:
+        """Return the buffered documents, in insertion order."""
+        return list(self._documents.values())
+
+    def clear(self) -> None:
+        self._documents.clear()
+        self._sizes.clear()
+        self.byte_size = 0
+
+
+class _AtomCache:
+    """
+    Class for caching built atoms in process, keyed by handle.
+
+    The least recently used atoms are evicted once the cache holds `max_entries` atoms or,
+    when `max_bytes` is set, once their approximate size exceeds it. When `ttl` is set, atoms
+    older than `ttl` seconds are treated as missing. Cached atoms are shared with the callers,
+    so they must not be modified.
+    """
+
+    def __init__(
+        self, max_entries: int, max_bytes: int | None = None, ttl: float | None = None
+    ) -> None:
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.byte_size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict[str, tuple[AtomT, int, float]]()
+        self._lock = threading.Lock()
+
+    def get(self, handle: str) -> AtomT | None:
+        """Return the cached atom with the given handle, or None if it is not cached."""
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is not None and self.ttl is not None and time.monotonic() > entry[2]:
+                self._pop(handle)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(handle)
+            self.hits += 1
+            return entry[0]
+
+    def get_many(self, handles: Iterable[str]) -> dict[str, AtomT]:
+        """Return the cached atoms among the given handles, keyed by handle."""
+        return {handle: atom for handle in handles if (atom := self.get(handle)) is not None}
+
+    def put(self, handle: str, atom: AtomT) -> None:
+        size = _approximate_document_size(atom.to_dict()) if self.max_bytes is not None else 0
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else 0.0
+        with self._lock:
+            self._pop(handle)
+            self._entries[handle] = (atom, size, expires_at)
+            self.byte_size += size
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.byte_size > self.max_bytes
+            ):
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, handles: Iterable[str]) -> None:
+        with self._lock:
+            for handle in handles:
+                self._pop(handle)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.byte_size = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "byte_size": self.byte_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _pop(self, handle: str) -> None:
+        if (entry := self._entries.pop(handle, None)) is not None:
+            self.byte_size -= entry[1]
+
+
+class _BackgroundFlusher:
+    """
+    Class for writing full insertion buffers in a background thread.
+
+    Producers keep filling the insertion buffer while the documents handed to `submit` are
+    written by the flusher thread. Only one set of documents is written at a time, so a
+    producer submitting while the previous set is still being written blocks until it is
+    done (back-pressure). An error raised by a write is kept and re-raised by the next call
+    to `raise_error`.
+    """
+
+    def __init__(self, write: Callable[[list[DocumentT]], None]) -> None:
+        self._write = write
+        self._condition = threading.Condition()
+        self._pending: list[DocumentT] | None = None
+        self._busy = False
+        self._closed = False
+        self._error: Exception | None = None
+        self._thread = threading.Thread(target=self._run, name="atomdb-flusher", daemon=True)
+        self._thread.start()
+
+    def submit(self, documents: list[DocumentT]) -> None:
+        """Hand documents to the flusher thread, waiting while a previous write is running."""
+        with self._condition:
+            while self._pending is not None or self._busy:
+                self._condition.wait()
+            self._pending = documents
+            self._condition.notify_all()
+
+    def wait(self) -> None:
+        """Wait until every submitted document has been written."""
+        with self._condition:
+            while self._pending is not None or self._busy:
+                self._condition.wait()
+
+    def raise_error(self) -> None:
+        """Re-raise the error of a previous write, if any."""
+        with self._condition:
+            error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def close(self) -> None:
+        """Write the pending documents and stop the flusher thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                documents, self._pending = self._pending, None
+                self._busy = True
+            try:
+                self._write(documents)
+            except Exception as e:  # pylint: disable=broad-except
+                logger().error(f"Failed to flush buffer in background - Details: {str(e)}")
+                with self._condition:
+                    self._error = self._error or e
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+
+class _ChangeFeedListener:
+    """
+    Class for consuming the change events other clients append to a Redis Stream.
+
+    A daemon thread blocks on `XREAD` for at most `block_ms` milliseconds at a time and calls
+    `on_change(operation, handles)` for every event not published by `origin`, so changes
+    are applied within a bounded delay.
+    """
 
-    def __init__(self, base: DocumentT):
-        self.base = base
+    def __init__(
+        self,
+        redis: Redis | RedisCluster,
+        stream: str,
+        origin: str,
+        on_change: Callable[[str, list[str]], None],
+        block_ms: int = 1000,
+    ) -> None:
+        self._redis = redis
+        self._stream = stream
+        self._origin = origin
+        self._on_change = on_change
+        self._block_ms = block_ms
+        self._stopped = threading.Event()
+        latest = self._redis.xrevrange(stream, count=1)
+        self._last_id = latest[0][0] if latest else "0-0"  # type: ignore
+        self._thread = threading.Thread(target=self._run, name="atomdb-change-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                response = self._redis.xread(
+                    {self._stream: self._last_id}, count=1000, block=self._block_ms
+                )
+            except RedisError as e:
+                logger().error(f"Failed to read the change feed - Details: {str(e)}")
+                self._stopped.wait(self._block_ms / 1000)
+                continue
+            for _, entries in response or []:  # type: ignore
+                for entry_id, fields in entries:
+                    self._last_id = entry_id
+                    if fields.get("origin") == self._origin:
+                        continue
+                    handles = fields["handles"].split(",") if fields.get("handles") else []
+                    try:
+                        self._on_change(fields["operation"], handles)
+                    except Exception as e:  # pylint: disable=broad-except
+                        logger().error(f"Failed to apply change event - Details: {str(e)}")
+
+
+class _RedisCommandBatch:
+    """
+    Class for collecting Redis index writes so they can be coalesced and pipelined.
 
-    def __hash__(self) -> int:
-        return hash(self.base["_id"])
+    Values written with `set` are kept by key (last write wins) and members added with `sadd`
+    or removed with `srem` are merged by key (the last call for a member wins), so a batch
+    issues a single command per key, no matter how many documents contributed to it. Very
+    large sets are split in commands of at most `max_members` members. Keys removed with
+    `delete` are deleted before any other command is issued.
+    """
 
-    def __str__(self) -> str:
-        return str(self.base)
+    def __init__(self, max_members: int = 1000) -> None:
+        self.max_members = max(1, max_members)
+        self.deleted: set[str] = set()
+        self.values: dict[str, str] = {}
+        self.members: dict[str, set[str]] = collections.defaultdict(set)
+        self.removed_members: dict[str, set[str]] = collections.defaultdict(set)
+
+    def delete(self, key: str) -> None:
+        self.deleted.add(key)
+        self.values.pop(key, None)
+        self.members.pop(key, None)
+        self.removed_members.pop(key, None)
+
+    def set(self, key: str, value: str) -> None:
+        self.values[key] = value
+
+    def sadd(self, key: str, *members: str) -> None:
+        self.members[key].update(members)
+        if key in self.removed_members:
+            self.removed_members[key].difference_update(members)
+
+    def srem(self, key: str, *members: str) -> None:
+        self.removed_members[key].update(members)
+        if key in self.members:
+            self.members[key].difference_update(members)
+
+    def commands(self) -> Iterator[tuple[Any, ...]]:
+        """Yield the coalesced commands as `(method_name, *args)` tuples."""
+        for key in self.deleted:
+            yield "delete", key
+        for key, value in self.values.items():
+            yield "set", key, value
+        for name, members_by_key in (("sadd", self.members), ("srem", self.removed_members)):
+            for key, members in members_by_key.items():
+                if not members:
+                    continue
+                members_list = list(members)
+                for start in range(0, len(members_list), self.max_members):
+                    yield name, key, *members_list[start : start + self.max_members]  # noqa: E203
 
 
 class MongoDBIndex(Index):
@@ -115,6 +637,8 @@ class MongoDBIndex(Index):
             collection (Collection): The MongoDB collection to manage node documents.
         """
         self.collection = collection
+        # whether the last call to `create` rebuilt an index created by an older version
+        self.rebuilt = False
 
     def create(
         self,
@@ -153,16 +677,44 @@ class MongoDBIndex(Index):
         if idx_type == MongoIndexType.TEXT:
             index_list = [(f, "text") for f in fields]
         else:
-            index_list = [(f, ASCENDING) for f in fields]  # store the index in ascending order
+            # store the index in ascending order, ending with `_id` so it serves the keyset
+            # pagination of `get_atoms_by_index`
+            index_list = [(f, ASCENDING) for f in fields] + [("_id", ASCENDING)]
 
+        self.rebuilt = False
         if not self.index_exists(index_id):
             return (
                 self.collection.create_index(index_list, **index_conditionals),
                 index_props,
             )
+        elif idx_type != MongoIndexType.TEXT and self._index_fields(index_id) != [
+            field for field, _ in index_list
+        ]:
+            # indexes created by older versions don't end with `_id`, they are rebuilt
+            self.collection.drop_index(index_id)
+            self.rebuilt = True
+            return (
+                self.collection.create_index(index_list, **index_conditionals),
+                index_props,
+            )
         else:
             return index_id, index_props
 
+    def _index_fields(self, index_id: str) -> list[str]:
+        """
+        Get the fields of an existing index, in order.
+
+        Args:
+            index_id (str): The index ID.
+
+        Returns:
+            list[str]: The fields of the index, or an empty list if it does not exist.
+        """
+        for index in self.collection.list_indexes():
+            if index.get("name") == index_id:
+                return list(index.get("key", {}))
+        return []
+
     def index_exists(self, index_id: str) -> bool:
         indexes = self.collection.list_indexes()
         index_ids = [index.get("name") for index in indexes]
@@ -178,10 +730,86 @@ class RedisMongoDB(AtomDB):
         return "<Atom database RedisMongo>"  # pragma no cover
 
     def __init__(self, **kwargs: Optional[dict[str, Any]]) -> None:
-        """Initialize an instance of a custom class with Redis and MongoDB connections."""
+        """
+        Initialize an instance of a custom class with Redis and MongoDB connections.
+
+        Args:
+            **kwargs: Database connection parameters (see `_setup_databases`), the
+                'pattern_index_templates' option and the following tuning parameters:
+                - mongo_bulk_insertion_max_bytes (int): Approximate size, in bytes, of the
+                                                     buffered atoms that triggers a commit.
+                                                     Defaults to 256000000.
+                - background_flush (bool)          : Whether full insertion buffers are written
+                                                     by a background thread while the caller
+                                                     keeps adding atoms. Defaults to False.
+                - atom_cache_size (int)            : Maximum number of atoms kept in an
+                                                     in-process LRU cache. Defaults to 0, which
+                                                     disables the cache.
+                - atom_cache_max_bytes (int)       : Maximum approximate size, in bytes, of the
+                                                     cached atoms. Defaults to None (no limit).
+                - atom_cache_ttl (float)           : Time, in seconds, an atom is kept in the
+                                                     cache. Defaults to None (no expiration).
+                - change_feed_stream (str)         : Name of a Redis Stream the handles of
+                                                     committed and deleted atoms are appended
+                                                     to, so other clients can invalidate their
+                                                     caches. Defaults to None (disabled).
+                - change_feed_maxlen (int)         : Approximate maximum number of events kept
+                                                     in the stream. Defaults to 100000.
+                - mongo_multi_get_batch_size (int) : Maximum number of handles in a single `$in`
+                                                     query of `get_atoms`. Defaults to 1000.
+                - mongo_find_batch_size (int)      : Number of documents fetched per round trip
+                                                     by the handle and name queries. Defaults
+                                                     to 1000.
+                - mongo_bulk_write_batch_size (int): Maximum number of documents sent to
+                                                     MongoDB in a single `bulk_write` call.
+                                                     Defaults to 1000.
+                - redis_pipeline_batch_size (int)  : Maximum number of commands sent to Redis
+                                                     in a single pipeline. Defaults to 1000.
+                - redis_mget_batch_size (int)      : Maximum number of keys read by a single
+                                                     `MGET`. Defaults to 1000.
+                - redis_scan_count (int)           : Number of members `SSCAN` is hinted to
+                                                     return per call in the `iter_*` methods.
+                                                     Defaults to 1000.
+                - index_catalog_refresh_interval (float): Time, in seconds, between checks of
+                                                     the version stamp of the custom index
+                                                     catalog kept in process. Defaults to 5.
+                - online_reindex (bool)            : Whether the client follows the index
+                                                     namespace switches of online `reindex()`
+                                                     calls. Every client of the database must
+                                                     enable it before an online reindex runs.
+                                                     Defaults to False.
+                - index_namespace_refresh_interval (float): Time, in seconds, between checks
+                                                     of the namespace of the index keys, when
+                                                     `online_reindex` is enabled. Defaults to 1.
+                - redis_cluster_max_workers (int)  : Maximum number of cluster nodes receiving
+                                                     pipelines in parallel. Defaults to 8.
+                - redis_hash_tags (bool)           : Whether to wrap the handle of per-atom keys
+                                                     (names, outgoing and incoming sets) in a
+                                                     hash tag, so all of them share a cluster
+                                                     slot. Changing it requires a `reindex()`.
+                                                     Defaults to False.
+                - redis_binary_handles (bool)      : Whether handles are stored in Redis keys,
+                                                     set members and outgoing sets as their 16
+                                                     raw bytes instead of 32 hexadecimal
+                                                     digits. Changing it requires a
+                                                     `reindex()`. Defaults to False.
+                - redis_integer_ids (bool)         : Whether pattern, template and incoming
+                                                     sets hold dense integer IDs of the links
+                                                     instead of their handles, so Redis can use
+                                                     its compact integer set encodings. The
+                                                     handle/ID dictionary is kept in MongoDB.
+                                                     Changing it requires a `reindex()`.
+                                                     Defaults to False.
+                - atom_id_block_size (int)         : Number of integer IDs reserved at once by
+                                                     a client. Defaults to 1000.
+                - atom_id_cache_size (int)         : Maximum number of handle/ID pairs cached
+                                                     in process. Defaults to 1000000.
+        """
         super().__init__()
         self.database_name = "das"
         self.max_pos_size_custom_index_template = 4
+        self.redis_hash_tags: bool = bool(kwargs.get("redis_hash_tags", False))
+        self.redis_binary_handles: bool = bool(kwargs.get("redis_binary_handles", False))
 
         self._setup_databases(**kwargs)
 
@@ -216,13 +844,76 @@ class RedisMongoDB(AtomDB):
         )
         self.mongo_bulk_insertion_buffer: dict[
             MongoCollectionNames,
-            tuple[Collection[Mapping[str, Any]], set[_HashableDocument]],
+            tuple[Collection[Mapping[str, Any]], _InsertionBuffer],
         ] = {
-            collection_name: (collection, set())
+            collection_name: (collection, _InsertionBuffer())
             for collection_name, collection in self.all_mongo_collections
         }
         self.mongo_bulk_insertion_limit = 100000
+        self.mongo_bulk_insertion_max_bytes: int = kwargs.get(  # type: ignore
+            "mongo_bulk_insertion_max_bytes", 256000000
+        )
+        self.mongo_bulk_write_batch_size: int = kwargs.get(  # type: ignore
+            "mongo_bulk_write_batch_size", 1000
+        )
+        self.mongo_find_batch_size: int = kwargs.get("mongo_find_batch_size", 1000)  # type: ignore
+        self.mongo_multi_get_batch_size: int = kwargs.get(  # type: ignore
+            "mongo_multi_get_batch_size", 1000
+        )
+        self.redis_pipeline_batch_size: int = kwargs.get(  # type: ignore
+            "redis_pipeline_batch_size", 1000
+        )
+        self.redis_mget_batch_size: int = kwargs.get("redis_mget_batch_size", 1000)  # type: ignore
+        self.redis_scan_count: int = kwargs.get("redis_scan_count", 1000)  # type: ignore
+        self.redis_cluster_max_workers: int = kwargs.get(  # type: ignore
+            "redis_cluster_max_workers", 8
+        )
         self.max_mongo_db_document_size = 16000000
+        self.atom_cache: _AtomCache | None = None
+        if atom_cache_size := kwargs.get("atom_cache_size", 0):
+            self.atom_cache = _AtomCache(
+                atom_cache_size,  # type: ignore
+                max_bytes=kwargs.get("atom_cache_max_bytes"),  # type: ignore
+                ttl=kwargs.get("atom_cache_ttl"),  # type: ignore
+            )
+        self.change_feed_stream: str | None = kwargs.get("change_feed_stream")  # type: ignore
+        self.change_feed_maxlen: int = kwargs.get("change_feed_maxlen", 100000)  # type: ignore
+        self._client_id = uuid.uuid4().hex
+        self._change_listener: _ChangeFeedListener | None = None
+        self._change_callbacks: list[Callable[[str, list[str]], None]] = []
+        self.index_catalog_refresh_interval: float = kwargs.get(  # type: ignore
+            "index_catalog_refresh_interval", 5.0
+        )
+        self._index_catalog: dict[str, dict[str, Any]] = {}
+        self._index_catalog_version: str | None = None
+        self._index_catalog_checked_at = 0.0
+        self._load_index_catalog()
+        self.online_reindex: bool = bool(kwargs.get("online_reindex", False))
+        self.index_namespace_refresh_interval: float = kwargs.get(  # type: ignore
+            "index_namespace_refresh_interval", 1.0
+        )
+        self._index_namespace = ""
+        self._building_namespace: str | None = None
+        self._index_namespace_checked_at = 0.0
+        self._namespace_override = threading.local()
+        self._load_index_namespace()
+        self.redis_integer_ids: bool = bool(kwargs.get("redis_integer_ids", False))
+        self.atom_id_block_size: int = kwargs.get("atom_id_block_size", 1000)  # type: ignore
+        self.atom_id_cache_size: int = kwargs.get("atom_id_cache_size", 1000000)  # type: ignore
+        self.mongo_atom_ids_collection = self.mongo_db.get_collection(MongoCollectionNames.ATOM_IDS)
+        if self.redis_integer_ids:
+            self.mongo_atom_ids_collection.create_index("id", unique=True)
+        self._atom_ids_lock = threading.Lock()
+        self._atom_id_by_handle: dict[str, int] = {}
+        self._handle_by_atom_id: dict[int, str] = {}
+        self._next_atom_id = 0
+        self._atom_id_block_end = 0
+        self._flusher: _BackgroundFlusher | None = None
+        if kwargs.get("background_flush", False):
+            self._flusher = _BackgroundFlusher(
+                lambda documents: self._upsert_documents(self.mongo_atoms_collection, documents)
+            )
+            _OPEN_DATABASES.add(self)
         logger().info("Database setup finished")
 
     def _setup_databases(self, **kwargs) -> None:
@@ -284,6 +975,7 @@ class RedisMongoDB(AtomDB):
             redis_password,
             redis_cluster,
             redis_ssl,
+            self.redis_binary_handles,
         )
 
     def _connection_mongo_db(
@@ -337,6 +1029,7 @@ class RedisMongoDB(AtomDB):
         redis_password: str | None,
         redis_cluster: bool = False,
         redis_ssl: bool = False,
+        redis_binary_handles: bool = False,
     ) -> Redis | RedisCluster:
         """
         Establish a connection to the Redis database using the provided parameters.
@@ -348,6 +1041,8 @@ class RedisMongoDB(AtomDB):
             redis_password (str | None): The password for Redis authentication.
             redis_cluster (bool): Whether to use Redis in cluster mode. Defaults to False.
             redis_ssl (bool): Whether to use SSL for Redis connection. Defaults to False.
+            redis_binary_handles (bool): Whether raw handle bytes are stored, which requires
+                them to round-trip through the client decoding. Defaults to False.
 
         Returns:
             Redis | RedisCluster: The connected Redis or RedisCluster instance.
@@ -372,6 +1067,8 @@ class RedisMongoDB(AtomDB):
             "decode_responses": True,
             "ssl": redis_ssl,
         }
+        if redis_binary_handles:
+            redis_connection["encoding_errors"] = "surrogateescape"
 
         if redis_password and redis_username:
             redis_connection["password"] = redis_password
@@ -506,7 +1203,8 @@ class RedisMongoDB(AtomDB):
                 }
                 self.pattern_index_templates.append(t)
         # NOTE creating index for name search
-        self.create_field_index("node", fields=["name"])
+        # every client creates it before loading its index catalog, so it is not published
+        self._create_field_index("node", fields=["name"], publish=False)
 
     def _retrieve_document(self, handle: str) -> DocumentT | None:
         """
@@ -529,6 +1227,108 @@ class RedisMongoDB(AtomDB):
             return document
         return None
 
+    def _retrieve_documents(
+        self, handles: Iterable[str], projection: list[str] | None = None
+    ) -> dict[str, DocumentT]:
+        """
+        Retrieve the documents with the given handles from the MongoDB collection.
+
+        The handles are queried in chunks of at most `mongo_multi_get_batch_size` handles
+        using `$in`. Unless a projection is given, the targets of link documents are added
+        to them, as in `_retrieve_document`.
+
+        Args:
+            handles (Iterable[str]): The handles of the documents to be retrieved.
+            projection (list[str] | None): The fields to be retrieved. Defaults to None, which
+                retrieves whole documents.
+
+        Returns:
+            dict[str, DocumentT]: The documents found, keyed by handle. Handles without a
+                document are not in the dictionary.
+        """
+        unique_handles = list(dict.fromkeys(handles))
+        chunk_size = max(1, self.mongo_multi_get_batch_size)
+        mongo_projection = None if projection is None else {field: 1 for field in projection}
+        documents: dict[str, DocumentT] = {}
+        for start in range(0, len(unique_handles), chunk_size):
+            chunk = unique_handles[start : start + chunk_size]  # noqa: E203
+            mongo_filter = {FieldNames.ID_HASH: {"$in": chunk}}
+            for document in self.mongo_atoms_collection.find(mongo_filter, mongo_projection):
+                if (
+                    projection is None
+                    and self._is_document_link(document)
+                    and FieldNames.TARGETS not in document
+                ):
+                    document[FieldNames.TARGETS] = self._get_document_keys(document)
+                documents[document[FieldNames.ID_HASH]] = document
+        return documents
+
+    def get_atoms(self, handles: Iterable[str], **kwargs) -> list[AtomT | DocumentT]:
+        """
+        Retrieve the atoms with the given handles using batched queries.
+
+        Documents are fetched with chunked `$in` queries instead of one query per handle, and
+        the targets of links are fetched the same way when `targets_document` or
+        `deep_representation` is set.
+
+        Args:
+            handles (Iterable[str]): The handles of the atoms to be retrieved.
+            **kwargs: Additional keyword arguments.
+                - projection (list[str], optional): The fields to be retrieved. When given,
+                  the projected documents are returned instead of atoms.
+                - no_target_format (bool, optional): Whether to skip fetching the targets of
+                  links. Defaults to False.
+                - targets_document (bool, optional): Whether to fill the targets documents of
+                  links. Defaults to False.
+                - deep_representation (bool, optional): Whether to fill the targets documents
+                  of links recursively. Defaults to False.
+
+        Returns:
+            list[AtomT | DocumentT]: The atoms (or projected documents), in the order of
+                `handles`.
+
+        Raises:
+            AtomDoesNotExist: If any of the handles has no atom. The missing handles are
+                listed in the exception details.
+        """
+        handles = list(handles)
+        projection = kwargs.get("projection")
+        atoms: dict[str, AtomT] = {}
+        if projection is None and self.atom_cache is not None:
+            atoms = self.atom_cache.get_many(dict.fromkeys(handles))
+        documents = self._retrieve_documents(
+            [handle for handle in handles if handle not in atoms], projection
+        )
+        if missing := [
+            handle
+            for handle in dict.fromkeys(handles)
+            if handle not in atoms and handle not in documents
+        ]:
+            logger().error(f"Failed to retrieve atoms. Nonexistent handles: {missing}")
+            raise AtomDoesNotExist("Nonexistent atom", f"handles: {missing}")
+        if projection is not None:
+            return [documents[handle] for handle in handles]
+        for handle, document in documents.items():
+            atoms[handle] = self._build_atom_from_dict(document)
+            if self.atom_cache is not None:
+                self.atom_cache.put(handle, atoms[handle])
+        if not kwargs.get("no_target_format", False) and (
+            kwargs.get("targets_document", False) or kwargs.get("deep_representation", False)
+        ):
+            # links are copied, so cached atoms are never modified
+            links = {
+                handle: copy(atom)
+                for handle, atom in atoms.items()
+                if isinstance(atom, LinkT)  # type: ignore
+            }
+            target_handles = [target for link in links.values() for target in link.targets]
+            target_kwargs = kwargs if kwargs.get("deep_representation", False) else {}
+            targets = dict(zip(target_handles, self.get_atoms(target_handles, **target_kwargs)))
+            for link in links.values():
+                link.targets_documents = [targets[target] for target in link.targets]
+            atoms.update(links)
+        return [atoms[handle] for handle in handles]
+
     def _build_named_type_hash_template(self, template: str | list[Any]) -> str | list[Any]:
         """
         Build a named type hash template from the given template.
@@ -585,29 +1385,6 @@ class RedisMongoDB(AtomDB):
             index += 1
         return answer
 
-    def _filter_non_toplevel(self, matches: HandleSetT) -> HandleSetT:
-        """
-        Filter out non-toplevel links from the given list of matches.
-
-        This method iterates through the provided list of matches, retrieves the corresponding
-        link documents, and checks if each link is marked as toplevel. Only the toplevel links
-        are included in the returned list.
-
-        Args:
-            matches (HandleSetT): A set of link handles to be filtered.
-
-        Returns:
-            HandleSetT: A set of handles corresponding to toplevel links.
-        """
-        return {
-            link_handle
-            for link_handle in matches
-            if (
-                (link := self._retrieve_document(link_handle))
-                and link.get(FieldNames.IS_TOPLEVEL, False)
-            )
-        }
-
     def get_node_handle(self, node_type: str, node_name: str) -> str:
         node_handle = self.node_handle(node_type, node_name)
         document = self._retrieve_document(node_handle)
@@ -630,35 +1407,69 @@ class RedisMongoDB(AtomDB):
             raise ValueError(f"Invalid handle: {node_handle}")
         return answer
 
+    def get_node_names(self, node_handles: Iterable[str]) -> dict[str, str]:
+        """
+        Retrieve the names of the nodes with the given handles, using batched `MGET` reads.
+
+        Args:
+            node_handles (Iterable[str]): The handles of the nodes.
+
+        Returns:
+            dict[str, str]: The node names, keyed by handle. Handles without a name (links
+                or nonexistent atoms) are not in the dictionary.
+        """
+        handles = list(node_handles)
+        keys = [self._build_atom_key(KeyPrefix.NAMED_ENTITIES, handle) for handle in handles]
+        return {handle: name for handle, name in zip(handles, self._mget(keys)) if name}
+
     def get_node_type(self, node_handle: str) -> str | None:
         document = self.get_atom(node_handle)
         return document.named_type if isinstance(document, NodeT) else None  # type: ignore
 
     def get_node_by_name(self, node_type: str, substring: str) -> HandleListT:
+        return list(self.iter_node_by_name(node_type, substring))
+
+    def iter_node_by_name(self, node_type: str, substring: str) -> Iterator[str]:
+        """
+        Stream the handles of the nodes of the given type whose name contains `substring`.
+
+        Args:
+            node_type (str): The type of the nodes.
+            substring (str): A regular expression matched against the names of the nodes.
+
+        Returns:
+            Iterator[str]: The handles of the matching nodes.
+        """
         node_type_hash = ExpressionHasher.named_type_hash(node_type)
         mongo_filter = {
             FieldNames.COMPOSITE_TYPE_HASH: node_type_hash,
             FieldNames.NODE_NAME: {"$regex": substring},
         }
-        return [
-            document[FieldNames.ID_HASH]
-            for document in self.mongo_atoms_collection.find(mongo_filter)
-        ]
+        return self._find_field_values(mongo_filter, FieldNames.ID_HASH)
 
     def get_atoms_by_field(self, query: list[OrderedDict[str, str]]) -> HandleListT:
+        return list(self.iter_atoms_by_field(query))
+
+    def iter_atoms_by_field(self, query: list[OrderedDict[str, str]]) -> Iterator[str]:
+        """
+        Stream the handles of the atoms whose fields have the given values.
+
+        Args:
+            query (list[OrderedDict[str, str]]): The `field` and `value` pairs to be matched.
+
+        Returns:
+            Iterator[str]: The handles of the matching atoms.
+        """
         mongo_filter = collections.OrderedDict([(q["field"], q["value"]) for q in query])
-        return [
-            document[FieldNames.ID_HASH]
-            for document in self.mongo_atoms_collection.find(mongo_filter)
-        ]
+        return self._find_field_values(mongo_filter, FieldNames.ID_HASH)
 
     def get_atoms_by_index(
         self,
         index_id: str,
         query: list[dict[str, Any]],
-        cursor: int = 0,
+        cursor: int | str = 0,
         chunk_size: int = 500,
-    ) -> tuple[int, list[AtomT]]:
+    ) -> tuple[int | str, list[AtomT]]:
         mongo_filter = collections.OrderedDict([(q["field"], q["value"]) for q in query])
         return self._get_atoms_by_index(
             index_id, cursor=cursor, chunk_size=chunk_size, **mongo_filter
@@ -670,75 +1481,172 @@ class RedisMongoDB(AtomDB):
         field: Optional[str] = None,
         text_index_id: Optional[str] = None,
     ) -> HandleListT:
+        return list(self.iter_atoms_by_text_field(text_value, field, text_index_id))
+
+    def iter_atoms_by_text_field(
+        self,
+        text_value: str,
+        field: Optional[str] = None,
+        text_index_id: Optional[str] = None,
+    ) -> Iterator[str]:
+        """
+        Stream the handles of the atoms matching a text search, or a regular expression on
+        the given field.
+
+        Args:
+            text_value (str): The text searched for, or the regular expression if `field` is
+                given.
+            field (Optional[str]): The field matched against `text_value`. Defaults to None,
+                which runs a `$text` search.
+            text_index_id (Optional[str]): The index hinted to MongoDB. Defaults to None.
+
+        Returns:
+            Iterator[str]: The handles of the matching atoms.
+        """
         if field is not None:
             mongo_filter = {
                 field: {"$regex": text_value},
             }
         else:
             mongo_filter = {"$text": {"$search": text_value}}
+        return self._find_field_values(mongo_filter, FieldNames.ID_HASH, hint=text_index_id)
 
-        if text_index_id is not None:
-            return [
-                document[FieldNames.ID_HASH]
-                for document in self.mongo_atoms_collection.find(mongo_filter).hint(text_index_id)
-            ]
+    def get_node_by_name_starting_with(self, node_type: str, startswith: str):
+        return list(self.iter_node_by_name_starting_with(node_type, startswith))
 
-        return [
-            document[FieldNames.ID_HASH]
-            for document in self.mongo_atoms_collection.find(mongo_filter)
-        ]
+    def iter_node_by_name_starting_with(self, node_type: str, startswith: str) -> Iterator[str]:
+        """
+        Stream the handles of the nodes of the given type whose name starts with `startswith`.
 
-    def get_node_by_name_starting_with(self, node_type: str, startswith: str):
+        Args:
+            node_type (str): The type of the nodes.
+            startswith (str): The prefix of the names.
+
+        Returns:
+            Iterator[str]: The handles of the matching nodes.
+        """
         node_type_hash = ExpressionHasher.named_type_hash(node_type)
         mongo_filter = {
             FieldNames.COMPOSITE_TYPE_HASH: node_type_hash,
             FieldNames.NODE_NAME: {"$regex": f"^{startswith}"},
         }
-        # NOTE check projection to return only required fields, less data, but is faster?
-        # ex: self.mongo_atoms_collection.find(mongo_filter, projection={FieldNames.ID_HASH: 1}
-        return [
-            document[FieldNames.ID_HASH]
-            for document in self.mongo_atoms_collection.find(mongo_filter)
-        ]
+        return self._find_field_values(mongo_filter, FieldNames.ID_HASH)
 
     def get_all_nodes_handles(self, node_type: str) -> list[str]:
-        return [
-            document[FieldNames.ID_HASH]
-            for document in self.mongo_atoms_collection.find({FieldNames.TYPE_NAME: node_type})
-        ]
+        return list(self.iter_all_nodes_handles(node_type))
+
+    def iter_all_nodes_handles(self, node_type: str) -> Iterator[str]:
+        """
+        Stream the handles of the atoms of the given type.
+
+        Args:
+            node_type (str): The type of the atoms.
+
+        Returns:
+            Iterator[str]: The handles of the atoms.
+        """
+        return self._find_field_values({FieldNames.TYPE_NAME: node_type}, FieldNames.ID_HASH)
 
     def get_all_nodes_names(self, node_type: str) -> list[str]:
-        return [
-            document[FieldNames.NODE_NAME]
-            for document in self.mongo_atoms_collection.find({FieldNames.TYPE_NAME: node_type})
-        ]
+        return list(self.iter_all_nodes_names(node_type))
+
+    def iter_all_nodes_names(self, node_type: str) -> Iterator[str]:
+        """
+        Stream the names of the nodes of the given type.
+
+        Args:
+            node_type (str): The type of the nodes.
+
+        Returns:
+            Iterator[str]: The names of the nodes.
+        """
+        return self._find_field_values({FieldNames.TYPE_NAME: node_type}, FieldNames.NODE_NAME)
 
     def get_all_links(self, link_type: str, **kwargs) -> HandleSetT:
-        pymongo_cursor = self.mongo_atoms_collection.find({FieldNames.TYPE_NAME: link_type})
-        return {document[FieldNames.ID_HASH] for document in pymongo_cursor}
+        return set(self.iter_all_links(link_type, **kwargs))
 
-    def get_link_handle(self, link_type: str, target_handles: HandleListT) -> str:
-        link_handle = self.link_handle(link_type, target_handles)
-        document = self._retrieve_document(link_handle)
-        if document is not None:
-            return document[FieldNames.ID_HASH]
-        else:
-            logger().error(
-                f"Failed to retrieve link handle for {link_type}:{target_handles}. "
-                "This link may not exist."
-            )
-            raise AtomDoesNotExist("Nonexistent atom", f"{link_type}:{target_handles}")
+    def iter_all_links(self, link_type: str, **kwargs) -> Iterator[str]:
+        """
+        Stream the handles of the links of the given type.
 
-    def get_link_targets(self, link_handle: str) -> HandleListT:
-        answer = self._retrieve_outgoing_set(link_handle)
-        if not answer:
-            logger().error(
+        Args:
+            link_type (str): The type of the links.
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            Iterator[str]: The handles of the links.
+        """
+        return self._find_field_values({FieldNames.TYPE_NAME: link_type}, FieldNames.ID_HASH)
+
+    def _find_field_values(
+        self, mongo_filter: Mapping[str, Any], field: str, hint: str | None = None
+    ) -> Iterator[Any]:
+        """
+        Stream a single field of the atoms matching the given filter.
+
+        Only `field` is projected, so the rest of the documents never leaves MongoDB, and the
+        cursor fetches `mongo_find_batch_size` documents per round trip.
+
+        Args:
+            mongo_filter (Mapping[str, Any]): The MongoDB filter.
+            field (str): The field to be returned.
+            hint (str | None): The index hinted to MongoDB. Defaults to None.
+
+        Returns:
+            Iterator[Any]: The values of the field.
+        """
+        projection = {field: 1}
+        if field != FieldNames.ID_HASH:
+            projection[FieldNames.ID_HASH] = 0
+        pymongo_cursor = self.mongo_atoms_collection.find(
+            mongo_filter, projection=projection, batch_size=max(1, self.mongo_find_batch_size)
+        )
+        if hint is not None:
+            pymongo_cursor = pymongo_cursor.hint(hint)
+        for document in pymongo_cursor:
+            yield document[field]
+
+    def get_link_handle(self, link_type: str, target_handles: HandleListT) -> str:
+        link_handle = self.link_handle(link_type, target_handles)
+        document = self._retrieve_document(link_handle)
+        if document is not None:
+            return document[FieldNames.ID_HASH]
+        else:
+            logger().error(
+                f"Failed to retrieve link handle for {link_type}:{target_handles}. "
+                "This link may not exist."
+            )
+            raise AtomDoesNotExist("Nonexistent atom", f"{link_type}:{target_handles}")
+
+    def get_link_targets(self, link_handle: str) -> HandleListT:
+        answer = self._retrieve_outgoing_set(link_handle)
+        if not answer:
+            logger().error(
                 f"Failed to retrieve link targets for handle: {link_handle}. "
                 "The handle may be invalid or the corresponding link does not exist."
             )
             raise ValueError(f"Invalid handle: {link_handle}")
         return answer
 
+    def get_links_targets(self, link_handles: Iterable[str]) -> dict[str, HandleListT]:
+        """
+        Retrieve the targets of the links with the given handles, using batched `MGET` reads.
+
+        Args:
+            link_handles (Iterable[str]): The handles of the links.
+
+        Returns:
+            dict[str, HandleListT]: The target handles, keyed by link handle. Handles without
+                targets (nodes or nonexistent atoms) are not in the dictionary.
+        """
+        handles = list(link_handles)
+        keys = [self._build_atom_key(KeyPrefix.OUTGOING_SET, handle) for handle in handles]
+        return {
+            handle: self._split_outgoing_set(value)
+            for handle, value in zip(handles, self._mget(keys))
+            if value
+        }
+
     def get_matched_links(
         self, link_type: str, target_handles: HandleListT, **kwargs
     ) -> HandleSetT:
@@ -754,11 +1662,361 @@ class RedisMongoDB(AtomDB):
         )
 
         pattern_hash = ExpressionHasher.composite_hash([link_type_hash, *target_handles])
-        patterns_matched = self._retrieve_hash_targets_value(KeyPrefix.PATTERNS, pattern_hash)
-        if kwargs.get("toplevel_only", False):
-            return self._filter_non_toplevel(patterns_matched)
-        else:
-            return patterns_matched
+        key_prefix = (
+            KeyPrefix.TOPLEVEL_PATTERNS
+            if kwargs.get("toplevel_only", False)
+            else KeyPrefix.PATTERNS
+        )
+        return self._retrieve_hash_targets_value(key_prefix, pattern_hash)
+
+    def get_matched_links_many(
+        self, patterns: Iterable[tuple[str, HandleListT]], **kwargs
+    ) -> list[HandleSetT]:
+        """
+        Retrieve the links matching each of the given patterns in a single pipeline.
+
+        Every pattern is resolved as in `get_matched_links`, but all the Redis reads are sent
+        together: patterns with wildcards read their (toplevel-only, if requested) pattern
+        set and concrete patterns check the outgoing set key of the link they describe.
+
+        Args:
+            patterns (Iterable[tuple[str, HandleListT]]): The `(link_type, target_handles)`
+                patterns.
+            **kwargs: Additional keyword arguments, as in `get_matched_links`.
+                - toplevel_only (bool, optional): Whether to match toplevel links only.
+
+        Returns:
+            list[HandleSetT]: The handles of the links matching each pattern, in the order of
+                `patterns`.
+        """
+        key_prefix = (
+            KeyPrefix.TOPLEVEL_PATTERNS
+            if kwargs.get("toplevel_only", False)
+            else KeyPrefix.PATTERNS
+        )
+        commands: list[tuple[Any, ...]] = []
+        link_handles: list[str | None] = []
+        for link_type, target_handles in patterns:
+            if link_type != WILDCARD and WILDCARD not in target_handles:
+                link_handle = self.link_handle(link_type, target_handles)
+                key = self._build_atom_key(KeyPrefix.OUTGOING_SET, link_handle)
+                commands.append(("exists", key))
+                link_handles.append(link_handle)
+                continue
+            link_type_hash = (
+                WILDCARD if link_type == WILDCARD else ExpressionHasher.named_type_hash(link_type)
+            )
+            pattern_hash = ExpressionHasher.composite_hash([link_type_hash, *target_handles])
+            commands.append(("smembers", self._build_index_key(key_prefix, pattern_hash)))
+            link_handles.append(None)
+        return [
+            self._decode_handles(result)
+            if link_handle is None
+            else ({link_handle} if result else set())
+            for link_handle, result in zip(link_handles, self._execute_redis_commands(commands))
+        ]
+
+    def iter_matched_links(
+        self, link_type: str, target_handles: HandleListT, **kwargs
+    ) -> Iterator[str]:
+        """
+        Iterate lazily over the links matching the given pattern.
+
+        Patterns with wildcards are walked with `SSCAN`, so huge pattern sets are never loaded
+        into memory at once and the caller can stop early. `SSCAN` may return a member more
+        than once if the set changes while it is walked. Concrete patterns match at most one
+        link, read from MongoDB.
+
+        Args:
+            link_type (str): The type of the links, or a wildcard.
+            target_handles (HandleListT): The handles of the targets, or wildcards.
+            **kwargs: Additional keyword arguments.
+                - toplevel_only (bool, optional): Whether to match toplevel links only.
+                - count (int, optional): Number of members `SSCAN` is hinted to return per
+                  call. Defaults to `redis_scan_count`.
+                - limit (int, optional): Maximum number of handles yielded. Defaults to no
+                  limit.
+
+        Returns:
+            Iterator[str]: The handles of the matching links.
+        """
+        toplevel_only = kwargs.get("toplevel_only", False)
+        if link_type != WILDCARD and WILDCARD not in target_handles:
+            # there is no stored set for concrete patterns
+            document = self._retrieve_document(self.link_handle(link_type, target_handles))
+            if document is None or (
+                toplevel_only and not document.get(FieldNames.IS_TOPLEVEL, True)
+            ):
+                return
+            limit = kwargs.get("limit")
+            yield from itertools.islice(
+                [document[FieldNames.ID_HASH]], limit if limit is not None and limit > 0 else None
+            )
+            return
+        link_type_hash = (
+            WILDCARD if link_type == WILDCARD else ExpressionHasher.named_type_hash(link_type)
+        )
+        pattern_hash = ExpressionHasher.composite_hash([link_type_hash, *target_handles])
+        key_prefix = KeyPrefix.TOPLEVEL_PATTERNS if toplevel_only else KeyPrefix.PATTERNS
+        yield from self._scan_redis_members(
+            self._build_index_key(key_prefix, pattern_hash),
+            kwargs.get("count"),
+            kwargs.get("limit"),
+        )
+
+    def iter_matched_type(self, link_type: str, **kwargs) -> Iterator[str]:
+        """
+        Iterate lazily over the links of the given type, walking the type set with `SSCAN`.
+
+        Args:
+            link_type (str): The type of the links.
+            **kwargs: Additional keyword arguments, as in `iter_matched_links`.
+
+        Returns:
+            Iterator[str]: The handles of the links of the given type.
+        """
+        named_type_hash = ExpressionHasher.named_type_hash(link_type)
+        key_prefix = (
+            KeyPrefix.TOPLEVEL_TEMPLATES
+            if kwargs.get("toplevel_only", False)
+            else KeyPrefix.TEMPLATES
+        )
+        yield from self._scan_redis_members(
+            self._build_index_key(key_prefix, named_type_hash),
+            kwargs.get("count"),
+            kwargs.get("limit"),
+        )
+
+    def iter_incoming_links(self, atom_handle: str, **kwargs) -> Iterator[str]:
+        """
+        Iterate lazily over the links pointing to the given atom, walking the incoming set
+        with `SSCAN`.
+
+        Args:
+            atom_handle (str): The handle of the atom.
+            **kwargs: Additional keyword arguments.
+                - count (int, optional): Number of members `SSCAN` is hinted to return per
+                  call. Defaults to `redis_scan_count`.
+                - limit (int, optional): Maximum number of handles yielded. Defaults to no
+                  limit.
+
+        Returns:
+            Iterator[str]: The handles of the incoming links.
+        """
+        yield from self._scan_redis_members(
+            self._build_atom_key(KeyPrefix.INCOMING_SET, atom_handle),
+            kwargs.get("count"),
+            kwargs.get("limit"),
+        )
+
+    def count_matched_links(self, link_type: str, target_handles: HandleListT, **kwargs) -> int:
+        """
+        Count the links matching the given pattern with `SCARD`, without reading them.
+
+        Args:
+            link_type (str): The type of the links, or a wildcard.
+            target_handles (HandleListT): The handles of the targets, or wildcards.
+            **kwargs: Additional keyword arguments.
+                - toplevel_only (bool, optional): Whether to count toplevel links only.
+
+        Returns:
+            int: The number of matching links.
+        """
+        if link_type != WILDCARD and WILDCARD not in target_handles:
+            return len(self.get_matched_links(link_type, target_handles, **kwargs))
+        return self.count_sets([("pattern", link_type, target_handles)], **kwargs)[0]
+
+    def count_matched_type(self, link_type: str, **kwargs) -> int:
+        """
+        Count the links of the given type with `SCARD`, without reading them.
+
+        Args:
+            link_type (str): The type of the links.
+            **kwargs: Additional keyword arguments, as in `count_matched_links`.
+
+        Returns:
+            int: The number of links of the given type.
+        """
+        return self.count_sets([("type", link_type)], **kwargs)[0]
+
+    def count_incoming_links(self, atom_handle: str, **kwargs) -> int:
+        """
+        Count the links pointing to the given atom with `SCARD`, without reading them.
+
+        Args:
+            atom_handle (str): The handle of the atom.
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            int: The number of incoming links.
+        """
+        return self.count_sets([("incoming", atom_handle)], **kwargs)[0]
+
+    def count_sets(self, operands: Iterable[tuple[Any, ...]], **kwargs) -> list[int]:
+        """
+        Count the members of each of the given sets with `SCARD`, in a single pipeline.
+
+        Args:
+            operands (Iterable[tuple[Any, ...]]): The sets to be counted, as in
+                `get_sets_intersection`.
+            **kwargs: Additional keyword arguments, as in `get_sets_intersection`.
+
+        Returns:
+            list[int]: The number of members of each set, in the order of `operands`.
+
+        Raises:
+            ValueError: If an operand is invalid or is a pattern without wildcards.
+        """
+        keys = self._build_set_operand_keys(operands, **kwargs)
+        return [int(count) for count in self._execute_redis_commands(("scard", k) for k in keys)]
+
+    def get_sets_intersection(self, operands: Iterable[tuple[Any, ...]], **kwargs) -> HandleSetT:
+        """
+        Retrieve the links present in all the given sets, intersected with `SINTER`.
+
+        Operands are tuples describing a stored set of link handles:
+        `("pattern", link_type, target_handles)` (with at least one wildcard),
+        `("type", link_type)`, `("template", template)` or `("incoming", atom_handle)`.
+        Only the result is transferred from Redis. Under cluster mode the keys may live in
+        different slots, so the sets are read in a pipeline and combined locally.
+
+        Args:
+            operands (Iterable[tuple[Any, ...]]): The sets to be intersected.
+            **kwargs: Additional keyword arguments.
+                - toplevel_only (bool, optional): Whether pattern, type and template sets hold
+                  toplevel links only.
+
+        Returns:
+            HandleSetT: The handles of the links present in every set.
+
+        Raises:
+            ValueError: If an operand is invalid or is a pattern without wildcards.
+        """
+        return self._combine_redis_sets("sinter", operands, **kwargs)
+
+    def get_sets_union(self, operands: Iterable[tuple[Any, ...]], **kwargs) -> HandleSetT:
+        """
+        Retrieve the links present in any of the given sets, merged with `SUNION`.
+
+        Args:
+            operands (Iterable[tuple[Any, ...]]): The sets to be merged, as in
+                `get_sets_intersection`.
+            **kwargs: Additional keyword arguments, as in `get_sets_intersection`.
+
+        Returns:
+            HandleSetT: The handles of the links present in at least one set.
+        """
+        return self._combine_redis_sets("sunion", operands, **kwargs)
+
+    def get_sets_difference(self, operands: Iterable[tuple[Any, ...]], **kwargs) -> HandleSetT:
+        """
+        Retrieve the links of the first set that are not present in the other ones, with
+        `SDIFF`.
+
+        Args:
+            operands (Iterable[tuple[Any, ...]]): The sets, as in `get_sets_intersection`. The
+                other sets are subtracted from the first one.
+            **kwargs: Additional keyword arguments, as in `get_sets_intersection`.
+
+        Returns:
+            HandleSetT: The handles of the links present only in the first set.
+        """
+        return self._combine_redis_sets("sdiff", operands, **kwargs)
+
+    def count_sets_intersection(self, operands: Iterable[tuple[Any, ...]], **kwargs) -> int:
+        """
+        Count the links present in all the given sets with `SINTERCARD` (Redis 7+), without
+        transferring the intersection.
+
+        Args:
+            operands (Iterable[tuple[Any, ...]]): The sets to be intersected, as in
+                `get_sets_intersection`.
+            **kwargs: Additional keyword arguments, as in `get_sets_intersection`.
+                - limit (int, optional): Stop counting once this number is reached. Defaults
+                  to 0 (no limit).
+
+        Returns:
+            int: The number of links present in every set, capped at `limit`.
+        """
+        keys = self._build_set_operand_keys(operands, **kwargs)
+        if not keys:
+            return 0
+        limit = kwargs.get("limit", 0) or 0
+        if isinstance(self.redis, RedisCluster):
+            count = len(self._combine_redis_sets("sinter", operands, **kwargs))
+            return min(count, limit) if limit else count
+        return int(self.redis.sintercard(len(keys), keys, limit=limit))  # type: ignore
+
+    def _combine_redis_sets(
+        self, command: str, operands: Iterable[tuple[Any, ...]], **kwargs
+    ) -> HandleSetT:
+        """
+        Combine the sets described by the operands with the given Redis set command.
+
+        Args:
+            command (str): The Redis command: `sinter`, `sunion` or `sdiff`.
+            operands (Iterable[tuple[Any, ...]]): The sets, as in `get_sets_intersection`.
+            **kwargs: Additional keyword arguments, as in `get_sets_intersection`.
+
+        Returns:
+            HandleSetT: The handles resulting from the combination.
+        """
+        keys = self._build_set_operand_keys(operands, **kwargs)
+        if not keys:
+            return set()
+        if not isinstance(self.redis, RedisCluster):
+            return self._decode_handles(getattr(self.redis, command)(keys))
+        members = [
+            self._decode_handles(result)
+            for result in self._execute_redis_commands(("smembers", key) for key in keys)
+        ]
+        if command == "sinter":
+            return set.intersection(*members)
+        if command == "sunion":
+            return set.union(*members)
+        return members[0].difference(*members[1:])
+
+    def _build_set_operand_keys(self, operands: Iterable[tuple[Any, ...]], **kwargs) -> list[str]:
+        """
+        Build the Redis keys of the sets described by the operands.
+
+        Args:
+            operands (Iterable[tuple[Any, ...]]): The sets, as in `get_sets_intersection`.
+            **kwargs: Additional keyword arguments, as in `get_sets_intersection`.
+
+        Returns:
+            list[str]: The keys of the sets, in the order of `operands`.
+
+        Raises:
+            ValueError: If an operand is invalid or is a pattern without wildcards.
+        """
+        toplevel_only = kwargs.get("toplevel_only", False)
+        patterns_prefix = KeyPrefix.TOPLEVEL_PATTERNS if toplevel_only else KeyPrefix.PATTERNS
+        templates_prefix = KeyPrefix.TOPLEVEL_TEMPLATES if toplevel_only else KeyPrefix.TEMPLATES
+        keys = []
+        for kind, *args in operands:
+            if kind == "pattern" and len(args) == 2:
+                link_type, target_handles = args
+                if link_type != WILDCARD and WILDCARD not in target_handles:
+                    raise ValueError("Pattern operands must have at least one wildcard.")
+                link_type_hash = (
+                    WILDCARD
+                    if link_type == WILDCARD
+                    else ExpressionHasher.named_type_hash(link_type)
+                )
+                pattern_hash = ExpressionHasher.composite_hash([link_type_hash, *target_handles])
+                keys.append(self._build_index_key(patterns_prefix, pattern_hash))
+            elif kind == "type" and len(args) == 1:
+                named_type_hash = ExpressionHasher.named_type_hash(args[0])
+                keys.append(self._build_index_key(templates_prefix, named_type_hash))
+            elif kind == "template" and len(args) == 1:
+                template_hash = self._build_named_type_hash_template(args[0])
+                keys.append(self._build_index_key(templates_prefix, template_hash))
+            elif kind == "incoming" and len(args) == 1:
+                keys.append(self._build_atom_key(KeyPrefix.INCOMING_SET, args[0]))
+            else:
+                raise ValueError(f"Invalid set operand: {(kind, *args)}")
+        return keys
 
     def get_incoming_links_handles(self, atom_handle: str, **kwargs) -> HandleListT:
         links = self._retrieve_incoming_set(atom_handle, **kwargs)
@@ -766,29 +2024,29 @@ class RedisMongoDB(AtomDB):
 
     def get_incoming_links_atoms(self, atom_handle: str, **kwargs) -> list[AtomT]:
         links = self._retrieve_incoming_set(atom_handle, **kwargs)
-        return [self.get_atom(handle, **kwargs) for handle in links]
+        return self.get_atoms(links, **kwargs)
 
     def get_matched_type_template(self, template: list[Any], **kwargs) -> HandleSetT:
         try:
             template_hash = self._build_named_type_hash_template(template)
-            templates_matched = self._retrieve_hash_targets_value(
-                KeyPrefix.TEMPLATES, template_hash
+            key_prefix = (
+                KeyPrefix.TOPLEVEL_TEMPLATES
+                if kwargs.get("toplevel_only", False)
+                else KeyPrefix.TEMPLATES
             )
-            if kwargs.get("toplevel_only", False):
-                return self._filter_non_toplevel(templates_matched)
-            else:
-                return templates_matched
+            return self._retrieve_hash_targets_value(key_prefix, template_hash)
         except Exception as exception:
             logger().error(f"Failed to get matched type template - Details: {str(exception)}")
             raise ValueError(str(exception))
 
     def get_matched_type(self, link_type: str, **kwargs) -> HandleSetT:
         named_type_hash = ExpressionHasher.named_type_hash(link_type)
-        templates_matched = self._retrieve_hash_targets_value(KeyPrefix.TEMPLATES, named_type_hash)
-        if kwargs.get("toplevel_only", False):
-            return self._filter_non_toplevel(templates_matched)
-        else:
-            return templates_matched
+        key_prefix = (
+            KeyPrefix.TOPLEVEL_TEMPLATES
+            if kwargs.get("toplevel_only", False)
+            else KeyPrefix.TEMPLATES
+        )
+        return self._retrieve_hash_targets_value(key_prefix, named_type_hash)
 
     def get_link_type(self, link_handle: str) -> str | None:
         document = self.get_atom(link_handle)
@@ -831,33 +2089,131 @@ class RedisMongoDB(AtomDB):
             raise ValueError("Invalid atom type")
 
     def _get_atom(self, handle: str) -> AtomT | None:
+        if self.atom_cache is not None and (atom := self.atom_cache.get(handle)) is not None:
+            return atom
         document = self._retrieve_document(handle)
         if not document:
             return None
-        return self._build_atom_from_dict(document)
+        atom = self._build_atom_from_dict(document)
+        if self.atom_cache is not None:
+            self.atom_cache.put(handle, atom)
+        return atom
+
+    def get_atom_cache_stats(self) -> dict[str, int]:
+        """
+        Retrieve the statistics of the in-process atom cache.
+
+        Returns:
+            dict[str, int]: The number of cached atoms (`entries`), their approximate size
+                (`byte_size`, only tracked with `atom_cache_max_bytes`) and the `hits`,
+                `misses` and `evictions` counters. Empty when the cache is disabled.
+        """
+        return self.atom_cache.stats() if self.atom_cache is not None else {}
 
     def get_atom_type(self, handle: str) -> str | None:
+        if self.atom_cache is not None and (cached := self.atom_cache.get(handle)) is not None:
+            return cached.named_type
         atom = self._retrieve_document(handle)
         if atom is None:
             return None
         return atom[FieldNames.TYPE_NAME]
 
-    def count_atoms(self, parameters: dict[str, Any] | None = None) -> dict[str, int]:
-        atom_count = self.mongo_atoms_collection.estimated_document_count()
-        return_count = {"atom_count": atom_count}
-        if parameters and parameters.get("precise"):
-            nodes_count = self.mongo_atoms_collection.count_documents(
-                {FieldNames.COMPOSITE_TYPE: {"$exists": False}}
-            )
-            links_count = self.mongo_atoms_collection.count_documents(
-                {FieldNames.COMPOSITE_TYPE: {"$exists": True}}
-            )
-            return_count["node_count"] = nodes_count
-            return_count["link_count"] = links_count
-            return return_count
+    def count_atoms(self, parameters: dict[str, Any] | None = None) -> dict[str, Any]:
+        """
+        Count the atoms in the database.
 
+        Precise counts and the per-type breakdown are read from the counters kept in Redis,
+        which are updated on every commit and deletion. When the counters are missing (e.g.
+        for databases written by older versions) they are rebuilt with `recount`.
+
+        Args:
+            parameters (dict[str, Any] | None): Optional parameters.
+                - precise (bool): Whether to add exact `node_count` and `link_count`.
+                - per_type (bool): Whether to add a `type_counts` dictionary mapping each named
+                  type to the number of atoms of that type.
+
+        Returns:
+            dict[str, Any]: The `atom_count`, and the requested counts.
+        """
+        parameters = parameters or {}
+        if not (parameters.get("precise") or parameters.get("per_type")):
+            return {"atom_count": self.mongo_atoms_collection.estimated_document_count()}
+        counters = self._read_atom_counters()
+        node_count = counters.pop("node_count", 0)
+        link_count = counters.pop("link_count", 0)
+        return_count: dict[str, Any] = {"atom_count": node_count + link_count}
+        if parameters.get("precise"):
+            return_count["node_count"] = node_count
+            return_count["link_count"] = link_count
+        if parameters.get("per_type"):
+            return_count["type_counts"] = {
+                field[len("type:") :]: count  # noqa: E203
+                for field, count in counters.items()
+                if field.startswith("type:") and count > 0
+            }
         return return_count
 
+    def recount(self) -> dict[str, int]:
+        """
+        Rebuild the atom counters kept in Redis by counting the atoms in MongoDB.
+
+        This is a repair operation, needed only if the counters drifted, e.g. after atoms
+        were written to MongoDB by other means.
+
+        Returns:
+            dict[str, int]: The new counters: `node_count`, `link_count` and one
+                `type:<named type>` counter per named type.
+        """
+        counters = {"node_count": 0, "link_count": 0}
+        for name, exists in (("node_count", False), ("link_count", True)):
+            pipeline = [
+                {"$match": {FieldNames.COMPOSITE_TYPE: {"$exists": exists}}},
+                {"$group": {"_id": f"${FieldNames.TYPE_NAME}", "count": {"$sum": 1}}},
+            ]
+            for group in self.mongo_atoms_collection.aggregate(pipeline):  # type: ignore
+                counters[name] += group["count"]
+                type_field = f"type:{group['_id']}"
+                counters[type_field] = counters.get(type_field, 0) + group["count"]
+        self.redis.delete(ATOM_COUNTERS_KEY)
+        self.redis.hset(ATOM_COUNTERS_KEY, mapping={**counters, ATOM_COUNTERS_INITIALIZED_FIELD: 1})
+        return counters
+
+    def _read_atom_counters(self) -> dict[str, int]:
+        """
+        Read the atom counters kept in Redis, rebuilding them if they were never initialized.
+
+        Counters incremented by commits before `recount` ran only hold the changes made since
+        then, so they are rebuilt unless `recount` marked them as initialized.
+
+        Returns:
+            dict[str, int]: The counters, as in `recount`.
+        """
+        counters = self.redis.hgetall(ATOM_COUNTERS_KEY)
+        if counters.pop(ATOM_COUNTERS_INITIALIZED_FIELD, None) is None:  # type: ignore
+            return self.recount()
+        return {field: int(count) for field, count in counters.items()}  # type: ignore
+
+    def _update_atom_counters(self, documents: Iterable[DocumentT], amount: int) -> None:
+        """
+        Add `amount` to the node or link counter and to the type counter of each document.
+
+        Every counter is changed with an atomic `HINCRBY`, so concurrent clients never lose
+        updates.
+
+        Args:
+            documents (Iterable[DocumentT]): The documents of the inserted or deleted atoms.
+            amount (int): 1 for inserted atoms, -1 for deleted ones.
+        """
+        increments: collections.Counter[str] = collections.Counter()
+        for document in documents:
+            increments["link_count" if self._is_document_link(document) else "node_count"] += 1
+            increments[f"type:{document[FieldNames.TYPE_NAME]}"] += 1
+        if increments:
+            self._execute_redis_commands(
+                ("hincrby", ATOM_COUNTERS_KEY, field, count * amount)
+                for field, count in increments.items()
+            )
+
     def clear_database(self) -> None:
         """
         from the connected MongoDB and Redis databases.
@@ -865,28 +2221,31 @@ class RedisMongoDB(AtomDB):
         This method drops all collections in the MongoDB database and flushes
         all data from the Redis cache, effectively wiping the databases clean.
         """
+        if self._flusher is not None:
+            self._flusher.wait()
         mongo_collections = self.mongo_db.list_collection_names()
 
         for collection in mongo_collections:
             self.mongo_db[collection].drop()
 
+        if self.redis_integer_ids:
+            self.mongo_atom_ids_collection.create_index("id", unique=True)
+
         self.redis.flushall()
+        self._load_index_namespace()
+        self._atoms_changed("clear", [])
 
     def commit(self, **kwargs) -> None:
-        id_tag = FieldNames.ID_HASH
-
         if kwargs.get("buffer"):
             try:
-                for document in kwargs["buffer"]:
-                    self.mongo_atoms_collection.replace_one(
-                        {id_tag: document[id_tag]}, document, upsert=True
-                    )
-                    self._update_atom_indexes([document])
-
+                self._upsert_documents(self.mongo_atoms_collection, list(kwargs["buffer"]))
             except Exception as e:
                 logger().error(f"Failed to commit buffer - Details: {str(e)}")
                 raise e
         else:
+            if self._flusher is not None:
+                self._flusher.wait()
+                self._flusher.raise_error()
             for key, (collection, buffer) in self.mongo_bulk_insertion_buffer.items():
                 if buffer:
                     if key == MongoCollectionNames.ATOM_TYPES:
@@ -894,20 +2253,75 @@ class RedisMongoDB(AtomDB):
                         logger().error(msg)
                         raise InvalidOperationException(msg)
 
-                    for hashtable in buffer:
-                        document = hashtable.base
-                        collection.replace_one({id_tag: document[id_tag]}, document, upsert=True)
-                        self._update_atom_indexes([document])
+                    try:
+                        self._upsert_documents(collection, buffer.documents())
+                    except BulkWriteMongoDBException:
+                        # the written documents are indexed, the failed ones are reported
+                        buffer.clear()
+                        raise
+                    buffer.clear()
 
-                buffer.clear()
+    def _upsert_documents(self, collection: Collection, documents: list[DocumentT]) -> None:
+        """
+        Upsert the given documents in MongoDB and update the indexes of the ones written.
+
+        The documents are sent as unordered batches of `ReplaceOne` operations through
+        `bulk_write`, each batch holding at most `mongo_bulk_write_batch_size` documents.
+        A failing document does not prevent the others from being written. The handles of
+        every failed document are collected and reported once all batches have been sent.
+
+        Args:
+            collection (Collection): The MongoDB collection where the documents are written.
+            documents (list[DocumentT]): The documents to be upserted.
+
+        Raises:
+            BulkWriteMongoDBException: If one or more documents could not be written.
+        """
+        id_tag = FieldNames.ID_HASH
+        batch_size = max(1, self.mongo_bulk_write_batch_size)
+        failed: dict[str, str] = {}
+        inserted: list[DocumentT] = []
+        try:
+            for start in range(0, len(documents), batch_size):
+                batch = documents[start : start + batch_size]  # noqa: E203
+                operations = [
+                    ReplaceOne({id_tag: document[id_tag]}, document, upsert=True)
+                    for document in batch
+                ]
+                try:
+                    result = collection.bulk_write(operations, ordered=False)
+                    upserted_ids = list((result.upserted_ids or {}).values())
+                except pymongo_errors.BulkWriteError as e:
+                    for error in e.details.get("writeErrors", []):
+                        failed[batch[error["index"]][id_tag]] = error.get("errmsg", "")
+                    upserted_ids = [upsert["_id"] for upsert in e.details.get("upserted", [])]
+                # the documents are filtered by their handle, which is also the upserted `_id`
+                by_handle = {document[id_tag]: document for document in batch}
+                inserted.extend(by_handle[upserted_id] for upserted_id in upserted_ids)
+        finally:
+            # only new atoms are counted, replaced ones were counted when first written; the
+            # batches written before an unexpected error are counted too, as a retry would
+            # only replace them
+            self._update_atom_counters(inserted, 1)
+        self._atoms_changed("commit", [document[id_tag] for document in documents])
+        if failed:
+            self._update_atom_indexes(
+                [document for document in documents if document[id_tag] not in failed]
+            )
+            logger().error(
+                f"Failed to write {len(failed)} of {len(documents)} documents - Details: {failed}"
+            )
+            raise BulkWriteMongoDBException(
+                "Failed to write documents",
+                f"handles: {list(failed)}",
+                failed_handles=list(failed),
+            )
+        self._update_atom_indexes(documents)
 
     def add_node(self, node_params: NodeT) -> NodeT | None:
         node: NodeT = self._build_node(node_params)
         if sys.getsizeof(node_params.name) < self.max_mongo_db_document_size:
-            _, buffer = self.mongo_bulk_insertion_buffer[MongoCollectionNames.ATOMS]
-            buffer.add(_HashableDocument(node.to_dict()))
-            if len(buffer) >= self.mongo_bulk_insertion_limit:
-                self.commit()
+            self._buffer_atom_document(node.to_dict())
             return node
         else:
             logger().warning(f"Discarding atom whose name is too large: {node.name}")
@@ -924,20 +2338,185 @@ class RedisMongoDB(AtomDB):
         link: LinkT | None = self._build_link(link_params, toplevel)
         if link is None:
             return None
+        self._buffer_atom_document(link.to_dict())
+        return link
+
+    def _buffer_atom_document(self, document: DocumentT) -> None:
+        """
+        Add an atom document to the insertion buffer, committing it when the buffer is full.
+
+        The buffer is committed once it holds `mongo_bulk_insertion_limit` documents or its
+        approximate size reaches `mongo_bulk_insertion_max_bytes`, whichever comes first.
+
+        Args:
+            document (DocumentT): The atom document to be buffered.
+        """
+        if self._flusher is not None:
+            self._flusher.raise_error()
         _, buffer = self.mongo_bulk_insertion_buffer[MongoCollectionNames.ATOMS]
-        buffer.add(_HashableDocument(link.to_dict()))
-        if len(buffer) >= self.mongo_bulk_insertion_limit:
+        buffer.add(document)
+        if (
+            len(buffer) >= self.mongo_bulk_insertion_limit
+            or buffer.byte_size >= self.mongo_bulk_insertion_max_bytes
+        ):
+            if self._flusher is not None:
+                self.flush(wait=False)
+            else:
+                self.commit()
+
+    def flush(self, wait: bool = True) -> None:
+        """
+        Write the buffered atoms to the databases.
+
+        With a background flusher, the buffered atoms are handed to the flusher thread, and
+        `wait` makes this call a barrier that returns only once everything added so far has
+        been written. Without one, this is the same as `commit()`.
+
+        Args:
+            wait (bool): Whether to wait for the background write to finish. Defaults to True.
+
+        Raises:
+            Exception: The error raised by a previous or the current background write.
+        """
+        if self._flusher is None:
             self.commit()
-        return link
+            return
+        self._flusher.raise_error()
+        _, buffer = self.mongo_bulk_insertion_buffer[MongoCollectionNames.ATOMS]
+        if buffer:
+            self._flusher.submit(buffer.documents())
+            buffer.clear()
+        if wait:
+            self._flusher.wait()
+            self._flusher.raise_error()
+
+    def close(self) -> None:
+        """
+        Stop the background threads of this instance.
 
-    def _get_and_delete_links_by_handles(self, handles: HandleListT) -> list[DocumentT]:
-        documents = []
-        for handle in handles:
-            if document := self.mongo_atoms_collection.find_one_and_delete(
-                {FieldNames.ID_HASH: handle}
-            ):
-                documents.append(document)
-        return documents
+        The documents already handed to the background flusher are written before it stops,
+        and the change feed listener is stopped. Documents still in the insertion buffer are
+        not written, `flush()` must be called first. Every open instance is closed when the
+        interpreter exits.
+
+        Raises:
+            Exception: The error raised by a pending background write.
+        """
+        _OPEN_DATABASES.discard(self)
+        self.stop_change_feed_listener()
+        if self._flusher is not None:
+            flusher, self._flusher = self._flusher, None
+            flusher.close()
+            flusher.raise_error()
+
+    def __enter__(self) -> "RedisMongoDB":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def get_insertion_buffer_fill(self) -> dict[str, float]:
+        """
+        Retrieve the current fill level of the atoms insertion buffer.
+
+        Returns:
+            dict[str, float]: A dictionary with the number of buffered documents
+                (`document_count`), their approximate size in bytes (`byte_size`) and the
+                fraction of the document limit and byte budget they take (`document_ratio`
+                and `byte_ratio`).
+        """
+        _, buffer = self.mongo_bulk_insertion_buffer[MongoCollectionNames.ATOMS]
+        return {
+            "document_count": len(buffer),
+            "byte_size": buffer.byte_size,
+            "document_ratio": len(buffer) / max(1, self.mongo_bulk_insertion_limit),
+            "byte_ratio": buffer.byte_size / max(1, self.mongo_bulk_insertion_max_bytes),
+        }
+
+    def _atoms_changed(self, operation: str, handles: list[str]) -> None:
+        """
+        Invalidate the local caches for the given atoms and publish the change, if enabled.
+
+        Args:
+            operation (str): The operation that changed the atoms: 'commit', 'delete' or
+                'clear' (every atom).
+            handles (list[str]): The handles of the changed atoms.
+        """
+        self._apply_change(operation, handles)
+        if self.change_feed_stream is None:
+            return
+        commands = [
+            (
+                "xadd",
+                self.change_feed_stream,
+                {
+                    "operation": operation,
+                    "origin": self._client_id,
+                    "handles": ",".join(handles[start : start + 1000]),  # noqa: E203
+                },
+                "*",
+                self.change_feed_maxlen,
+                True,
+            )
+            for start in range(0, max(1, len(handles)), 1000)
+        ]
+        try:
+            self._execute_redis_commands(commands)
+        except RedisError as e:
+            # the atoms are already written, other clients rely on their cache TTL
+            logger().error(f"Failed to publish {operation} change event - Details: {str(e)}")
+
+    def _apply_change(self, operation: str, handles: list[str]) -> None:
+        if operation == "clear":
+            self._reset_atom_ids()
+        if self.atom_cache is not None:
+            if operation == "clear":
+                self.atom_cache.clear()
+            else:
+                self.atom_cache.invalidate(handles)
+        for callback in self._change_callbacks:
+            callback(operation, handles)
+
+    def add_change_callback(self, callback: Callable[[str, list[str]], None]) -> None:
+        """
+        Register a function called with `(operation, handles)` whenever atoms change.
+
+        The callback is called for changes made by this client and, while the change feed
+        listener runs, for changes made by other clients. It can be used to invalidate query
+        results cached by the application.
+
+        Args:
+            callback (Callable[[str, list[str]], None]): The function to be called.
+        """
+        self._change_callbacks.append(callback)
+
+    def start_change_feed_listener(self, block_ms: int = 1000) -> None:
+        """
+        Start consuming the change events published by other clients to the change feed.
+
+        The atom cache and the registered callbacks are updated at most `block_ms`
+        milliseconds after another client publishes a change.
+
+        Args:
+            block_ms (int): Maximum time, in milliseconds, a read of the stream blocks.
+                Defaults to 1000.
+
+        Raises:
+            InvalidOperationException: If no change feed stream is configured.
+        """
+        if self.change_feed_stream is None:
+            raise InvalidOperationException("No 'change_feed_stream' configured")
+        if self._change_listener is None:
+            self._change_listener = _ChangeFeedListener(
+                self.redis, self.change_feed_stream, self._client_id, self._apply_change, block_ms
+            )
+            _OPEN_DATABASES.add(self)
+
+    def stop_change_feed_listener(self) -> None:
+        """Stop consuming the change feed."""
+        if self._change_listener is not None:
+            self._change_listener.stop()
+            self._change_listener = None
 
     @staticmethod
     def _apply_index_template(
@@ -996,75 +2575,82 @@ class RedisMongoDB(AtomDB):
         Returns:
             HandleSetT: Set of members for the given key
         """
-        key = _build_redis_key(KeyPrefix.INCOMING_SET, handle)
+        key = self._build_atom_key(KeyPrefix.INCOMING_SET, handle)
         return self._get_redis_members(key)
 
-    def _delete_smember_incoming_set(self, handle: str, smember: str) -> None:
+    def _retrieve_outgoing_set(self, handle: str) -> HandleListT:
         """
-        Remove a specific member from the incoming set of the given handle in Redis.
+        Retrieve the outgoing set for the given handle from Redis.
 
-        This method constructs a Redis key using the provided handle and removes the specified
-        member from the incoming set associated with that key.
+        This method constructs a Redis key using the provided handle and retrieves the members
+        of the outgoing set associated with that key.
 
         Args:
-            handle (str): The unique identifier for the atom whose incoming set member is to be
-                removed.
-            smember (str): The member to be removed from the incoming set.
+            handle (str): The unique identifier for the atom whose outgoing set is to be retrieved.
 
         Returns:
-            None
+            HandleListT: A list of members in the outgoing set.
         """
-        key = _build_redis_key(KeyPrefix.INCOMING_SET, handle)
-        self.redis.srem(key, smember)
+        key = self._build_atom_key(KeyPrefix.OUTGOING_SET, handle)
+        value: str = self.redis.get(key)  # type: ignore
+        if value is None:
+            return []
+        return self._split_outgoing_set(value)
 
-    def _retrieve_and_delete_incoming_set(self, handle: str) -> HandleListT:
+    def _split_outgoing_set(self, value: str) -> HandleListT:
         """
-        Retrieve and delete the incoming set for the given handle from Redis.
-
-        This method constructs a Redis key using the provided handle, retrieves all members
-        of the incoming set associated with that key, and then deletes the key from Redis.
+        Split the value of an outgoing set key into the target handles it concatenates.
 
         Args:
-            handle (str): The unique identifier for the atom whose incoming set is to be
-                retrieved and deleted.
+            value (str): The value stored in the outgoing set key.
 
         Returns:
-            HandleListT: A list of members in the incoming set before deletion.
+            HandleListT: The target handles.
         """
-        key = _build_redis_key(KeyPrefix.INCOMING_SET, handle)
-        data: HandleListT = list(self.redis.smembers(key))  # type: ignore
-        self.redis.delete(key)
-        return data
+        if self.redis_binary_handles:
+            packed = value.encode("utf-8", "surrogateescape")
+            size = self.hash_length // 2
+            return [
+                packed[offset : offset + size].hex()  # noqa: E203
+                for offset in range(0, len(packed), size)
+            ]
+        arity = len(value) // self.hash_length
+        return [
+            value[(offset * self.hash_length) : ((offset + 1) * self.hash_length)]  # noqa: E203
+            for offset in range(arity)
+        ]
 
-    def _retrieve_outgoing_set(self, handle: str, delete: bool = False) -> HandleListT:
+    def _mget(self, keys: list[str]) -> list[Any]:
         """
-        Retrieve the outgoing set for the given handle from Redis.
+        Read the values of the given keys from Redis using chunked `MGET` commands.
 
-        This method constructs a Redis key using the provided handle and retrieves the members
-        of the outgoing set associated with that key. If the delete flag is set to True, the
-        key is deleted from Redis after retrieving the members.
+        Each `MGET` reads at most `redis_mget_batch_size` keys. Under cluster mode the keys are
+        grouped by slot first, as a single `MGET` can only read keys of the same slot, and the
+        commands are sent to their nodes through `_execute_redis_commands`.
 
         Args:
-            handle (str): The unique identifier for the atom whose outgoing set is to be retrieved.
-            delete (bool): Whether to delete the key from Redis after retrieving the members.
-                Defaults to False.
+            keys (list[str]): The keys to be read.
 
         Returns:
-            HandleListT: A list of members in the outgoing set.
+            list[Any]: The values of the keys (None for missing keys), in the order of `keys`.
         """
-        key = _build_redis_key(KeyPrefix.OUTGOING_SET, handle)
-        value: str
-        if delete:
-            value = self.redis.getdel(key)  # type: ignore
+        if isinstance(self.redis, RedisCluster):
+            keys_by_slot: dict[int, list[str]] = collections.defaultdict(list)
+            for key in dict.fromkeys(keys):
+                keys_by_slot[self.redis.keyslot(key)].append(key)
+            groups = list(keys_by_slot.values())
         else:
-            value = self.redis.get(key)  # type: ignore
-        if value is None:
-            return []
-        arity = len(value) // self.hash_length
-        return [
-            value[(offset * self.hash_length) : ((offset + 1) * self.hash_length)]  # noqa: E203
-            for offset in range(arity)
+            groups = [list(dict.fromkeys(keys))]
+        chunk_size = max(1, self.redis_mget_batch_size)
+        commands = [
+            ("mget", *group[start : start + chunk_size])  # noqa: E203
+            for group in groups
+            for start in range(0, len(group), chunk_size)
         ]
+        values: dict[str, Any] = {}
+        for command, result in zip(commands, self._execute_redis_commands(commands)):
+            values.update(zip(command[1:], result))
+        return [values[key] for key in keys]
 
     def _retrieve_name(self, handle: str) -> str | None:
         """
@@ -1079,7 +2665,7 @@ class RedisMongoDB(AtomDB):
         Returns:
             str | None: The name associated with the given handle if found, otherwise None.
         """
-        key = _build_redis_key(KeyPrefix.NAMED_ENTITIES, handle)
+        key = self._build_atom_key(KeyPrefix.NAMED_ENTITIES, handle)
         name: str = self.redis.get(key)  # type: ignore
         if name:
             return name
@@ -1088,94 +2674,646 @@ class RedisMongoDB(AtomDB):
 
     def _retrieve_hash_targets_value(self, key_prefix: str, handle: str | list[Any]) -> HandleSetT:
         """
-        Retrieve the hash targets value for the given handle from Redis.
+        Retrieve the hash targets value for the given handle from Redis.
+
+        This method constructs a Redis key using the provided key prefix and handle, and retrieves
+        the members associated with that key.
+        If the members are not found, it returns an empty list.
+
+        Args:
+            key_prefix (str): The prefix to be used in the Redis key.
+            handle (str): The unique identifier for the atom whose hash targets value is to be
+                retrieved.
+
+        Returns:
+            HandleSetT: Set of members in the hash targets value.
+        """
+        key = self._build_index_key(key_prefix, handle)
+        return self._get_redis_members(key)
+
+    def _retrieve_custom_index(self, index_id: str) -> dict[str, Any] | None:
+        """
+        Retrieve a custom index from Redis using the given index ID.
+
+        This method constructs a Redis key using the provided index ID and attempts to retrieve
+        the custom index associated with that key. The custom index is expected to be stored as
+        an extended JSON dictionary, or as a base64-encoded, pickled dictionary by older
+        versions. If the custom index is not found, appropriate logging is performed and the
+        method returns None.
+
+        Args:
+            index_id (str): The unique identifier for the custom index to be retrieved.
+
+        Returns:
+            dict[str, Any] | None: The retrieved custom index as a dictionary if found, otherwise
+                None.
+
+        Raises:
+            ConnectionError: If there is an error connecting to Redis.
+            Exception: If there is an unexpected error during retrieval.
+        """
+        try:
+            key = _build_redis_key(KeyPrefix.CUSTOM_INDEXES, index_id)
+            custom_index_str: str | None = self.redis.get(key)  # type: ignore
+
+            if custom_index_str is None:
+                logger().info(f"Custom index with ID {index_id} not found in Redis")
+                return None
+
+            return _decode_index_props(custom_index_str)
+        except ConnectionError as e:
+            logger().error(f"Error connecting to Redis: {e}")
+            raise e
+        except Exception as e:
+            logger().error(f"Unexpected error retrieving custom index with ID {index_id}: {e}")
+            raise e
+
+    def _load_index_catalog(self) -> None:
+        """
+        Load the in-process catalog of the indexes of the atoms collection.
+
+        The catalog maps each index name to its MongoDB keys and, for custom indexes, to the
+        properties stored in Redis, so index lookups don't need any round trip.
+        """
+        version = self.redis.get(INDEX_CATALOG_VERSION_KEY)
+        index_keys = {
+            index["name"]: list(index.get("key", {}).items())
+            for index in self.mongo_atoms_collection.list_indexes()
+        }
+        values = self._mget(
+            [_build_redis_key(KeyPrefix.CUSTOM_INDEXES, name) for name in index_keys]
+        )
+        catalog: dict[str, dict[str, Any]] = {}
+        for (name, keys), value in zip(index_keys.items(), values):
+            try:
+                props = _decode_index_props(value) if value else None
+            except Exception as e:  # pylint: disable=broad-except
+                logger().error(f"Failed to decode custom index {name} - Details: {str(e)}")
+                props = None
+            catalog[name] = {"keys": keys, "props": props}
+        self._index_catalog = catalog
+        self._index_catalog_version = str(version or 0)
+        self._index_catalog_checked_at = time.monotonic()
+
+    def _lookup_index(self, index_id: str) -> dict[str, Any] | None:
+        """
+        Look up an index of the atoms collection in the in-process catalog.
+
+        The version stamp in Redis is checked at most once every
+        `index_catalog_refresh_interval` seconds and the catalog is reloaded when it changed or
+        when the index is unknown.
+
+        Args:
+            index_id (str): The name of the index.
+
+        Returns:
+            dict[str, Any] | None: The `keys` and `props` of the index, or None if it does not
+                exist.
+        """
+        reloaded = False
+        now = time.monotonic()
+        if self._index_catalog_version is None:
+            self._load_index_catalog()
+            reloaded = True
+        elif now - self._index_catalog_checked_at >= self.index_catalog_refresh_interval:
+            if str(self.redis.get(INDEX_CATALOG_VERSION_KEY) or 0) != self._index_catalog_version:
+                self._load_index_catalog()
+                reloaded = True
+            else:
+                self._index_catalog_checked_at = now
+        if (entry := self._index_catalog.get(index_id)) is None and not reloaded:
+            self._load_index_catalog()
+            entry = self._index_catalog.get(index_id)
+        return entry
+
+    def _get_redis_members(self, key: str) -> HandleSetT:
+        """
+        Retrieve members from a Redis set.
+
+        Args:
+            key (str): The key of the set in Redis.
+
+        Returns:
+            HandleSetT: Set of members retrieved from Redis.
+        """
+        return self._decode_handles(self.redis.smembers(key))  # type: ignore
+
+    def _encode_handle(self, handle: str) -> str:
+        """
+        Encode a handle as stored in Redis keys and set members.
+
+        Args:
+            handle (str): The handle.
+
+        Returns:
+            str: The packed handle if `redis_binary_handles` is enabled, otherwise the handle.
+        """
+        return _pack_handle(handle) if self.redis_binary_handles else handle
+
+    def _encode_outgoing_set(self, targets: HandleListT) -> str:
+        """
+        Encode the targets of a link as stored in its outgoing set key.
+
+        Args:
+            targets (HandleListT): The handles of the targets.
+
+        Returns:
+            str: The concatenated, encoded handles.
+        """
+        return "".join(self._encode_handle(target) for target in targets)
+
+    def _decode_handles(self, members: Iterable[str]) -> HandleSetT:
+        """
+        Decode the members of a Redis set into handles.
+
+        Args:
+            members (Iterable[str]): The members read from Redis.
+
+        Returns:
+            HandleSetT: The handles.
+
+        Raises:
+            InvalidOperationException: If `redis_integer_ids` is enabled but the sets hold
+                handles, because the indexes were not rebuilt after the option was changed.
+        """
+        if self.redis_integer_ids:
+            try:
+                atom_ids = [int(member) for member in members]
+            except ValueError as e:
+                raise InvalidOperationException(
+                    "The index sets don't hold integer IDs, redis_integer_ids requires a "
+                    "reindex() after it is enabled",
+                    str(e),
+                ) from e
+            handles = self._get_handles_by_atom_id(atom_ids)
+            return {handles[atom_id] for atom_id in atom_ids if atom_id in handles}
+        if self.redis_binary_handles:
+            return {_unpack_handle(member) for member in members}
+        return set(members)
+
+    def _encode_member(self, handle: str) -> str:
+        """
+        Encode a link handle as stored in pattern, template and incoming sets.
+
+        Args:
+            handle (str): The handle of the link.
+
+        Returns:
+            str: The integer ID of the link if `redis_integer_ids` is enabled, otherwise the
+                handle encoded by `_encode_handle`.
+        """
+        if self.redis_integer_ids:
+            return str(self._get_atom_ids([handle])[handle])
+        return self._encode_handle(handle)
+
+    def _lookup_member(self, handle: str) -> str | None:
+        """
+        Encode a link handle as `_encode_member` does, without assigning an integer ID to it.
+
+        Used when members are removed from sets: a link without an integer ID can't be in
+        any set, so no ID is assigned and persisted for it.
+
+        Args:
+            handle (str): The handle of the link.
+
+        Returns:
+            str | None: The encoded member, or None if `redis_integer_ids` is enabled and the
+                link has no integer ID.
+        """
+        if self.redis_integer_ids:
+            atom_id = self._get_atom_ids([handle], assign=False).get(handle)
+            return None if atom_id is None else str(atom_id)
+        return self._encode_handle(handle)
+
+    def _prepare_members(self, documents: Iterable[DocumentT], assign: bool = True) -> None:
+        """
+        Fetch or assign at once the integer IDs of the given links, if `redis_integer_ids` is
+        enabled, so encoding them one by one doesn't cost a round trip each.
+
+        Args:
+            documents (Iterable[DocumentT]): The documents whose links are encoded next.
+            assign (bool): Whether IDs are assigned to unknown links, which are encoded by
+                `_encode_member`, or only fetched, for `_lookup_member`. Defaults to True.
+        """
+        if self.redis_integer_ids:
+            self._get_atom_ids(
+                (
+                    document[FieldNames.ID_HASH]
+                    for document in documents
+                    if self._is_document_link(document)
+                ),
+                assign=assign,
+            )
+
+    def _get_atom_ids(self, handles: Iterable[str], assign: bool = True) -> dict[str, int]:
+        """
+        Get the integer IDs of the given handles, assigning new IDs to unknown handles.
+
+        IDs are read from the in-process cache, then from the dictionary collection. Handles
+        still unknown get IDs from the block reserved by this client and are inserted in the
+        dictionary; when another client assigned an ID to the same handle first, its ID wins.
+
+        Args:
+            handles (Iterable[str]): The handles.
+            assign (bool): Whether new IDs are assigned to unknown handles. Otherwise, unknown
+                handles are left out of the result. Defaults to True.
+
+        Returns:
+            dict[str, int]: The integer IDs, keyed by handle.
+        """
+        unique_handles = list(dict.fromkeys(handles))
+        with self._atom_ids_lock:
+            # the cache may be emptied while entries are added, so the IDs are collected here
+            atom_ids = {
+                handle: self._atom_id_by_handle[handle]
+                for handle in unique_handles
+                if handle in self._atom_id_by_handle
+            }
+            missing = [handle for handle in unique_handles if handle not in atom_ids]
+            if missing:
+                for entry in self._load_atom_ids(FieldNames.ID_HASH, missing):
+                    atom_ids[entry[FieldNames.ID_HASH]] = entry["id"]
+                missing = [handle for handle in missing if handle not in atom_ids]
+            if missing and not assign:
+                return {handle: atom_ids[handle] for handle in unique_handles if handle in atom_ids}
+            if missing:
+                documents: list[DocumentT] = [
+                    {FieldNames.ID_HASH: handle, "id": self._reserve_atom_id()}
+                    for handle in missing
+                ]
+                try:
+                    self.mongo_atom_ids_collection.insert_many(documents, ordered=False)
+                    self._cache_atom_ids(documents)
+                except pymongo_errors.BulkWriteError:
+                    documents = self._load_atom_ids(FieldNames.ID_HASH, missing)
+                for entry in documents:
+                    atom_ids[entry[FieldNames.ID_HASH]] = entry["id"]
+            return {handle: atom_ids[handle] for handle in unique_handles}
+
+    def _get_handles_by_atom_id(self, atom_ids: Iterable[int]) -> dict[int, str]:
+        """
+        Translate integer IDs back to the handles they were assigned to.
+
+        Args:
+            atom_ids (Iterable[int]): The integer IDs.
+
+        Returns:
+            dict[int, str]: The handles, keyed by ID. Unknown IDs are not in the dictionary.
+        """
+        unique_ids = list(dict.fromkeys(atom_ids))
+        with self._atom_ids_lock:
+            handles = {
+                atom_id: self._handle_by_atom_id[atom_id]
+                for atom_id in unique_ids
+                if atom_id in self._handle_by_atom_id
+            }
+            missing = [atom_id for atom_id in unique_ids if atom_id not in handles]
+            if missing:
+                for entry in self._load_atom_ids("id", missing):
+                    handles[entry["id"]] = entry[FieldNames.ID_HASH]
+            return {atom_id: handles[atom_id] for atom_id in unique_ids if atom_id in handles}
+
+    def _load_atom_ids(self, field: str, values: list[Any]) -> list[DocumentT]:
+        """
+        Read the dictionary entries whose `field` is one of `values` into the cache.
+
+        Args:
+            field (str): The field queried, the handle (`_id`) or the integer ID (`id`).
+            values (list[Any]): The handles or IDs, queried in chunks of
+                `mongo_multi_get_batch_size`.
+
+        Returns:
+            list[DocumentT]: The entries read, which may already have been evicted from the
+                cache when many are read at once.
+        """
+        chunk_size = max(1, self.mongo_multi_get_batch_size)
+        entries: list[DocumentT] = []
+        for start in range(0, len(values), chunk_size):
+            chunk = values[start : start + chunk_size]  # noqa: E203
+            entries.extend(self.mongo_atom_ids_collection.find({field: {"$in": chunk}}))
+        self._cache_atom_ids(entries)
+        return entries
+
+    def _cache_atom_ids(self, documents: Iterable[DocumentT]) -> None:
+        """
+        Add dictionary entries to the cache, emptying it first when it is full.
+
+        Args:
+            documents (Iterable[DocumentT]): The dictionary entries.
+        """
+        for document in documents:
+            if len(self._atom_id_by_handle) >= self.atom_id_cache_size:
+                self._atom_id_by_handle.clear()
+                self._handle_by_atom_id.clear()
+            self._atom_id_by_handle[document[FieldNames.ID_HASH]] = document["id"]
+            self._handle_by_atom_id[document["id"]] = document[FieldNames.ID_HASH]
+
+    def _reserve_atom_id(self) -> int:
+        """
+        Take the next integer ID of the block reserved by this client, reserving a new block
+        of `atom_id_block_size` IDs with an atomic increment when it is exhausted.
+
+        Returns:
+            int: The integer ID.
+        """
+        if self._next_atom_id >= self._atom_id_block_end:
+            block_size = max(1, self.atom_id_block_size)
+            counter = self.mongo_das_config_collection.find_one_and_update(  # type: ignore
+                {"_id": ATOM_ID_COUNTER},
+                {"$inc": {"value": block_size}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            self._atom_id_block_end = counter["value"] + 1
+            self._next_atom_id = self._atom_id_block_end - block_size
+        atom_id = self._next_atom_id
+        self._next_atom_id += 1
+        return atom_id
+
+    def _reset_atom_ids(self) -> None:
+        """Forget the cached integer IDs and the reserved block, after the database is cleared."""
+        with self._atom_ids_lock:
+            self._atom_id_by_handle.clear()
+            self._handle_by_atom_id.clear()
+            self._next_atom_id = 0
+            self._atom_id_block_end = 0
+
+    def _scan_redis_members(
+        self, key: str, count: int | None = None, limit: int | None = None
+    ) -> Iterator[str]:
+        """
+        Iterate over the members of a Redis set with `SSCAN`, one batch at a time.
+
+        Args:
+            key (str): The key of the set in Redis.
+            count (int | None): Number of members `SSCAN` is hinted to return per call.
+                Defaults to `redis_scan_count`.
+            limit (int | None): Maximum number of members yielded. Defaults to no limit.
+
+        Returns:
+            Iterator[str]: The members of the set. A member may be yielded more than once if
+                the set is modified during the iteration.
+        """
+        count = max(1, count or self.redis_scan_count)
+        remaining = limit if limit is not None and limit > 0 else None
+        cursor = 0
+        while True:
+            cursor, members = self.redis.sscan(key, cursor=cursor, count=count)  # type: ignore
+            for member in self._decode_handles(members):
+                if remaining is not None:
+                    if remaining == 0:
+                        return
+                    remaining -= 1
+                yield member
+            if int(cursor) == 0 or remaining == 0:
+                return
+
+    def _build_atom_key(self, prefix: str, handle: str) -> str:
+        """
+        Build the Redis key of a per-atom index entry (name, outgoing set or incoming set).
+
+        When `redis_hash_tags` is enabled the handle is wrapped in a hash tag, so that all the
+        keys of one atom are mapped to the same Redis Cluster slot and can be read or written
+        in a single round trip. The key lives in the current index namespace and holds the
+        handle encoded by `_encode_handle`.
+
+        Args:
+            prefix (str): The prefix of the index entry.
+            handle (str): The handle of the atom.
+
+        Returns:
+            str: The Redis key.
+        """
+        return self._current_namespace() + _build_redis_key(
+            prefix, self._encode_handle(handle), hash_tag=self.redis_hash_tags
+        )
 
-        This method constructs a Redis key using the provided key prefix and handle, and retrieves
-        the members associated with that key.
-        If the members are not found, it returns an empty list.
+    def _build_index_key(self, prefix: str, key: str | list[Any]) -> str:
+        """
+        Build the Redis key of a pattern or template set in the current index namespace.
 
         Args:
-            key_prefix (str): The prefix to be used in the Redis key.
-            handle (str): The unique identifier for the atom whose hash targets value is to be
-                retrieved.
+            prefix (str): The prefix of the set.
+            key (str | list[Any]): The hash identifying the set.
 
         Returns:
-            HandleSetT: Set of members in the hash targets value.
+            str: The Redis key.
         """
-        key = _build_redis_key(key_prefix, handle)
-        return self._get_redis_members(key)
+        return self._current_namespace() + _build_redis_key(prefix, key)
 
-    def _delete_smember_template(self, handle: str, smember: str) -> None:
+    def _load_index_namespace(self) -> None:
+        """
+        Read the namespace of the index keys and the namespace being built by an online
+        reindex, if any, from Redis.
         """
-        Remove a specific member from the template set of the given handle in Redis.
+        namespace, building = self._mget([INDEX_NAMESPACE_KEY, INDEX_BUILDING_NAMESPACE_KEY])
+        self._index_namespace = namespace or ""
+        self._building_namespace = building if building and building != namespace else None
+        self._index_namespace_checked_at = time.monotonic()
 
-        This method constructs a Redis key using the provided handle and removes the specified
-        member from the template set associated with that key.
+    def _refresh_index_namespace(self) -> None:
+        """
+        Reload the index namespaces if they were not checked recently.
 
-        Args:
-            handle (str): The unique identifier for the atom whose template member is to be
-                removed.
-            smember (str): The member to be removed from the template set.
+        Without `online_reindex` the namespaces read when the client was created are kept, so
+        the index read and write paths make no extra round trip.
         """
-        key = _build_redis_key(KeyPrefix.TEMPLATES, handle)
-        self.redis.srem(key, smember)
+        if not self.online_reindex:
+            return
+        elapsed = time.monotonic() - self._index_namespace_checked_at
+        if elapsed >= self.index_namespace_refresh_interval:
+            self._load_index_namespace()
 
-    def _retrieve_custom_index(self, index_id: str) -> dict[str, Any] | None:
+    def _current_namespace(self) -> str:
         """
-        Retrieve a custom index from Redis using the given index ID.
+        Get the namespace index keys are read from and written to by the current thread.
 
-        This method constructs a Redis key using the provided index ID and attempts to retrieve
-        the custom index associated with that key. The custom index is expected to be stored as
-        a base64-encoded, pickled dictionary. If the custom index is not found or if there is an
-        error during retrieval, appropriate logging is performed and the method returns None.
+        Returns:
+            str: The namespace set by `_in_namespace` in this thread or, otherwise, the
+                namespace readers are switched to ('' for the keys written before namespaces).
+        """
+        override: str | None = getattr(self._namespace_override, "namespace", None)
+        if override is not None:
+            return override
+        self._refresh_index_namespace()
+        return self._index_namespace
+
+    @contextlib.contextmanager
+    def _in_namespace(self, namespace: str) -> Iterator[None]:
+        """
+        Build the index keys of the current thread in the given namespace within the context.
 
         Args:
-            index_id (str): The unique identifier for the custom index to be retrieved.
+            namespace (str): The namespace of the index keys.
+        """
+        previous = getattr(self._namespace_override, "namespace", None)
+        self._namespace_override.namespace = namespace
+        try:
+            yield
+        finally:
+            self._namespace_override.namespace = previous
+
+    def _write_namespaces(self) -> list[str]:
+        """
+        Get the namespaces index writes are sent to.
+
+        While an online reindex builds a new namespace, writes are sent to both namespaces, so
+        atoms changed after the reindex walked past them are not missing once readers switch.
 
         Returns:
-            dict[str, Any] | None: The retrieved custom index as a dictionary if found, otherwise
-                None.
+            list[str]: The namespaces index writes are sent to.
+        """
+        override: str | None = getattr(self._namespace_override, "namespace", None)
+        if override is not None:
+            return [override]
+        self._refresh_index_namespace()
+        if self._building_namespace is None:
+            return [self._index_namespace]
+        return [self._index_namespace, self._building_namespace]
+
+    def _execute_index_writes(self, add_commands: Callable[[_RedisCommandBatch], None]) -> None:
+        """
+        Send index writes to every namespace they must reach.
 
-        Raises:
-            ConnectionError: If there is an error connecting to Redis.
-            Exception: If there is an unexpected error during retrieval.
+        `add_commands` collects the writes in a command batch and is called once per write
+        namespace, the keys being built in that namespace. With `online_reindex`, the writes
+        are fenced: the namespaces are read again once the writes are sent, and the writes
+        are sent again to the namespaces published in the meantime. A client that missed a
+        namespace switch, however long it stalled, never leaves the new namespace without its
+        writes.
+
+        Args:
+            add_commands (Callable[[_RedisCommandBatch], None]): Collects the index writes.
         """
-        try:
-            key = _build_redis_key(KeyPrefix.CUSTOM_INDEXES, index_id)
-            custom_index_str: str | None = self.redis.get(key)  # type: ignore
+        fenced = (
+            self.online_reindex and getattr(self._namespace_override, "namespace", None) is None
+        )
+        written: set[str] = set()
+        namespaces = self._write_namespaces()
+        while namespaces:
+            batch = _RedisCommandBatch(self.redis_pipeline_batch_size)
+            for namespace in namespaces:
+                with self._in_namespace(namespace):
+                    add_commands(batch)
+            self._execute_redis_commands(batch.commands())
+            if not fenced:
+                return
+            written.update(namespaces)
+            self._load_index_namespace()
+            namespaces = [
+                namespace for namespace in self._write_namespaces() if namespace not in written
+            ]
 
-            if custom_index_str is None:
-                logger().info(f"Custom index with ID {index_id} not found in Redis")
-                return None
+    def _execute_redis_commands(self, commands: Iterable[tuple[Any, ...]]) -> list[Any]:
+        """
+        Execute the given commands through non-transactional Redis pipelines.
 
-            custom_index_bytes = base64.b64decode(custom_index_str)
-            custom_index: dict[str, Any] = pickle.loads(custom_index_bytes)
+        Commands are described as tuples whose first element is the name of the Redis method
+        and the remaining elements are its arguments, the first of them being the key, e.g.
+        `("sadd", key, member)`. They are sent in chunks of at most `redis_pipeline_batch_size`
+        commands, so each chunk costs a single round trip. When connected to a Redis Cluster,
+        commands are grouped by the node owning their key and each group is sent as a
+        pipeline to its node, with the nodes being served in parallel.
 
-            if not isinstance(custom_index, dict):
-                logger().error(f"Custom index with ID {index_id} is not a dictionary")
-                raise ValueError("Custom index is not a dictionary")
+        Args:
+            commands (Iterable[tuple[Any, ...]]): The commands to be executed.
 
-            return custom_index
-        except ConnectionError as e:
-            logger().error(f"Error connecting to Redis: {e}")
-            raise e
-        except Exception as e:
-            logger().error(f"Unexpected error retrieving custom index with ID {index_id}: {e}")
-            raise e
+        Returns:
+            list[Any]: The results of the commands, in the same order as the commands.
+        """
+        if isinstance(self.redis, RedisCluster):
+            return self._execute_redis_cluster_commands(list(commands))
+        return self._execute_pipelined(self.redis, commands)
 
-    def _get_redis_members(self, key: str) -> HandleSetT:
+    def _execute_pipelined(
+        self,
+        client: Redis | RedisCluster,
+        commands: Iterable[tuple[Any, ...]],
+        raise_on_error: bool = True,
+    ) -> list[Any]:
         """
-        Retrieve members from a Redis set.
+        Execute the given commands on the given client through chunked pipelines.
 
         Args:
-            key (str): The key of the set in Redis.
+            client (Redis | RedisCluster): The client whose pipelines are used.
+            commands (Iterable[tuple[Any, ...]]): The commands to be executed.
+            raise_on_error (bool): Whether a command error is raised. Otherwise, the error is
+                returned as the result of the command. Defaults to True.
 
         Returns:
-            HandleSetT: Set of members retrieved from Redis.
+            list[Any]: The results of the commands, in the same order as the commands.
         """
-        return set(self.redis.smembers(key))  # type: ignore
+        results: list[Any] = []
+        pipeline = client.pipeline(transaction=False)
+        pending = 0
+        for name, *args in commands:
+            getattr(pipeline, name)(*args)
+            pending += 1
+            if pending >= self.redis_pipeline_batch_size:
+                results.extend(pipeline.execute(raise_on_error=raise_on_error))
+                pending = 0
+        if pending:
+            results.extend(pipeline.execute(raise_on_error=raise_on_error))
+        return results
+
+    def _execute_redis_cluster_commands(self, commands: list[tuple[Any, ...]]) -> list[Any]:
+        """
+        Execute the given commands on a Redis Cluster through per-node pipelines.
+
+        Commands are grouped by the node serving the slot of their key, and each group is sent
+        directly to its node in parallel. Only the commands a node redirected (`MOVED` or
+        `ASK`, e.g. because a slot has been migrated) are resent, through the cluster pipeline
+        that follows the redirections: the other commands of the group may have been applied
+        already, and resending non-idempotent ones (`HINCRBY`, `SMEMBERS` + `DELETE`) would
+        corrupt their keys. Any other error is raised.
+
+        Args:
+            commands (list[tuple[Any, ...]]): The commands to be executed.
 
-    def _update_atom_indexes(self, documents: Iterable[DocumentT], **kwargs) -> None:
+        Returns:
+            list[Any]: The results of the commands, in the same order as the commands.
+        """
+        cluster: RedisCluster = self.redis  # type: ignore
+        nodes: dict[str, Any] = {}
+        positions_by_node: dict[str, list[int]] = collections.defaultdict(list)
+        for position, command in enumerate(commands):
+            node = cluster.get_node_from_key(command[1])
+            nodes[node.name] = node
+            positions_by_node[node.name].append(position)
+
+        results: list[Any] = [None] * len(commands)
+
+        def execute_on_node(node_name: str) -> None:
+            positions = positions_by_node[node_name]
+            node_commands = [commands[position] for position in positions]
+            client = cluster.get_redis_connection(nodes[node_name])
+            node_results = self._execute_pipelined(client, node_commands, raise_on_error=False)
+            redirected = [
+                index for index, result in enumerate(node_results) if _is_redirection(result)
+            ]
+            if redirected:
+                logger().warning(
+                    f"Resending {len(redirected)} redirected commands of node {node_name}"
+                )
+                resent = self._execute_pipelined(
+                    cluster, [node_commands[index] for index in redirected]
+                )
+                for index, result in zip(redirected, resent):
+                    node_results[index] = result
+            for position, result in zip(positions, node_results):
+                if isinstance(result, Exception):
+                    raise result
+                results[position] = result
+
+        if len(positions_by_node) == 1:
+            execute_on_node(next(iter(positions_by_node)))
+        elif positions_by_node:
+            max_workers = max(1, min(len(positions_by_node), self.redis_cluster_max_workers))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                list(executor.map(execute_on_node, positions_by_node))
+        return results
+
+    def _update_atom_indexes(self, documents: Iterable[DocumentT]) -> None:
         """
         Update the indexes for the given documents in the database.
 
@@ -1183,114 +3321,166 @@ class RedisMongoDB(AtomDB):
         indexes. If a document is identified as a link, it updates the link index; otherwise,
         it updates the node index.
 
+        When adding documents, the index writes of a whole batch of documents are collected in
+        a `_RedisCommandBatch`, which merges every `SADD` aimed at the same key, and are then
+        sent through pipelines. Documents are processed in batches of at most
+        `mongo_bulk_insertion_limit` documents. While an online reindex is running, the writes
+        are also sent to the namespace it builds.
+
         Args:
             documents (Iterable[DocumentT): An iterable of documents to be indexed.
-            **kwargs: Additional keyword arguments for index updates.
+        """
+        documents_iterator = iter(documents)
+        while chunk := list(itertools.islice(documents_iterator, self.mongo_bulk_insertion_limit)):
+            self._prepare_members(chunk)
+            self._execute_index_writes(functools.partial(self._add_to_index, chunk))
+
+    def _add_to_index(self, documents: list[DocumentT], batch: _RedisCommandBatch) -> None:
+        """
+        Collect the index writes of the given documents in a command batch.
+
+        The keys are built in the current index namespace.
+
+        Args:
+            documents (list[DocumentT]): The documents to be indexed.
+            batch (_RedisCommandBatch): The batch collecting the index writes.
         """
         for document in documents:
             if self._is_document_link(document):
-                self._update_link_index(document, **kwargs)
+                self._update_link_index(document, batch=batch)
             else:
-                self._update_node_index(document, **kwargs)
+                self._update_node_index(document, batch=batch)
 
-    def _update_node_index(self, document: DocumentT, **kwargs) -> None:
+    def _update_node_index(self, document: DocumentT, batch: _RedisCommandBatch) -> None:
         """
         Update the index for the given node document in the database.
 
         This method updates the Redis index for the provided node document. It constructs a Redis
-        key using the document's handle and updates the node name in the Redis cache. If the
-        `delete_atom` flag is set to True, it deletes the Redis key and any associated incoming
-        links for the node.
+        key using the document's handle and adds the node name to the given command batch.
 
         Args:
             document (DocumentT): The node document to be indexed.
-            **kwargs: Additional keyword arguments for index updates. Supports `delete_atom` to
-                indicate whether the node should be deleted from the index.
+            batch (_RedisCommandBatch): The batch collecting the index writes.
         """
         handle = document[FieldNames.ID_HASH]
         node_name = document[FieldNames.NODE_NAME]
-        key = _build_redis_key(KeyPrefix.NAMED_ENTITIES, handle)
-        if kwargs.get("delete_atom", False):
-            self.redis.delete(key)
-            if links_handle := self._retrieve_and_delete_incoming_set(handle):
-                documents = self._get_and_delete_links_by_handles(links_handle)
-                for _document in documents:
-                    self._update_link_index(_document, delete_atom=True)
-        else:
-            self.redis.set(key, node_name)
+        batch.set(self._build_atom_key(KeyPrefix.NAMED_ENTITIES, handle), node_name)
 
-    def _update_link_index(self, document: DocumentT, **kwargs) -> None:
+    def _update_link_index(self, document: DocumentT, batch: _RedisCommandBatch) -> None:
         """
         Update the index for the given link document in the database.
 
         This method updates the Redis index for the provided link document. It constructs a Redis
-        key using the document's handle and updates the link targets in the Redis cache. If the
-        `delete_atom` flag is set to True, it deletes the Redis key and any associated incoming
-        links for the link.
+        key using the document's handle and adds the link targets, templates, patterns and
+        incoming sets to the given command batch. Toplevel links are also added to the
+        toplevel-only set kept next to each template and pattern set.
 
         Args:
             document (DocumentT): The link document to be indexed.
-            **kwargs: Additional keyword arguments for index updates. Supports `delete_atom` to
-                indicate whether the link should be deleted from the index.
+            batch (_RedisCommandBatch): The batch collecting the index writes.
         """
         handle: str = document[FieldNames.ID_HASH]
         targets: HandleListT = self._get_document_keys(document)
-        targets_str: str = "".join(targets)
-        arity: int = len(targets)
-        named_type_hash: str = document[FieldNames.TYPE_NAME_HASH]
+        member = self._encode_member(handle)
+
+        batch.set(
+            self._build_atom_key(KeyPrefix.OUTGOING_SET, handle),
+            self._encode_outgoing_set(targets),
+        )
 
-        index_templates = self.pattern_index_templates or []
+        keys = self._link_set_keys(document, targets)
 
-        if kwargs.get("delete_atom", False):
-            links_handle = self._retrieve_and_delete_incoming_set(handle)
+        # a parallel set of toplevel links only is kept next to every template/pattern set
+        is_toplevel = document.get(FieldNames.IS_TOPLEVEL, True)
+        for key in keys:
+            batch.sadd(key, member)
+            if is_toplevel:
+                batch.sadd(_toplevel_key(key), member)
+            else:
+                batch.srem(_toplevel_key(key), member)
 
-            if links_handle:
-                docs = self._get_and_delete_links_by_handles(links_handle)
-                for doc in docs:
-                    self._update_link_index(doc, delete_atom=True)
+        for target in targets:
+            batch.sadd(self._build_atom_key(KeyPrefix.INCOMING_SET, target), member)
 
-            outgoing_atoms = self._retrieve_outgoing_set(handle, delete=True)
+    def _link_set_keys(self, document: DocumentT, targets: HandleListT) -> list[str]:
+        """
+        Build the keys of the template and pattern sets the given link belongs to.
 
-            for atom_handle in outgoing_atoms:
-                self._delete_smember_incoming_set(atom_handle, handle)
+        Args:
+            document (DocumentT): The link document.
+            targets (HandleListT): The handles of the targets of the link.
 
-            for type_hash in [
-                FieldNames.COMPOSITE_TYPE_HASH,
-                FieldNames.TYPE_NAME_HASH,
-            ]:
-                self._delete_smember_template(document[type_hash], handle)
+        Returns:
+            list[str]: The keys of the sets, in the current index namespace.
+        """
+        namespace = self._current_namespace()
+        keys = [
+            namespace + _build_redis_key(KeyPrefix.TEMPLATES, document[type_hash])
+            for type_hash in [FieldNames.COMPOSITE_TYPE_HASH, FieldNames.TYPE_NAME_HASH]
+        ]
+        for key in self._template_keys(self.pattern_index_templates or [], document, targets):
+            keys.append(namespace + key)
+        return keys
 
-            for template in index_templates:
-                key = self._apply_index_template(template, named_type_hash, targets, arity)
-                if key:
-                    self.redis.srem(key, handle)
-        else:
-            incoming_buffer: dict[str, HandleListT] = {}
-            key = _build_redis_key(KeyPrefix.OUTGOING_SET, handle)
-            self.redis.set(key, targets_str)
+    def _template_keys(
+        self, templates: list[dict[str, Any]], document: DocumentT, targets: HandleListT
+    ) -> list[str]:
+        """
+        Build the keys of the pattern sets the given link belongs to under the given templates.
+
+        Args:
+            templates (list[dict[str, Any]]): The expanded pattern index templates.
+            document (DocumentT): The link document.
+            targets (HandleListT): The handles of the targets of the link.
+
+        Returns:
+            list[str]: The keys of the pattern sets, without namespace.
+        """
+        named_type_hash: str = document[FieldNames.TYPE_NAME_HASH]
+        keys = []
+        for template in templates:
+            key = self._apply_index_template(template, named_type_hash, targets, len(targets))
+            if key:
+                keys.append(key)
+        return keys
+
+    def _remove_from_index(
+        self,
+        documents: Iterable[DocumentT],
+        batch: _RedisCommandBatch,
+        deleted_handles: Container[str] = (),
+    ) -> None:
+        """
+        Collect the removal of the index entries of the given deleted atoms in a command batch.
 
+        The keys are built in the current index namespace. Only the index entries of the atoms
+        themselves are removed, the links pointing to them are not deleted in cascade.
+
+        Args:
+            documents (Iterable[DocumentT]): The documents of the deleted atoms.
+            batch (_RedisCommandBatch): The batch collecting the index writes.
+            deleted_handles (Container[str]): The handles of every atom being deleted, whose
+                incoming sets are deleted and don't need to be updated. Defaults to none.
+        """
+        documents = list(documents)
+        self._prepare_members(documents, assign=False)
+        for document in documents:
+            handle = document[FieldNames.ID_HASH]
+            batch.delete(self._build_atom_key(KeyPrefix.INCOMING_SET, handle))
+            if not self._is_document_link(document):
+                batch.delete(self._build_atom_key(KeyPrefix.NAMED_ENTITIES, handle))
+                continue
+            targets = self._get_document_keys(document)
+            batch.delete(self._build_atom_key(KeyPrefix.OUTGOING_SET, handle))
+            if (member := self._lookup_member(handle)) is None:
+                # a link without an integer ID was never added to any set
+                continue
+            for key in self._link_set_keys(document, targets):
+                batch.srem(key, member)
+                batch.srem(_toplevel_key(key), member)
             for target in targets:
-                buffer = incoming_buffer.get(target, None)
-                if buffer is None:
-                    buffer = []
-                    incoming_buffer[target] = buffer
-                buffer.append(handle)
-
-            for type_hash in [
-                FieldNames.COMPOSITE_TYPE_HASH,
-                FieldNames.TYPE_NAME_HASH,
-            ]:
-                key = _build_redis_key(KeyPrefix.TEMPLATES, document[type_hash])
-                self.redis.sadd(key, handle)
-
-            for template in index_templates:
-                key = self._apply_index_template(template, named_type_hash, targets, arity)
-                if key:
-                    self.redis.sadd(key, handle)
-
-            for handle in incoming_buffer:
-                key = _build_redis_key(KeyPrefix.INCOMING_SET, handle)
-                self.redis.sadd(key, *incoming_buffer[handle])
+                if target not in deleted_handles:
+                    batch.srem(self._build_atom_key(KeyPrefix.INCOMING_SET, target), member)
 
     @staticmethod
     def _is_document_link(document: DocumentT) -> bool:
@@ -1339,88 +3529,519 @@ class RedisMongoDB(AtomDB):
 
     def _retrieve_documents_by_index(
         self, collection: Collection, index_id: str, **kwargs
-    ) -> tuple[int, list[DocumentT]]:
+    ) -> tuple[int | str, list[DocumentT]]:
         """
         Retrieve documents from the specified MongoDB collection using the given index.
 
         This method retrieves documents from the provided MongoDB collection by utilizing the
-        specified index. It supports additional keyword arguments for cursor-based pagination
-        and chunk size.
+        specified index. Pages are read with keyset pagination: documents are sorted by the
+        keys of the index, which end with `_id`, and each page starts right after the last
+        document of the previous one, so deep pages cost the same as the first one. Text index
+        pages are sorted by `_id` only, using the `_id` index.
 
         Args:
             collection (Collection): The MongoDB collection from which documents are to be retrieved.
             index_id (str): The identifier of the index to be used for retrieval.
             **kwargs: Additional keyword arguments for retrieval.
-                - cursor (int, optional): The cursor position for pagination.
+                - cursor (int | str, optional): 0 for the first page, or the opaque token
+                    returned with the previous page. When None, all documents are retrieved.
                 - chunk_size (int, optional): The number of documents to retrieve per chunk.
 
         Returns:
-            tuple[int, list[DocumentT]]: A tuple containing the cursor position and a list of
-            retrieved documents.
+            tuple[int | str, list[DocumentT]]: A tuple containing the token of the next page
+            (0 if there is none) and a list of retrieved documents.
 
         Raises:
-            ValueError: If the specified index does not exist in the collection.
+            ValueError: If the specified index does not exist in the collection, if it was
+                created by an older version without the trailing `_id` key (creating it again
+                with `create_field_index` rebuilds it) or if the cursor is not a token of this
+                index.
         """
-        if MongoDBIndex(collection).index_exists(index_id):
-            cursor: int | None = kwargs.pop("cursor", None)
-            chunk_size = kwargs.pop("chunk_size", 500)
+        index = self._lookup_index(index_id)
+        if index is None:
+            raise ValueError(f"Index '{index_id}' does not exist in collection '{collection}'")
+        cursor: int | str | None = kwargs.pop("cursor", None)
+        chunk_size = kwargs.pop("chunk_size", 500)
 
-            try:
-                # Fallback to previous version
-                conditionals = self._retrieve_custom_index(index_id)
-                if isinstance(conditionals, dict) and (
-                    (c := conditionals.get("conditionals")) or c == {}
-                ):
-                    conditionals = c
-                if conditionals:
-                    kwargs.update(conditionals)
-            except Exception as e:
-                raise e
+        # Fallback to previous version
+        conditionals = index["props"]
+        if isinstance(conditionals, dict) and ((c := conditionals.get("conditionals")) or c == {}):
+            conditionals = c
+        if conditionals:
+            kwargs.update(conditionals)
 
+        if cursor is None:
             # Using the hint() method is an additional measure to ensure its use
-            pymongo_cursor = collection.find(kwargs).hint(index_id)
+            return 0, list(collection.find(kwargs).hint(index_id))
+
+        hint: str | None = index_id
+        if any(direction == "text" for _, direction in index["keys"]):
+            # text index keys can't be compared, so those pages are sorted by `_id` only
+            sort_keys = [(FieldNames.ID_HASH, ASCENDING)]
+            hint = None
+        elif index["keys"] and index["keys"][-1][0] == FieldNames.ID_HASH:
+            sort_keys = [(field, int(direction)) for field, direction in index["keys"]]
+        else:
+            # without a trailing `_id` every page would be sorted in memory
+            raise ValueError(
+                f"Index '{index_id}' does not end with '_id' and can't be paginated, "
+                "create it again with create_field_index to rebuild it"
+            )
+        mongo_filter: dict[str, Any] = kwargs
+        if cursor:
+            last_values = self._decode_index_cursor(index_id, cursor)
+            if len(last_values) != len(sort_keys):
+                raise ValueError(f"Invalid cursor for index '{index_id}'")
+            mongo_filter = {"$and": [kwargs, self._build_keyset_filter(sort_keys, last_values)]}
+
+        pymongo_cursor = collection.find(mongo_filter)
+        if hint is not None:
+            pymongo_cursor = pymongo_cursor.hint(hint)
+        # one extra document tells whether there is a next page
+        documents = list(pymongo_cursor.sort(sort_keys).limit(chunk_size + 1))
+        if len(documents) <= chunk_size:
+            return 0, documents
+        documents = documents[:chunk_size]
+        last_values = [self._get_document_field(documents[-1], field) for field, _ in sort_keys]
+        return self._encode_index_cursor(index_id, last_values), documents
+
+    @staticmethod
+    def _build_keyset_filter(sort_keys: list[tuple[str, int]], last_values: list[Any]) -> DocumentT:
+        """
+        Build the filter matching the documents sorted after the given sort key values.
 
-            if cursor is not None:
-                pymongo_cursor.skip(cursor).limit(chunk_size)
+        MongoDB comparison operators only match values of the same BSON type, while sorts
+        order values of different types, so values of the types sorted after the last value
+        are matched with `$type`. Null and missing fields sort first and are matched with
+        `None`.
 
-                documents = list(pymongo_cursor)
+        Args:
+            sort_keys (list[tuple[str, int]]): The `(field, direction)` sort keys.
+            last_values (list[Any]): The values of the sort keys in the last document read.
 
-                if not documents:
-                    return 0, []
+        Returns:
+            DocumentT: A MongoDB `$or` filter.
+        """
+        clauses = []
+        for position, (field, direction) in enumerate(sort_keys):
+            last_value = last_values[position]
+            ascending = direction == ASCENDING
+            rank = _bson_sort_rank(last_value)
+            after: list[DocumentT] = []
+            if rank != 0:
+                after.append({field: {"$gt" if ascending else "$lt": last_value}})
+            if rank is not None:
+                ranks = range(rank + 1, len(_BSON_SORT_ORDER)) if ascending else range(1, rank)
+                after.extend({field: {"$type": _BSON_SORT_ORDER[r]}} for r in ranks)
+                if not ascending and rank > 0:
+                    after.append({field: None})
+            if not after:
+                # nothing sorts before null and missing fields
+                continue
+            clause = {key: value for (key, _), value in zip(sort_keys, last_values[:position])}
+            if len(after) == 1:
+                clause.update(after[0])
+            else:
+                clause["$or"] = after
+            clauses.append(clause)
+        return {"$or": clauses}
 
-                if len(documents) < chunk_size:
-                    return 0, documents
-                else:
-                    return cursor + chunk_size, documents
+    @staticmethod
+    def _get_document_field(document: DocumentT, field: str) -> Any:
+        """
+        Retrieve the value of a possibly nested (dot-separated) field of a document.
 
-            return 0, list(pymongo_cursor)
-        else:
-            raise ValueError(f"Index '{index_id}' does not exist in collection '{collection}'")
+        Args:
+            document (DocumentT): The document.
+            field (str): The field, e.g. `custom_attributes.status`.
+
+        Returns:
+            Any: The value of the field, or None if it is missing.
+        """
+        value: Any = document
+        for part in field.split("."):
+            if not isinstance(value, Mapping):
+                return None
+            value = value.get(part)
+        return value
+
+    @staticmethod
+    def _encode_index_cursor(index_id: str, last_values: list[Any]) -> str:
+        """
+        Encode the position of a page of `get_atoms_by_index` as an opaque token.
+
+        Args:
+            index_id (str): The identifier of the index being paginated.
+            last_values (list[Any]): The values of the sort keys in the last document read.
+
+        Returns:
+            str: The token.
+        """
+        state = json_util.dumps({"index": index_id, "last": last_values})
+        return base64.urlsafe_b64encode(state.encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def _decode_index_cursor(index_id: str, cursor: int | str) -> list[Any]:
+        """
+        Decode a token returned by `_encode_index_cursor`.
+
+        Args:
+            index_id (str): The identifier of the index being paginated.
+            cursor (int | str): The token.
+
+        Returns:
+            list[Any]: The values of the sort keys in the last document read.
+
+        Raises:
+            ValueError: If the cursor is not a token of the given index.
+        """
+        try:
+            state = json_util.loads(
+                base64.urlsafe_b64decode(cursor).decode("utf-8")  # type: ignore
+            )
+        except Exception as e:
+            raise ValueError(f"Invalid cursor for index '{index_id}'") from e
+        if not isinstance(state, dict) or state.get("index") != index_id:
+            raise ValueError(f"Invalid cursor for index '{index_id}'")
+        return list(state.get("last", []))
+
+    def reindex(
+        self, pattern_index_templates: dict[str, list[DocumentT]] | None = None, **kwargs
+    ) -> None:
+        """
+        Rebuild the Redis indexes from the atoms stored in MongoDB.
+
+        When new pattern index templates are given, only the pattern sets of the expanded
+        templates that were added or removed are updated (see `_reindex_pattern_templates`).
+        Otherwise, by default, Redis is flushed and the indexes are rebuilt in place, so
+        queries see an incomplete index until the rebuild finishes. With `online=True` the
+        indexes are built into a new key namespace while readers keep using the current one:
+
+        - the new namespace is published, so every client also sends its index writes to it;
+          the writes of a client are fenced (see `_execute_index_writes`), so they reach the
+          new namespace even if the client did not see it yet;
+        - the atoms collection is split in `_id` ranges walked by a pool of threads, each one
+          writing the indexes of a chunk of atoms through pipelines and checkpointing the last
+          `_id` it indexed, so an interrupted reindex resumes where it stopped when called
+          again;
+        - readers are switched to the new namespace by a single `SET` and the keys of the old
+          namespace are dropped after `index_namespace_refresh_interval`, once readers have
+          seen the switch.
+
+        Every client of the database must be created with `online_reindex` enabled.
 
-    def reindex(self, pattern_index_templates: dict[str, list[DocumentT]] | None = None) -> None:
+        Args:
+            pattern_index_templates (dict[str, list[DocumentT]] | None): The new pattern index
+                templates, if they are to be changed.
+            **kwargs: Additional keyword arguments: `online` (bool) to build the indexes in a
+                new namespace, which also rebuilds every index when new pattern index
+                templates are given (defaults to False), `workers` (int), the number of
+                threads of an online reindex (defaults to 4) and `chunk_size` (int), the
+                number of atoms indexed between checkpoints (defaults to
+                `mongo_find_batch_size`).
+
+        Raises:
+            InvalidOperationException: If an online reindex is requested by a client created
+                without `online_reindex`.
+        """
+        if kwargs.get("online", False) and not self.online_reindex:
+            raise InvalidOperationException(
+                "Online reindex requires the online_reindex option", "online_reindex: False"
+            )
         if isinstance(pattern_index_templates, list):
+            previous_templates = self.pattern_index_templates or []
             self._save_pattern_index(deepcopy(pattern_index_templates))
             self._setup_indexes({'pattern_index_templates': pattern_index_templates})
+            if not kwargs.get("online", False):
+                self._reindex_pattern_templates(
+                    previous_templates, self.pattern_index_templates or []
+                )
+                return
+        if kwargs.get("online", False):
+            self._reindex_online(
+                kwargs.get("workers", 4), kwargs.get("chunk_size", self.mongo_find_batch_size)
+            )
+            return
         self.redis.flushall()
+        self._load_index_namespace()
         self._update_atom_indexes(self.mongo_atoms_collection.find({}))
 
-    def delete_atom(self, handle: str, **kwargs) -> None:
-        self.commit()
+    @staticmethod
+    def _template_signature(template: dict[str, Any]) -> tuple[Any, ...]:
+        """
+        Build a hashable value identifying an expanded pattern index template.
 
-        mongo_filter: dict[str, str] = {FieldNames.ID_HASH: handle}
+        Args:
+            template (dict[str, Any]): The expanded pattern index template.
 
-        document: DocumentT | None = self.mongo_atoms_collection.find_one_and_delete(mongo_filter)
+        Returns:
+            tuple[Any, ...]: The named type, target position, target value and selected
+                positions of the template.
+        """
+        return (
+            template[FieldNames.TYPE_NAME],
+            template["target_position"],
+            template["target_value"],
+            tuple(template["selected_positions"]),
+        )
 
-        if not document:
+    @staticmethod
+    def _template_links_filter(templates: list[dict[str, Any]]) -> dict[str, Any]:
+        """
+        Build the MongoDB filter matching the links any of the given templates applies to.
+
+        A template bound to a named type only applies to links of that type, and a template
+        bound to a target value only applies to links having that value at the target position,
+        which also requires an arity greater than the target position.
+
+        Args:
+            templates (list[dict[str, Any]]): The expanded pattern index templates.
+
+        Returns:
+            dict[str, Any]: The MongoDB filter.
+        """
+        links_filter: dict[str, Any] = {FieldNames.COMPOSITE_TYPE: {"$exists": True}}
+        conditions = []
+        for template in templates:
+            condition: dict[str, Any] = {}
+            if not isinstance(template[FieldNames.TYPE_NAME], bool):
+                condition[FieldNames.TYPE_NAME_HASH] = template[FieldNames.TYPE_NAME]
+            if (position := template["target_position"]) is not None:
+                condition["$or"] = [
+                    {f"{FieldNames.TARGETS}.{position}": template["target_value"]},
+                    {f"{FieldNames.KEY_PREFIX}_{position}": template["target_value"]},
+                ]
+            if not condition:
+                return links_filter
+            conditions.append(condition)
+        links_filter["$or"] = conditions
+        return links_filter
+
+    def _reindex_pattern_templates(
+        self, previous_templates: list[dict[str, Any]], templates: list[dict[str, Any]]
+    ) -> None:
+        """
+        Update the pattern sets after the pattern index templates changed.
+
+        The expanded templates are diffed, and only the links the added or removed templates
+        apply to are read from MongoDB. Each of them is added to the pattern sets of the added
+        templates and removed from the pattern sets of the removed ones, unless a remaining
+        template also maps the link to that set. Names, incoming and outgoing sets and type
+        template sets are left untouched.
+
+        Args:
+            previous_templates (list[dict[str, Any]]): The expanded templates replaced.
+            templates (list[dict[str, Any]]): The new expanded templates.
+        """
+        previous = {self._template_signature(template): template for template in previous_templates}
+        current = {self._template_signature(template): template for template in templates}
+        added = [template for signature, template in current.items() if signature not in previous]
+        removed = [template for signature, template in previous.items() if signature not in current]
+        if not added and not removed:
+            return
+        cursor = self.mongo_atoms_collection.find(
+            self._template_links_filter([*added, *removed])
+        ).batch_size(self.mongo_find_batch_size)
+
+        def add_commands(chunk: list[DocumentT], batch: _RedisCommandBatch) -> None:
+            namespace = self._current_namespace()
+            for document in chunk:
+                handle = document[FieldNames.ID_HASH]
+                targets = self._get_document_keys(document)
+                added_keys = self._template_keys(added, document, targets)
+                removed_keys = set(self._template_keys(removed, document, targets))
+                removed_keys.difference_update(self._template_keys(templates, document, targets))
+                is_toplevel = document.get(FieldNames.IS_TOPLEVEL, True)
+                if added_keys:
+                    member = self._encode_member(handle)
+                elif (lookup := self._lookup_member(handle)) is not None:
+                    member = lookup
+                else:
+                    # a link without an integer ID was never added to any set
+                    continue
+                for key in added_keys:
+                    batch.sadd(namespace + key, member)
+                    if is_toplevel:
+                        batch.sadd(namespace + _toplevel_key(key), member)
+                for key in removed_keys:
+                    batch.srem(namespace + key, member)
+                    batch.srem(namespace + _toplevel_key(key), member)
+
+        while chunk := list(itertools.islice(cursor, max(1, self.mongo_find_batch_size))):
+            self._prepare_members(chunk, assign=bool(added))
+            self._execute_index_writes(functools.partial(add_commands, chunk))
+
+    def _reindex_online(self, workers: int, chunk_size: int) -> None:
+        """
+        Build the indexes into a new namespace, then switch readers to it (see `reindex`).
+
+        Args:
+            workers (int): The number of threads walking the `_id` ranges.
+            chunk_size (int): The number of atoms indexed between checkpoints.
+        """
+        self._load_index_namespace()
+        namespace = self._building_namespace
+        if namespace is None:
+            namespace = f"ns{self.redis.incr(INDEX_NAMESPACE_COUNTER_KEY)}:"
+            self.redis.delete(REINDEX_CHECKPOINTS_KEY)
+            self.redis.set(INDEX_BUILDING_NAMESPACE_KEY, namespace)
+            self._load_index_namespace()
+        else:
+            logger().info(f"Resuming the reindex of namespace {namespace}")
+        # writes are fenced, so clients that did not see the new namespace yet send their
+        # writes to it once they are done, and atoms they wrote before are walked below
+
+        checkpoints: dict[str, str] = self.redis.hgetall(REINDEX_CHECKPOINTS_KEY) or {}  # type: ignore
+        lower_bounds = [None, *REINDEX_RANGE_BOUNDS[:-1]]
+        ranges = [
+            (str(index), lower, upper)
+            for index, (lower, upper) in enumerate(zip(lower_bounds, REINDEX_RANGE_BOUNDS))
+            if f"done:{index}" not in checkpoints
+        ]
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = [
+                executor.submit(
+                    self._reindex_range,
+                    namespace,
+                    range_id,
+                    lower,
+                    upper,
+                    checkpoints.get(f"last:{range_id}"),
+                    max(1, chunk_size),
+                )
+                for range_id, lower, upper in ranges
+            ]
+            for future in futures:
+                future.result()
+
+        old_namespace = self._index_namespace
+        self.redis.set(INDEX_NAMESPACE_KEY, namespace)
+        self.redis.delete(INDEX_BUILDING_NAMESPACE_KEY, REINDEX_CHECKPOINTS_KEY)
+        self._load_index_namespace()
+        # writes can't be lost anymore, but readers may still read the old namespace until
+        # they refresh it
+        time.sleep(self.index_namespace_refresh_interval)
+        self._drop_namespace(old_namespace)
+
+    def _reindex_range(
+        self,
+        namespace: str,
+        range_id: str,
+        lower: str | None,
+        upper: str | None,
+        last_id: str | None,
+        chunk_size: int,
+    ) -> None:
+        """
+        Index the atoms of an `_id` range into the given namespace, checkpointing the progress.
+
+        Args:
+            namespace (str): The namespace being built.
+            range_id (str): The identifier of the range in the checkpoints hash.
+            lower (str | None): The inclusive lower bound of the range (None for no bound).
+            upper (str | None): The exclusive upper bound of the range (None for no bound).
+            last_id (str | None): The last `_id` indexed by an interrupted reindex, if any.
+            chunk_size (int): The number of atoms indexed between checkpoints.
+        """
+        id_filter: dict[str, str] = {}
+        if last_id is not None:
+            id_filter["$gt"] = last_id
+        elif lower is not None:
+            id_filter["$gte"] = lower
+        if upper is not None:
+            id_filter["$lt"] = upper
+        with self._in_namespace(namespace):
+            while True:
+                mongo_filter = {FieldNames.ID_HASH: id_filter} if id_filter else {}
+                documents = list(
+                    self.mongo_atoms_collection.find(mongo_filter)
+                    .sort(FieldNames.ID_HASH, ASCENDING)
+                    .limit(chunk_size)
+                )
+                if not documents:
+                    break
+                self._update_atom_indexes(documents)
+                last_id = documents[-1][FieldNames.ID_HASH]
+                self.redis.hset(REINDEX_CHECKPOINTS_KEY, f"last:{range_id}", last_id)
+                if len(documents) < chunk_size:
+                    break
+                id_filter.pop("$gte", None)
+                id_filter["$gt"] = last_id
+        self.redis.hset(REINDEX_CHECKPOINTS_KEY, f"done:{range_id}", "1")
+
+    def _drop_namespace(self, namespace: str) -> None:
+        """
+        Delete the index keys of the given namespace, walking them with `SCAN`.
+
+        Args:
+            namespace (str): The namespace to be dropped ('' for the keys written before
+                namespaces).
+        """
+        for prefix in INDEX_KEY_PREFIXES:
+            keys = self.redis.scan_iter(
+                match=f"{namespace}{prefix.value}:*", count=self.redis_scan_count
+            )
+            while chunk := list(itertools.islice(keys, self.redis_pipeline_batch_size)):
+                self._execute_redis_commands(("unlink", key) for key in chunk)
+
+    def delete_atom(self, handle: str, **kwargs) -> None:
+        if not self.delete_atoms([handle]):
             logger().error(
                 f"Failed to delete atom for handle: {handle}. "
                 f"This atom may not exist. - Details: {kwargs}"
             )
-            raise AtomDoesNotExist(
-                message="Nonexistent atom",
-                details=f"handle: {handle}",
+            raise AtomDoesNotExist("Nonexistent atom", f"handle: {handle}")
+
+    def delete_atoms(self, handles: Iterable[str]) -> int:
+        """
+        Delete the given atoms and, in cascade, every link pointing to a deleted atom.
+
+        The closure of the cascade is computed first, one level of incoming links at a time,
+        with a single `$in` query and a single pipeline of `SMEMBERS` per level. The documents
+        are then deleted with chunked `delete_many` calls and their index entries are removed
+        with coalesced, pipelined commands. Handles of nonexistent atoms are ignored.
+
+        Args:
+            handles (Iterable[str]): The handles of the atoms to be deleted.
+
+        Returns:
+            int: The number of deleted atoms, including the ones deleted in cascade.
+        """
+        self.commit()
+
+        documents: dict[str, DocumentT] = {}
+        visited: set[str] = set()
+        frontier = list(dict.fromkeys(handles))
+        while frontier:
+            visited.update(frontier)
+            found = self._retrieve_documents(frontier)
+            documents.update(found)
+            incoming_sets = self._execute_redis_commands(
+                ("smembers", self._build_atom_key(KeyPrefix.INCOMING_SET, handle))
+                for handle in found
+            )
+            frontier = list(
+                dict.fromkeys(
+                    link_handle
+                    for links_handle in incoming_sets
+                    for link_handle in self._decode_handles(links_handle)
+                    if link_handle not in visited
+                )
             )
-        self._update_atom_indexes([document], delete_atom=True)
+        if not documents:
+            return 0
+
+        deleted_handles = list(documents)
+        chunk_size = max(1, self.mongo_multi_get_batch_size)
+        for start in range(0, len(deleted_handles), chunk_size):
+            chunk = deleted_handles[start : start + chunk_size]  # noqa: E203
+            self.mongo_atoms_collection.delete_many({FieldNames.ID_HASH: {"$in": chunk}})
+        self._execute_index_writes(
+            lambda batch: self._remove_from_index(documents.values(), batch, documents)
+        )
+        self._update_atom_counters(documents.values(), -1)
+        self._atoms_changed("delete", deleted_handles)
+        return len(deleted_handles)
 
     def create_field_index(
         self,
@@ -1430,6 +4051,33 @@ class RedisMongoDB(AtomDB):
         composite_type: Optional[list[Any]] = None,
         index_type: Optional[FieldIndexType] = None,
     ) -> str:
+        return self._create_field_index(
+            atom_type, fields, named_type, composite_type, index_type, publish=True
+        )
+
+    def _create_field_index(
+        self,
+        atom_type: str,
+        fields: list[str],
+        named_type: Optional[str] = None,
+        composite_type: Optional[list[Any]] = None,
+        index_type: Optional[FieldIndexType] = None,
+        publish: bool = True,
+    ) -> str:
+        """
+        Create a field index, as `create_field_index` does.
+
+        The properties of the index are stored in Redis the first time it is created, and the
+        version of the index catalog is then incremented when `publish` is True, so other
+        clients reload their catalog.
+
+        Args:
+            publish (bool): Whether a new index is published to the other clients. The other
+                arguments are the ones of `create_field_index`. Defaults to True.
+
+        Returns:
+            str: The identifier of the index, or a message describing why it failed.
+        """
         if named_type and composite_type:
             raise ValueError("Both named_type and composite_type cannot be specified")
 
@@ -1455,15 +4103,22 @@ class RedisMongoDB(AtomDB):
 
         exc: Exception | None = None
         try:
-            index_id, index_props = MongoDBIndex(collection).create(
+            mongo_index = MongoDBIndex(collection)
+            index_id, index_props = mongo_index.create(
                 atom_type, fields, index_type=mongo_index_type, **kwargs
             )
-            serialized_index_props = pickle.dumps(index_props)
-            serialized_index_props_str = base64.b64encode(serialized_index_props).decode("utf-8")
-            self.redis.set(
+            created = self.redis.set(
                 _build_redis_key(KeyPrefix.CUSTOM_INDEXES, index_id),
-                serialized_index_props_str,
+                _encode_index_props(index_props),
+                nx=True,
             )
+            if created or mongo_index.rebuilt:
+                # the keys of a rebuilt index changed, so it is published even if `publish`
+                # is False
+                if publish or mongo_index.rebuilt:
+                    self.redis.incr(INDEX_CATALOG_VERSION_KEY)
+                # reloaded by the next lookup
+                self._index_catalog_version = None
         except pymongo_errors.OperationFailure as e:
             exc = e
             logger().error(f"Error creating index in collection '{collection}': {str(e)}")
@@ -1480,23 +4135,24 @@ class RedisMongoDB(AtomDB):
 
         return index_id
 
-    def _get_atoms_by_index(self, index_id: str, **kwargs) -> tuple[int, list[AtomT]]:
+    def _get_atoms_by_index(self, index_id: str, **kwargs) -> tuple[int | str, list[AtomT]]:
         """
         Retrieve atoms from the MongoDB collection using the specified index.
 
         This method retrieves atoms from the MongoDB collection by utilizing the specified
         index. It supports additional keyword arguments for cursor-based pagination and
-        chunk size.
+        chunk size. Atoms are built from the documents read, without fetching them again.
 
         Args:
             index_id (str): The identifier of the index to be used for retrieval.
             **kwargs: Additional keyword arguments for retrieval.
-                - cursor (int, optional): The cursor position for pagination.
+                - cursor (int | str, optional): 0 for the first page, or the opaque token
+                    returned with the previous page.
                 - chunk_size (int, optional): The number of documents to retrieve per chunk.
 
         Returns:
-            tuple[int, list[AtomT]]: A tuple containing the cursor position and a list of
-            retrieved atoms.
+            tuple[int | str, list[AtomT]]: A tuple containing the token of the next page (0 if
+            there is none) and a list of retrieved atoms.
 
         Raises:
             Exception: If there is an error retrieving atoms by index.
@@ -1505,7 +4161,12 @@ class RedisMongoDB(AtomDB):
             cursor, documents = self._retrieve_documents_by_index(
                 self.mongo_atoms_collection, index_id, **kwargs
             )
-            return cursor, [self.get_atom(document[FieldNames.ID_HASH]) for document in documents]
+            atoms: list[AtomT] = []
+            for document in documents:
+                if self._is_document_link(document) and FieldNames.TARGETS not in document:
+                    document[FieldNames.TARGETS] = self._get_document_keys(document)
+                atoms.append(self._build_atom_from_dict(document))
+            return cursor, atoms
         except Exception as e:
             logger().error(f"Error retrieving atoms by index: {str(e)}")
             raise e
@@ -1529,21 +4190,95 @@ class RedisMongoDB(AtomDB):
         Insert multiple documents into the MongoDB collection and update indexes.
 
         This method performs a bulk insert of the provided documents into the MongoDB collection.
-        It replaces existing documents with the same ID and updates the corresponding indexes.
-        Additional keyword arguments can be used to customize the insertion behavior.
+        It replaces existing documents with the same ID, using unordered batched `bulk_write`
+        calls, and updates the corresponding indexes.
 
         Args:
             documents (list[AtomT]): A list of atoms to be inserted into the collection.
 
         Raises:
-            pymongo.errors.BulkWriteError: If there is an error during the bulk write operation.
-            Exception: If there is an unexpected error during the insertion process.
+            BulkWriteMongoDBException: If one or more documents could not be written. The
+                handles of the failed documents are available in `failed_handles`.
         """
         try:
-            _id = FieldNames.ID_HASH
             docs: list[DocumentT] = [d.to_dict() for d in documents]
-            for document in docs:
-                self.mongo_atoms_collection.replace_one({_id: document[_id]}, document, upsert=True)
-            self._update_atom_indexes(docs)
+            self._upsert_documents(self.mongo_atoms_collection, docs)
+        except BulkWriteMongoDBException as e:
+            logger().error(f"Error bulk inserting documents: {str(e)}")
+            raise e
         except Exception as e:  # pylint: disable=broad-except
             logger().error(f"Error bulk inserting documents: {str(e)}")
+
+    def bulk_insert_stream(
+        self,
+        documents: Iterable[AtomT],
+        chunk_size: int = 10000,
+        max_bytes: int = 64000000,
+    ) -> dict[str, int]:
+        """
+        Insert atoms consumed lazily from an iterable, in bounded chunks.
+
+        Atoms are pulled from `documents` (e.g. a generator) and converted to documents one at
+        a time. Documents are gathered in chunks of at most `chunk_size` documents or
+        `max_bytes` approximate BSON bytes, and each chunk is written to MongoDB and indexed
+        before the next atoms are pulled, so the whole input is never resident at once.
+        A chunk with failed documents does not stop the ingestion; failures are logged and
+        counted in the returned statistics.
+
+        Args:
+            documents (Iterable[AtomT]): The atoms to be inserted.
+            chunk_size (int): Maximum number of documents in a chunk. Defaults to 10000.
+            max_bytes (int): Maximum approximate size, in bytes, of the documents in a chunk.
+                Defaults to 64000000.
+
+        Returns:
+            dict[str, int]: Ingestion statistics: `atom_count`, `node_count`, `link_count`,
+                `failed_count`, `chunk_count` and `byte_count`.
+        """
+        stats = {
+            "atom_count": 0,
+            "node_count": 0,
+            "link_count": 0,
+            "failed_count": 0,
+            "chunk_count": 0,
+            "byte_count": 0,
+        }
+        chunk: list[DocumentT] = []
+        chunk_bytes = 0
+
+        def flush_chunk() -> None:
+            failed: set[str] = set()
+            try:
+                self._upsert_documents(self.mongo_atoms_collection, chunk)
+            except BulkWriteMongoDBException as e:
+                failed = set(e.failed_handles)
+            for document in chunk:
+                if document[FieldNames.ID_HASH] in failed:
+                    continue
+                stats["atom_count"] += 1
+                stats["link_count" if self._is_document_link(document) else "node_count"] += 1
+            stats["failed_count"] += len(failed)
+            stats["chunk_count"] += 1
+            stats["byte_count"] += chunk_bytes
+
+        for atom in documents:
+            document = atom.to_dict()
+            chunk.append(document)
+            chunk_bytes += _approximate_document_size(document)
+            if len(chunk) >= chunk_size or chunk_bytes >= max_bytes:
+                flush_chunk()
+                chunk = []
+                chunk_bytes = 0
+        if chunk:
+            flush_chunk()
+        return stats
+
+
+@atexit.register
+def _close_open_databases() -> None:
+    """Drain the background writes of the open instances before the interpreter exits."""
+    for db in list(_OPEN_DATABASES):
+        try:
+            db.close()
+        except Exception as e:  # pylint: disable=broad-except
+            logger().error(f"Failed to close database - Details: {str(e)}")
@@ -0,0 +1,315 @@
+"""
+This module provides a multi-process loader for the RedisMongoDB adapter.
+
+Building atoms (hashing, document conversion and pattern key generation) is CPU-bound, so a
+single process can't saturate MongoDB and Redis. The loader partitions a stream of atom
+parameters across a pool of worker processes, each one holding its own `RedisMongoDB`
+connection and insertion buffers. Atoms are routed by handle, so duplicates of the same atom
+are always loaded by the same worker.
+"""
+
+import multiprocessing
+import os
+import queue as queue_module
+from typing import Any, Iterable
+
+from hyperon_das_atomdb.adapters.redis_mongo_db import RedisMongoDB
+from hyperon_das_atomdb.database import AtomDB, LinkT, NodeT
+from hyperon_das_atomdb.exceptions import BulkWriteMongoDBException
+from hyperon_das_atomdb.logger import logger
+
+_STATS_KEYS = ("atom_count", "node_count", "link_count", "failed_count")
+
+
+def _routing_handle(atom: NodeT | LinkT) -> str:
+    """
+    Compute the handle of the atom built from the given parameters, without building it.
+
+    Args:
+        atom (NodeT | LinkT): The node or link parameters.
+
+    Returns:
+        str: The handle of the atom.
+    """
+    if isinstance(atom, LinkT):  # type: ignore
+        return AtomDB.build_link_handle(
+            atom.named_type, [_routing_handle(target) for target in atom.targets_documents]
+        )
+    return AtomDB.build_node_handle(atom.named_type, atom.name)
+
+
+def _worker_index(atom: NodeT | LinkT, workers: int) -> int:
+    """
+    Compute the index of the worker that loads the given atom.
+
+    Args:
+        atom (NodeT | LinkT): The node or link parameters.
+        workers (int): The number of workers.
+
+    Returns:
+        int: The index of the worker, between 0 and `workers - 1`.
+    """
+    return int(_routing_handle(atom), 16) % workers
+
+
+def _count_atom(stats: dict[str, Any], is_link: bool, amount: int) -> None:
+    stats["atom_count"] += amount
+    stats["link_count" if is_link else "node_count"] += amount
+
+
+def _count_pending(
+    stats: dict[str, Any], pending: dict[str, bool], handle: str, is_link: bool
+) -> None:
+    if handle not in pending:
+        pending[handle] = is_link
+        _count_atom(stats, is_link, 1)
+
+
+def _record_failures(
+    stats: dict[str, Any], pending: dict[str, bool], failures: dict[str, str]
+) -> None:
+    """
+    Record failed atoms, removing from the counts the ones counted since the last commit.
+
+    Args:
+        stats (dict[str, Any]): The statistics being collected.
+        pending (dict[str, bool]): The handles of the atoms counted since the last commit,
+            mapped to whether they are links. The failed ones are removed.
+        failures (dict[str, str]): The error messages, keyed by the handles of the atoms.
+    """
+    stats["failures"].update(failures)
+    for handle in failures:
+        if (is_link := pending.pop(handle, None)) is not None:
+            _count_atom(stats, is_link, -1)
+
+
+def _load_atoms(
+    db: RedisMongoDB,
+    atoms: Iterable[NodeT | LinkT],
+    pending: dict[str, bool] | None = None,
+    background_flush: bool = False,
+) -> dict[str, Any]:
+    """
+    Add the given atoms to the database buffers, collecting statistics and failures.
+
+    Atoms are counted once buffered. The atoms that fail when the buffer is committed are
+    reported as failures and no longer counted, so the counts and the failures never overlap;
+    atoms added more than once before a commit are counted once.
+
+    Args:
+        db (RedisMongoDB): The database the atoms are added to.
+        atoms (Iterable[NodeT | LinkT]): The node and link parameters.
+        pending (dict[str, bool] | None): The handles of the atoms counted but not committed
+            yet, mapped to whether they are links, shared by the calls of a worker. Defaults
+            to a new dictionary.
+        background_flush (bool): Whether the database writes its buffer in the background,
+            reporting write errors later. Otherwise, `pending` is emptied whenever the buffer
+            is committed. Defaults to False.
+
+    Returns:
+        dict[str, Any]: The statistics (`atom_count`, `node_count`, `link_count` and
+            `failed_count`) and a `failures` dictionary mapping handles to error messages.
+    """
+    stats: dict[str, Any] = {key: 0 for key in _STATS_KEYS}
+    stats["failures"] = {}
+    pending = {} if pending is None else pending
+    for atom in atoms:
+        is_link = isinstance(atom, LinkT)  # type: ignore
+        try:
+            try:
+                added = db.add_link(atom) if is_link else db.add_node(atom)
+            except BulkWriteMongoDBException as e:
+                failures = {handle: e.args[0] for handle in e.failed_handles}
+                if not background_flush:
+                    # the full buffer holding the atom was committed while adding it
+                    _count_pending(stats, pending, _routing_handle(atom), is_link)
+                    _record_failures(stats, pending, failures)
+                    pending.clear()
+                    continue
+                # the error of an earlier background write, raised before or after the atom
+                # was buffered, so it is added again
+                _record_failures(stats, pending, failures)
+                added = db.add_link(atom) if is_link else db.add_node(atom)
+        except Exception as e:  # pylint: disable=broad-except
+            stats["failures"][_routing_handle(atom)] = str(e)
+            continue
+        if added is None:
+            stats["failures"][_routing_handle(atom)] = "atom discarded"
+            continue
+        _count_pending(stats, pending, added.handle, is_link)
+        if not background_flush and not db.get_insertion_buffer_fill()["document_count"]:
+            # the buffer was committed, so the atoms counted so far were written
+            pending.clear()
+    return stats
+
+
+def _merge_stats(total: dict[str, Any], partial: dict[str, Any]) -> None:
+    for key in _STATS_KEYS:
+        total[key] += partial.get(key, 0)
+    total["failures"].update(partial.get("failures", {}))
+
+
+def _put(queue: multiprocessing.Queue, item: Any, process: Any, timeout: float) -> bool:
+    """
+    Put an item in the queue of a worker, waiting for room only while the worker is alive.
+
+    Args:
+        queue (multiprocessing.Queue): The queue of the worker.
+        item (Any): The item to be put in the queue.
+        process (Any): The process of the worker.
+        timeout (float): Time, in seconds, waited for room before checking the worker again.
+
+    Returns:
+        bool: True if the item was put in the queue, False if the worker exited.
+    """
+    while True:
+        try:
+            queue.put(item, timeout=timeout)
+            return True
+        except queue_module.Full:
+            if not process.is_alive():
+                return False
+
+
+def _worker(
+    queue: multiprocessing.Queue,
+    results: multiprocessing.Queue,
+    db_kwargs: dict[str, Any],
+) -> None:
+    """
+    Load the batches of atoms read from `queue` until a `None` is read.
+
+    The merged statistics of the worker, or the error that stopped it, are put in `results`.
+    When the worker fails, the atoms it buffered and the batches left in its queue are
+    reported as failures.
+
+    Args:
+        queue (multiprocessing.Queue): The queue the batches of atom parameters are read from.
+        results (multiprocessing.Queue): The queue the statistics of the worker are put in.
+        db_kwargs (dict[str, Any]): The parameters used to connect to the database.
+    """
+    stats: dict[str, Any] = {key: 0 for key in _STATS_KEYS}
+    stats["failures"] = {}
+    pending: dict[str, bool] = {}
+    background_flush = bool(db_kwargs.get("background_flush", False))
+    drained = False
+    try:
+        db = RedisMongoDB(**db_kwargs)
+        while (batch := queue.get()) is not None:
+            _merge_stats(stats, _load_atoms(db, batch, pending, background_flush))
+        drained = True
+        try:
+            db.commit()
+        except BulkWriteMongoDBException as e:
+            _record_failures(stats, pending, {handle: e.args[0] for handle in e.failed_handles})
+    except Exception as e:  # pylint: disable=broad-except
+        stats["error"] = str(e)
+        message = f"worker failed: {e}"
+        # the buffered atoms were not written
+        _record_failures(stats, pending, {handle: message for handle in pending})
+        # keep reading, so the producer is never blocked by a failed worker
+        while not drained and (batch := queue.get()) is not None:
+            stats["failures"].update({_routing_handle(atom): message for atom in batch})
+    stats["failed_count"] = len(stats["failures"])
+    results.put(stats)
+
+
+def parallel_load(
+    atoms: Iterable[NodeT | LinkT],
+    workers: int | None = None,
+    batch_size: int = 1000,
+    queue_size: int = 16,
+    start_method: str = "spawn",
+    **db_kwargs: Any,
+) -> dict[str, Any]:
+    """
+    Load a stream of atoms into a RedisMongoDB database using a pool of worker processes.
+
+    Atom parameters are routed to a worker by the handle of the atom they build, sent in
+    batches of `batch_size` atoms through a bounded queue per worker, and added by the worker
+    to its own `RedisMongoDB` instance, which is committed once the stream is exhausted.
+    Targets of links are built by the worker loading the link, so a node can also be written
+    by other workers; writes are upserts, so the result is the same.
+
+    Args:
+        atoms (Iterable[NodeT | LinkT]): The node and link parameters to be loaded.
+        workers (int | None): The number of worker processes. Defaults to the number of CPUs.
+        batch_size (int): The number of atoms sent to a worker at once. Defaults to 1000.
+        queue_size (int): The maximum number of batches waiting for each worker. Defaults
+            to 16.
+        start_method (str): The multiprocessing start method of the workers. Defaults to
+            "spawn".
+        **db_kwargs: The parameters used by every worker to connect to the database (see
+            `RedisMongoDB`).
+
+    Returns:
+        dict[str, Any]: The merged statistics of the workers (`atom_count`, `node_count`,
+            `link_count` and `failed_count`), a `failures` dictionary mapping the handles that
+            could not be loaded to an error message, and a `worker_errors` list with the errors
+            that stopped a worker. The atoms that could no longer be sent to a worker because
+            it exited, or that a failed worker did not load, are reported as failures. Atoms
+            are counted once, and failed atoms are not counted.
+    """
+    workers = max(1, workers or os.cpu_count() or 1)
+    context: Any = multiprocessing.get_context(start_method)
+    queues = [context.Queue(maxsize=max(1, queue_size)) for _ in range(workers)]
+    results = context.Queue()
+    processes = [
+        context.Process(target=_worker, args=(queue, results, db_kwargs), daemon=True)
+        for queue in queues
+    ]
+    for process in processes:
+        process.start()
+
+    stats: dict[str, Any] = {key: 0 for key in _STATS_KEYS}
+    stats["failures"] = {}
+    stats["worker_errors"] = []
+    batches: list[list[NodeT | LinkT]] = [[] for _ in range(workers)]
+    exited: set[int] = set()
+
+    def send(index: int, item: list[NodeT | LinkT] | None) -> None:
+        if index not in exited and _put(queues[index], item, processes[index], 1.0):
+            return
+        exited.add(index)
+        for atom in item or []:
+            stats["failures"][_routing_handle(atom)] = "worker exited"
+
+    try:
+        for atom in atoms:
+            index = _worker_index(atom, workers)
+            batches[index].append(atom)
+            if len(batches[index]) >= batch_size:
+                send(index, batches[index])
+                batches[index] = []
+    finally:
+        for index, batch in enumerate(batches):
+            if batch:
+                send(index, batch)
+            send(index, None)
+
+    pending = len(processes)
+    while pending:
+        try:
+            partial = results.get(timeout=1)
+        except queue_module.Empty:
+            if any(process.is_alive() for process in processes) or not results.empty():
+                continue
+            stats["worker_errors"].extend(["worker exited without results"] * pending)
+            break
+        pending -= 1
+        _merge_stats(stats, partial)
+        if "error" in partial:
+            stats["worker_errors"].append(partial["error"])
+    for queue, process in zip(queues, processes):
+        process.join()
+        if process.exitcode != 0:
+            # nobody reads the batches left in the queue of an exited worker
+            queue.cancel_join_thread()
+    stats["failed_count"] = len(stats["failures"])
+
+    if stats["failures"] or stats["worker_errors"]:
+        logger().error(
+            f"Parallel load finished with {stats['failed_count']} failed atoms and "
+            f"{len(stats['worker_errors'])} failed workers - Details: {stats['worker_errors']}"
+        )
+    return stats
@@ -15,8 +15,17 @@ class ConnectionMongoDBException(AtomDbBaseException):
     """Exception raised for errors in the connection to MongoDB."""
 
 
+class BulkWriteMongoDBException(AtomDbBaseException):
+    """Exception raised when some documents of a bulk write to MongoDB could not be written."""
+
+    def __init__(self, message: str, details: str = "", failed_handles: list[str] | None = None):
+        super().__init__(message, details)
+        self.failed_handles: list[str] = failed_handles or []
+
+
 __all__ = [
     "ConnectionMongoDBException",
+    "BulkWriteMongoDBException",
     "AtomDbBaseException",
     "AtomDoesNotExist",
     "AddNodeException",
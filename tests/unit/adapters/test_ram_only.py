@@ -841,6 +841,162 @@ class TestInMemoryDB:
 
         assert db.count_atoms() == {"atom_count": 3, "node_count": 2, "link_count": 1}
 
+    def test_bulk_insert_stream(self):
+        db = InMemoryDB()
+        documents = (
+            NodeT(
+                _id=f"node{i}",
+                handle=f"node{i}",
+                composite_type_hash="ConceptHash",
+                name=f"name{i}",
+                named_type="Concept",
+            )
+            for i in range(5)
+        )
+
+        stats = db.bulk_insert_stream(documents, chunk_size=2)
+
+        assert stats["atom_count"] == 5
+        assert stats["node_count"] == 5
+        assert stats["link_count"] == 0
+        assert stats["failed_count"] == 0
+        assert stats["chunk_count"] == 3
+        assert db.count_atoms() == {"atom_count": 5, "node_count": 5, "link_count": 0}
+
+    def test_get_node_names_and_links_targets(self, database: InMemoryDB):
+        node = self.all_added_nodes[0]
+        link = self.all_added_links[0]
+        names = database.get_node_names([node.handle, link.handle, "missing"])
+        assert names == {node.handle: node.name}
+        targets = database.get_links_targets([link.handle, node.handle, "missing"])
+        assert targets == {link.handle: link.targets}
+
+    def test_get_matched_links_many(self, database: InMemoryDB):
+        link = self.all_added_links[0]
+        patterns = [
+            (link.named_type, ["*", link.targets[1]]),
+            (link.named_type, link.targets),
+            ("*", ["*", "*"]),
+        ]
+        expected = [database.get_matched_links(t, targets) for t, targets in patterns]
+        assert database.get_matched_links_many(patterns) == expected
+        assert link.handle in expected[0]
+
+    def test_iter_matched_links(self, database: InMemoryDB):
+        link = self.all_added_links[0]
+        expected = database.get_matched_links(link.named_type, ["*", "*"])
+        assert set(database.iter_matched_links(link.named_type, ["*", "*"])) == expected
+        assert len(list(database.iter_matched_links(link.named_type, ["*", "*"], limit=1))) == 1
+        assert list(database.iter_matched_links(link.named_type, link.targets)) == [link.handle]
+        assert list(database.iter_matched_links("not-a-type", ["*", "*"])) == []
+        assert set(database.iter_matched_type(link.named_type)) == database.get_matched_type(
+            link.named_type
+        )
+        target = link.targets[0]
+        assert set(database.iter_incoming_links(target)) == set(
+            database.get_incoming_links_handles(target)
+        )
+        assert list(database.iter_matched_links(link.named_type, link.targets, limit=1)) == [
+            link.handle
+        ]
+        assert list(
+            database.iter_matched_links(link.named_type, link.targets, toplevel_only=True)
+        ) == ([link.handle] if link.is_toplevel else [])
+
+    def test_iter_matched_links_detects_changes(self, database: InMemoryDB):
+        link = self.all_added_links[0]
+        handles = database.iter_matched_type(link.named_type)
+        next(handles)
+        database.add_node(dict_to_node_params({"type": "Concept", "name": "new"}))
+        with pytest.raises(RuntimeError, match="changed during iteration"):
+            next(handles)
+        handles = database.iter_matched_links(link.named_type, link.targets)
+        database.delete_atoms([link.handle])
+        with pytest.raises(RuntimeError, match="changed during iteration"):
+            list(handles)
+
+    def test_sets_algebra(self, database: InMemoryDB):
+        link = self.all_added_links[0]
+        of_target = ("incoming", link.targets[0])
+        of_type = ("type", link.named_type)
+        incoming = set(database.get_incoming_links_handles(link.targets[0]))
+        links = database.get_matched_type(link.named_type)
+        assert link.handle in database.get_sets_intersection([of_type, of_target])
+        assert database.get_sets_intersection([of_type, of_target]) == links & incoming
+        assert database.get_sets_union([of_type, of_target]) == links | incoming
+        assert database.get_sets_difference([of_target, of_type]) == incoming - links
+        assert database.count_sets_intersection([of_type, of_target]) == len(links & incoming)
+        assert database.count_sets_intersection([of_type], limit=1) == 1
+        assert database.get_sets_intersection([of_type, ("type", "not-a-type")]) == set()
+        with pytest.raises(ValueError):
+            database.get_sets_union([("pattern", link.named_type, link.targets)])
+
+    def test_count_sets(self, database: InMemoryDB):
+        link = self.all_added_links[0]
+        target = link.targets[0]
+        pattern = (link.named_type, ["*", link.targets[1]])
+        assert database.count_matched_links(*pattern) == len(database.get_matched_links(*pattern))
+        assert database.count_matched_links(link.named_type, link.targets) == 1
+        assert database.count_matched_type(link.named_type) == len(
+            database.get_matched_type(link.named_type)
+        )
+        assert database.count_incoming_links(target) == len(
+            database.get_incoming_links_handles(target)
+        )
+        assert database.count_incoming_links("missing") == 0
+        operands = [("type", link.named_type), ("incoming", target), ("type", "not-a-type")]
+        assert database.count_sets(operands) == [
+            database.count_matched_type(link.named_type),
+            database.count_incoming_links(target),
+            0,
+        ]
+
+    def test_count_atoms_per_type(self, database: InMemoryDB):
+        counts = database.count_atoms({"per_type": True})
+        type_counts = counts.pop("type_counts")
+        assert counts == database.count_atoms()
+        assert sum(type_counts.values()) == counts["atom_count"]
+        link = self.all_added_links[0]
+        assert type_counts[link.named_type] == len(database.get_all_links(link.named_type))
+        node = self.all_added_nodes[0]
+        database.add_node(dict_to_node_params({"type": node.named_type, "name": node.name}))
+        assert database.count_atoms({"per_type": True})["type_counts"] == type_counts
+        database.delete_atom(link.handle)
+        type_counts = database.count_atoms({"per_type": True})["type_counts"]
+        assert type_counts.get(link.named_type, 0) == len(database.get_all_links(link.named_type))
+        assert sum(type_counts.values()) == database.count_atoms()["atom_count"]
+
+    def test_delete_atoms(self, database: InMemoryDB):
+        inner = {
+            "type": "Inner",
+            "targets": [{"type": "Concept", "name": "x"}, {"type": "Concept", "name": "y"}],
+        }
+        outer = database.add_link(
+            dict_to_link_params(
+                {"type": "Outer", "targets": [inner, {"type": "Concept", "name": "z"}]}
+            )
+        )
+        x, y, z = [database.get_node_handle("Concept", name) for name in "xyz"]
+        inner_handle = outer.targets[0]
+        before = database.count_atoms()
+        # the links pointing to x, and the ones pointing to them, are deleted in cascade
+        assert database.delete_atoms([x, x, "missing"]) == 3
+        assert database.count_atoms() == {
+            "atom_count": before["atom_count"] - 3,
+            "node_count": before["node_count"] - 1,
+            "link_count": before["link_count"] - 2,
+        }
+        for handle in [x, inner_handle, outer.handle]:
+            with pytest.raises(AtomDoesNotExist):
+                database.get_atom(handle)
+        assert not database.get_incoming_links_handles(y)
+        assert not database.get_incoming_links_handles(z)
+        assert database.get_matched_type("Outer") == set()
+        assert database.get_matched_links("Inner", ["*", y]) == set()
+        assert database.delete_atoms(["missing"]) == 0
+        with pytest.raises(AtomDoesNotExist):
+            database.delete_atom(x)
+
     def test_retrieve_all_atoms(self, database: InMemoryDB):
         expected = self.all_added_nodes + self.all_added_links
         assert len(expected) == len(self.all_added_nodes + self.all_added_links)
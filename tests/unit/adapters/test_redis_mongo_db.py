@@ -1300,7 +1300,7 @@ class TestRedisMongoDB:
 
         assert result == "name_index_asc"
         database.mongo_atoms_collection.create_index.assert_called_once_with(
-            [("name", 1)],
+            [("name", 1), ("_id", 1)],
             name="node_name_index_asc",
             partialFilterExpression={FieldNames.TYPE_NAME: {"$eq": "Type"}},
         )
@@ -1319,7 +1319,7 @@ class TestRedisMongoDB:
 
         assert result == "field_index_asc"
         database.mongo_atoms_collection.create_index.assert_called_once_with(
-            [("field", 1)],
+            [("field", 1), ("_id", 1)],
             name="link_field_index_asc",
             partialFilterExpression={FieldNames.TYPE_NAME: {"$eq": "Type"}},
         )
@@ -1378,7 +1378,7 @@ class TestRedisMongoDB:
 
         assert result == "field_index_asc"
         database.mongo_atoms_collection.create_index.assert_called_once_with(
-            [("field", 1), ("name", 1)],
+            [("field", 1), ("name", 1), ("_id", 1)],
             name="link_field_index_asc",
         )
 
@@ -1398,7 +1398,7 @@ class TestRedisMongoDB:
 
         assert result == "field_index_asc"
         database.mongo_atoms_collection.create_index.assert_called_once_with(
-            [("field", 1), ("name", 1)],
+            [("field", 1), ("name", 1), ("_id", 1)],
             name="link_field_index_asc",
             partialFilterExpression={FieldNames.TYPE_NAME: {"$eq": "Type"}},
         )
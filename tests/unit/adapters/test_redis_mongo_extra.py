@@ -1,21 +1,85 @@
+import base64
+import os
+import pickle
+import queue as queue_module
+import time
 from unittest import mock
 
 import pytest
+from pymongo.errors import BulkWriteError
+from redis.cluster import RedisCluster
+from redis.exceptions import ResponseError
 
-from hyperon_das_atomdb.adapters.redis_mongo_db import MongoDBIndex, RedisMongoDB, _HashableDocument
-from tests.helpers import dict_to_node_params
-from tests.unit.fixtures import redis_mongo_db  # noqa: F401
+from hyperon_das_atomdb.adapters.redis_mongo_db import (
+    _OPEN_DATABASES,
+    ATOM_COUNTERS_KEY,
+    INDEX_BUILDING_NAMESPACE_KEY,
+    INDEX_CATALOG_VERSION_KEY,
+    INDEX_NAMESPACE_KEY,
+    REINDEX_CHECKPOINTS_KEY,
+    MongoDBIndex,
+    MongoIndexType,
+    RedisMongoDB,
+    _AtomCache,
+    _BackgroundFlusher,
+    _close_open_databases,
+    _decode_index_props,
+    _encode_index_props,
+    _InsertionBuffer,
+    _pack_handle,
+    _unpack_handle,
+)
+from hyperon_das_atomdb.adapters.redis_mongo_loader import (
+    _load_atoms,
+    _record_failures,
+    _routing_handle,
+    _worker,
+    _worker_index,
+    parallel_load,
+)
+from hyperon_das_atomdb.exceptions import (
+    AtomDoesNotExist,
+    BulkWriteMongoDBException,
+    InvalidOperationException,
+)
+from tests.helpers import dict_to_link_params, dict_to_node_params
+from tests.unit.fixtures import MockRedis, MockRedisCluster, redis_mongo_db  # noqa: F401
 
 
 class TestRedisMongoExtra:
-    def test_hashable_document_str(self, redis_mongo_db):  # noqa: F811
+    def test_insertion_buffer_coalesces_by_handle(self, redis_mongo_db):  # noqa: F811
         db = redis_mongo_db
-        node = db._build_node(dict_to_node_params({"type": "A", "name": "A"}))
-        hashable = _HashableDocument(node)
-        str_hashable = str(hashable)
-        assert isinstance(str_hashable, str)
-        assert hashable
-        assert str(node) == str_hashable
+        node = db._build_node(dict_to_node_params({"type": "A", "name": "A"})).to_dict()
+        buffer = _InsertionBuffer()
+        buffer.add(node)
+        size = buffer.byte_size
+        buffer.add(dict(node, custom_attributes={"x": "y"}))
+        assert len(buffer) == 1
+        assert node["_id"] in buffer
+        assert buffer.byte_size > size
+        assert buffer.documents()[0]["custom_attributes"] == {"x": "y"}
+        buffer.clear()
+        assert not buffer
+        assert buffer.byte_size == 0
+
+    def test_add_atom_coalesces_buffer(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        db.add_node(dict_to_node_params({"type": "A", "name": "A"}))
+        db.add_node(dict_to_node_params({"type": "A", "name": "A"}))
+        fill = db.get_insertion_buffer_fill()
+        assert fill["document_count"] == 1
+        assert fill["byte_size"] > 0
+        assert fill["document_ratio"] == 1 / db.mongo_bulk_insertion_limit
+        db.commit()
+        assert db.get_insertion_buffer_fill()["document_count"] == 0
+        assert db.count_atoms()["atom_count"] == 1
+
+    def test_insertion_buffer_flushes_on_bytes(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        db.mongo_bulk_insertion_max_bytes = 1
+        db.add_node(dict_to_node_params({"type": "A", "name": "A"}))
+        assert db.get_insertion_buffer_fill()["document_count"] == 0
+        assert db.count_atoms()["atom_count"] == 1
 
     @pytest.mark.parametrize(
         "params",
@@ -33,10 +97,1051 @@ class TestRedisMongoExtra:
     @mock.patch(
         "hyperon_das_atomdb.adapters.redis_mongo_db.MongoClient", return_value=mock.MagicMock()
     )
-    @mock.patch("hyperon_das_atomdb.adapters.redis_mongo_db.Redis", return_value=mock.MagicMock())
     @mock.patch(
-        "hyperon_das_atomdb.adapters.redis_mongo_db.RedisCluster", return_value=mock.MagicMock()
+        "hyperon_das_atomdb.adapters.redis_mongo_db.Redis", side_effect=lambda **_: MockRedis()
     )
-    def test_create_db_connection_mongo(self, mock_mongo, mock_redis, mock_redis_cluster):
-        RedisMongoDB(mongo_tls_ca_file="/tmp/mock", redis_password="12", redis_username="A")
-        RedisMongoDB(redis_cluster=False)
+    # a class, as the adapter checks whether its client is a cluster client
+    @mock.patch("hyperon_das_atomdb.adapters.redis_mongo_db.RedisCluster", new=MockRedisCluster)
+    def test_create_db_connection_mongo(self, mock_redis, mock_mongo):
+        db = RedisMongoDB(mongo_tls_ca_file="/tmp/mock", redis_password="12", redis_username="A")
+        assert isinstance(db.redis, MockRedisCluster)
+        db = RedisMongoDB(redis_cluster=False)
+        assert isinstance(db.redis, MockRedis)
+        assert mock_redis.call_args.kwargs["host"] == "localhost"
+
+    def test_commit_bulk_write_batches(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        db.mongo_bulk_write_batch_size = 2
+        for name in ["A", "B", "C", "D", "E"]:
+            db.add_node(dict_to_node_params({"type": "A", "name": name}))
+        with mock.patch.object(
+            db.mongo_atoms_collection,
+            "bulk_write",
+            wraps=db.mongo_atoms_collection.bulk_write,
+        ) as bulk_write:
+            db.commit()
+        assert bulk_write.call_count == 3
+        assert db.count_atoms()["atom_count"] == 5
+        assert db.get_node_name(db.get_node_handle("A", "E")) == "E"
+
+    def test_commit_bulk_write_failed_handles(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        node_a = db.add_node(dict_to_node_params({"type": "A", "name": "A"}))
+        db.commit()
+        node_b = db.add_node(dict_to_node_params({"type": "A", "name": "B"}))
+        error = BulkWriteError({"writeErrors": [{"index": 0, "errmsg": "boom"}]})
+        with mock.patch.object(db.mongo_atoms_collection, "bulk_write", side_effect=error):
+            with pytest.raises(BulkWriteMongoDBException) as exc_info:
+                db.commit()
+        assert exc_info.value.failed_handles == [node_b.handle]
+        assert db.get_node_name(node_a.handle) == "A"
+
+    def test_commit_keeps_buffer_on_error(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        node = db.add_node(dict_to_node_params({"type": "A", "name": "A"}))
+        error = ConnectionError("network down")
+        with mock.patch.object(db.mongo_atoms_collection, "bulk_write", side_effect=error):
+            with pytest.raises(ConnectionError):
+                db.commit()
+        db.commit()
+        assert db.get_node_name(node.handle) == "A"
+
+    def test_commit_counts_batches_written_before_error(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        db.mongo_bulk_write_batch_size = 1
+        assert db.count_atoms({"precise": True})["node_count"] == 0
+        db.add_node(dict_to_node_params({"type": "A", "name": "A"}))
+        db.add_node(dict_to_node_params({"type": "A", "name": "B"}))
+        bulk_write = db.mongo_atoms_collection.bulk_write
+        outcomes = iter([None, ConnectionError("network down")])
+
+        def fail_second_batch(*args, **kwargs):
+            if error := next(outcomes):
+                raise error
+            return bulk_write(*args, **kwargs)
+
+        with mock.patch.object(
+            db.mongo_atoms_collection, "bulk_write", side_effect=fail_second_batch
+        ):
+            with pytest.raises(ConnectionError):
+                db.commit()
+        db.commit()
+        assert db.count_atoms({"precise": True, "per_type": True}) == {
+            "atom_count": 2,
+            "node_count": 2,
+            "link_count": 0,
+            "type_counts": {"A": 2},
+        }
+
+    def test_update_atom_indexes_coalesces_sadd(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        node_a = db.add_node(dict_to_node_params({"type": "A", "name": "A"}))
+        link_1 = db.add_link(
+            dict_to_link_params({"type": "L1", "targets": [{"type": "A", "name": "A"}]})
+        )
+        link_2 = db.add_link(
+            dict_to_link_params({"type": "L2", "targets": [{"type": "A", "name": "A"}]})
+        )
+        commands = []
+        execute_redis_commands = db._execute_redis_commands
+
+        def execute(redis_commands):
+            commands.extend(redis_commands)
+            return execute_redis_commands(commands)
+
+        with mock.patch.object(db, "_execute_redis_commands", side_effect=execute):
+            db.commit()
+        incoming_key = f"incoming_set:{node_a.handle}"
+        incoming_commands = [c for c in commands if c[1] == incoming_key]
+        assert len(incoming_commands) == 1
+        assert set(incoming_commands[0][2:]) == {link_1.handle, link_2.handle}
+        assert db.get_incoming_links_handles(node_a.handle) in (
+            [link_1.handle, link_2.handle],
+            [link_2.handle, link_1.handle],
+        )
+
+    def test_redis_hash_tags(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        db.redis_hash_tags = True
+        node_a = db.add_node(dict_to_node_params({"type": "A", "name": "A"}))
+        link = db.add_link(
+            dict_to_link_params({"type": "L", "targets": [{"type": "A", "name": "A"}]})
+        )
+        db.commit()
+        assert f"names:{{{node_a.handle}}}" in db.redis.cache
+        assert f"outgoing_set:{{{link.handle}}}" in db.redis.cache
+        assert f"incoming_set:{{{node_a.handle}}}" in db.redis.cache
+        assert db.get_node_name(node_a.handle) == "A"
+        assert db.get_link_targets(link.handle) == [node_a.handle]
+        assert db.get_incoming_links_handles(node_a.handle) == [link.handle]
+
+    def test_execute_redis_cluster_commands(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        nodes = {name: mock.Mock(name=name) for name in ("node-1", "node-2")}
+        for name, node in nodes.items():
+            node.name = name
+        clients = {"node-1": MockRedis(), "node-2": MockRedis()}
+        cluster = mock.MagicMock(spec=RedisCluster)
+        cluster.get_node_from_key.side_effect = lambda key: nodes[
+            "node-1" if key.endswith("1") else "node-2"
+        ]
+        cluster.get_redis_connection.side_effect = lambda node: clients[node.name]
+        db.redis = cluster
+        results = db._execute_redis_commands(
+            [("set", "k1", "a"), ("set", "k2", "b"), ("sadd", "s1", "x", "y"), ("get", "k1")]
+        )
+        assert results == ["OK", "OK", 2, "a"]
+        assert clients["node-1"].cache == {"k1": "a", "s1": {"x", "y"}}
+        assert clients["node-2"].cache == {"k2": "b"}
+
+    def test_execute_redis_cluster_redirections(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        node = mock.Mock()
+        node.name = "node-1"
+        client, redirected_to = MockRedis(), MockRedis()
+        cluster = mock.MagicMock(spec=RedisCluster)
+        cluster.get_node_from_key.return_value = node
+        cluster.get_redis_connection.return_value = client
+        cluster.pipeline.side_effect = lambda transaction: redirected_to.pipeline(transaction)
+        db.redis = cluster
+        with mock.patch.object(client, "set", side_effect=ResponseError("MOVED 1 127.0.0.1:7001")):
+            results = db._execute_redis_commands(
+                [("hincrby", "h", "f", 1), ("set", "k", "a"), ("hincrby", "h", "f", 1)]
+            )
+        assert results == [1, "OK", 2]
+        assert client.cache == {"h": {"f": 2}}
+        assert redirected_to.cache == {"k": "a"}
+        with mock.patch.object(client, "sadd", side_effect=ResponseError("WRONGTYPE")):
+            with pytest.raises(ResponseError):
+                db._execute_redis_commands([("sadd", "s", "x"), ("hincrby", "h", "f", 1)])
+        assert client.cache["h"] == {"f": 3}
+
+    def test_bulk_insert_stream(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        nodes = (
+            db._build_node(dict_to_node_params({"type": "A", "name": name}))
+            for name in ("a", "b", "c")
+        )
+        stats = db.bulk_insert_stream(nodes, chunk_size=2)
+        assert stats["atom_count"] == 3
+        assert stats["node_count"] == 3
+        assert stats["link_count"] == 0
+        assert stats["failed_count"] == 0
+        assert stats["chunk_count"] == 2
+        assert stats["byte_count"] > 0
+        for name in ("a", "b", "c"):
+            assert db.get_node_name(db.get_node_handle("A", name)) == name
+
+    def test_bulk_insert_stream_max_bytes(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        nodes = [db._build_node(dict_to_node_params({"type": "A", "name": n})) for n in "abcd"]
+        stats = db.bulk_insert_stream(iter(nodes), chunk_size=100, max_bytes=1)
+        assert stats["chunk_count"] == 4
+        assert db.count_atoms()["atom_count"] == 4
+
+    def test_background_flush(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        db._flusher = _BackgroundFlusher(
+            lambda documents: db._upsert_documents(db.mongo_atoms_collection, documents)
+        )
+        db.mongo_bulk_insertion_limit = 2
+        for name in "abcde":
+            db.add_node(dict_to_node_params({"type": "A", "name": name}))
+        db.flush(wait=True)
+        assert db.get_insertion_buffer_fill()["document_count"] == 0
+        assert db.count_atoms()["atom_count"] == 5
+        db._flusher.close()
+
+    def test_background_flush_error(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        db._flusher = _BackgroundFlusher(
+            lambda documents: db._upsert_documents(db.mongo_atoms_collection, documents)
+        )
+        db.add_node(dict_to_node_params({"type": "A", "name": "A"}))
+        with mock.patch.object(db, "_upsert_documents", side_effect=ValueError("boom")):
+            db.flush(wait=False)
+            db._flusher.wait()
+        with pytest.raises(ValueError, match="boom"):
+            db.add_node(dict_to_node_params({"type": "A", "name": "B"}))
+        db.flush(wait=True)
+        db._flusher.close()
+
+    def test_close(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        db._flusher = _BackgroundFlusher(
+            lambda documents: db._upsert_documents(db.mongo_atoms_collection, documents)
+        )
+        _OPEN_DATABASES.add(db)
+        node = db.add_node(dict_to_node_params({"type": "A", "name": "A"}))
+        db.flush(wait=False)
+        _close_open_databases()
+        assert db._flusher is None
+        assert db not in _OPEN_DATABASES
+        assert db.get_node_name(node.handle) == "A"
+        with db:
+            db.add_node(dict_to_node_params({"type": "A", "name": "B"}))
+            db.flush()
+        assert db.count_atoms()["atom_count"] == 2
+
+    def test_parallel_loader_routing(self):
+        node = dict_to_node_params({"type": "A", "name": "A"})
+        link = dict_to_link_params({"type": "L", "targets": [{"type": "A", "name": "A"}]})
+        node_handle = RedisMongoDB.build_node_handle("A", "A")
+        assert _routing_handle(node) == node_handle
+        assert _routing_handle(link) == RedisMongoDB.build_link_handle("L", [node_handle])
+        assert _worker_index(node, 4) == int(node_handle, 16) % 4
+        duplicate = dict_to_node_params({"type": "A", "name": "A"})
+        assert _worker_index(node, 4) == _worker_index(duplicate, 4)
+
+    def test_parallel_loader_load_atoms(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        atoms = [
+            dict_to_node_params({"type": "A", "name": "A"}),
+            dict_to_link_params({"type": "L", "targets": [{"type": "A", "name": "A"}]}),
+            dict_to_node_params({"type": "", "name": ""}),
+        ]
+        stats = _load_atoms(db, atoms)
+        db.commit()
+        assert stats["atom_count"] == 2
+        assert stats["node_count"] == 1
+        assert stats["link_count"] == 1
+        assert list(stats["failures"]) == [_routing_handle(atoms[2])]
+        assert db.count_atoms()["atom_count"] == 2
+
+    def test_parallel_loader_load_atoms_commit_failures(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        db.mongo_bulk_insertion_limit = 2
+        atoms = [dict_to_node_params({"type": "A", "name": name}) for name in "abc"]
+        handles = [_routing_handle(atom) for atom in atoms]
+        failed = [handles[0]]
+
+        def upsert_documents(collection, documents):
+            raise BulkWriteMongoDBException("Failed", "boom", failed_handles=failed)
+
+        pending: dict[str, bool] = {}
+        with mock.patch.object(db, "_upsert_documents", side_effect=upsert_documents):
+            stats = _load_atoms(db, atoms, pending)
+            assert stats["atom_count"] == 2 and stats["node_count"] == 2
+            assert list(stats["failures"]) == [handles[0]]
+            assert pending == {handles[2]: False}
+            failed = [handles[2]]
+            with pytest.raises(BulkWriteMongoDBException) as exc_info:
+                db.commit()
+        _record_failures(stats, pending, {handle: "" for handle in exc_info.value.failed_handles})
+        assert stats["atom_count"] == 1 and stats["node_count"] == 1
+        assert list(stats["failures"]) == [handles[0], handles[2]]
+
+    def test_parallel_loader_failed_worker(self):
+        atoms = [dict_to_node_params({"type": "A", "name": name}) for name in "abc"]
+        queue: queue_module.Queue = queue_module.Queue()
+        results: queue_module.Queue = queue_module.Queue()
+        for item in [atoms[:2], atoms[2:], None]:
+            queue.put(item)
+        with mock.patch(
+            "hyperon_das_atomdb.adapters.redis_mongo_loader.RedisMongoDB",
+            side_effect=RuntimeError("boom"),
+        ):
+            _worker(queue, results, {})  # type: ignore
+        stats = results.get_nowait()
+        assert stats["error"] == "boom" and stats["atom_count"] == 0
+        assert stats["failures"] == {_routing_handle(atom): "worker failed: boom" for atom in atoms}
+        assert stats["failed_count"] == 3
+
+    def test_parallel_load(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        atoms = [dict_to_node_params({"type": "A", "name": str(name)}) for name in range(20)]
+        atoms.append(dict_to_node_params({"type": "", "name": ""}))
+        with mock.patch.object(
+            RedisMongoDB, "_connection_mongo_db", return_value=db.mongo_db
+        ), mock.patch.object(RedisMongoDB, "_connection_redis", return_value=db.redis):
+            stats = parallel_load(atoms, workers=2, batch_size=3, start_method="fork")
+        assert stats["atom_count"] == 20
+        assert stats["node_count"] == 20
+        assert list(stats["failures"]) == [_routing_handle(atoms[-1])]
+        assert stats["worker_errors"] == []
+
+    def test_parallel_load_worker_exited(self):
+        atoms = [dict_to_node_params({"type": "A", "name": str(name)}) for name in range(50)]
+        with mock.patch(
+            "hyperon_das_atomdb.adapters.redis_mongo_loader._worker",
+            side_effect=lambda *args: os._exit(1),
+        ):
+            stats = parallel_load(atoms, workers=1, batch_size=1, queue_size=1, start_method="fork")
+        assert stats["atom_count"] == 0
+        assert 0 < stats["failed_count"] <= 50
+        assert stats["worker_errors"] == ["worker exited without results"]
+
+    def test_get_atoms(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        node_a = db.add_node(dict_to_node_params({"type": "A", "name": "A"}))
+        node_b = db.add_node(dict_to_node_params({"type": "A", "name": "B"}))
+        link = db.add_link(
+            dict_to_link_params(
+                {"type": "L", "targets": [{"type": "A", "name": "A"}, {"type": "A", "name": "B"}]}
+            )
+        )
+        db.commit()
+        db.mongo_multi_get_batch_size = 2
+        with mock.patch.object(
+            db.mongo_atoms_collection, "find", wraps=db.mongo_atoms_collection.find
+        ) as find:
+            atoms = db.get_atoms([link.handle, node_b.handle, node_a.handle])
+        assert find.call_count == 2
+        assert [atom.handle for atom in atoms] == [link.handle, node_b.handle, node_a.handle]
+        assert atoms[0].targets == [node_a.handle, node_b.handle]
+
+        atoms = db.get_atoms([link.handle], targets_document=True)
+        assert [target.handle for target in atoms[0].targets_documents] == link.targets
+
+        documents = db.get_atoms([node_a.handle], projection=["name"])
+        assert documents == [{"_id": node_a.handle, "name": "A"}]
+
+        with pytest.raises(AtomDoesNotExist, match="Nonexistent atom") as exc_info:
+            db.get_atoms([node_a.handle, "missing"])
+        assert "missing" in exc_info.value.args[1]
+
+    def test_toplevel_only_sets(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        inner = {"type": "L", "targets": [{"type": "A", "name": "A"}]}
+        outer = db.add_link(dict_to_link_params({"type": "M", "targets": [inner]}))
+        db.commit()
+        inner_handle = outer.targets[0]
+        assert db.get_matched_type("L") == {inner_handle}
+        assert db.get_matched_type("L", toplevel_only=True) == set()
+        assert db.get_matched_type("M", toplevel_only=True) == {outer.handle}
+        assert db.get_matched_links("L", ["*"], toplevel_only=True) == set()
+        with mock.patch.object(db.mongo_atoms_collection, "find") as find:
+            db.get_matched_links("M", ["*"], toplevel_only=True)
+        find.assert_not_called()
+
+        db.add_link(dict_to_link_params(inner))
+        db.commit()
+        assert db.get_matched_type("L", toplevel_only=True) == {inner_handle}
+        assert db.get_matched_links("L", ["*"], toplevel_only=True) == {inner_handle}
+        db.delete_atom(inner_handle)
+        assert db.get_matched_type("L", toplevel_only=True) == set()
+
+    def test_atom_cache(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        db.atom_cache = _AtomCache(10)
+        node = db.add_node(dict_to_node_params({"type": "A", "name": "A"}))
+        db.commit()
+        assert db.get_atom(node.handle).name == "A"
+        with mock.patch.object(db.mongo_atoms_collection, "find_one") as find_one:
+            assert db.get_atom(node.handle).name == "A"
+            assert db.get_atom_type(node.handle) == "A"
+            assert db.get_node_type(node.handle) == "A"
+        find_one.assert_not_called()
+        stats = db.get_atom_cache_stats()
+        assert stats["hits"] == 3
+        assert stats["misses"] == 1
+        assert stats["entries"] == 1
+
+        db.add_node(dict_to_node_params({"type": "A", "name": "A", "custom_attributes": {"x": 1}}))
+        db.commit()
+        assert db.get_atom_cache_stats()["entries"] == 0
+        assert db.get_atom(node.handle).custom_attributes == {"x": 1}
+        db.delete_atom(node.handle)
+        assert db.get_atom_cache_stats()["entries"] == 0
+        with pytest.raises(AtomDoesNotExist):
+            db.get_atom(node.handle)
+
+    def test_atom_cache_limits(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        nodes = [db._build_node(dict_to_node_params({"type": "A", "name": n})) for n in "abc"]
+        cache = _AtomCache(2)
+        for node in nodes:
+            cache.put(node.handle, node)
+        assert cache.get(nodes[0].handle) is None
+        assert cache.get(nodes[2].handle) is nodes[2]
+        assert cache.stats()["evictions"] == 1
+
+        cache = _AtomCache(10, max_bytes=1)
+        cache.put(nodes[0].handle, nodes[0])
+        assert cache.stats()["entries"] == 0
+
+        cache = _AtomCache(10, ttl=60)
+        cache.put(nodes[0].handle, nodes[0])
+        with mock.patch("time.monotonic", return_value=10**12):
+            assert cache.get(nodes[0].handle) is None
+
+    def test_change_feed(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        db.change_feed_stream = "changes"
+        with mock.patch.object(
+            RedisMongoDB, "_connection_mongo_db", return_value=db.mongo_db
+        ), mock.patch.object(RedisMongoDB, "_connection_redis", return_value=db.redis):
+            other = RedisMongoDB(change_feed_stream="changes", atom_cache_size=10)
+        changes = []
+        other.add_change_callback(lambda operation, handles: changes.append(operation))
+        other.start_change_feed_listener(block_ms=10)
+        try:
+            node = db.add_node(dict_to_node_params({"type": "A", "name": "A"}))
+            db.commit()
+            assert other.get_atom(node.handle).name == "A"
+            assert other.get_atom_cache_stats()["entries"] == 1
+            db.delete_atom(node.handle)
+            for _ in range(100):
+                if other.get_atom_cache_stats()["entries"] == 0:
+                    break
+                time.sleep(0.01)
+            assert other.get_atom_cache_stats()["entries"] == 0
+            assert "delete" in changes
+            _, entries = db.redis.xread({"changes": "0-0"})[0]
+            assert [fields["operation"] for _, fields in entries] == ["commit", "delete"]
+            assert entries[1][1]["handles"] == node.handle
+        finally:
+            other.stop_change_feed_listener()
+
+    def test_get_node_names_and_links_targets(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        db.redis_mget_batch_size = 2
+        link = db.add_link(
+            dict_to_link_params(
+                {"type": "L", "targets": [{"type": "A", "name": "A"}, {"type": "A", "name": "B"}]}
+            )
+        )
+        db.commit()
+        node_a, node_b = link.targets
+        with mock.patch.object(db.redis, "mget", wraps=db.redis.mget) as mget:
+            names = db.get_node_names([node_a, node_b, link.handle, "missing"])
+        assert names == {node_a: "A", node_b: "B"}
+        assert mget.call_count == 2
+        assert db.get_links_targets([link.handle, node_a]) == {link.handle: [node_a, node_b]}
+
+    def test_mget_groups_keys_by_slot(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        client = MockRedis()
+        client.cache.update({"k1": "a", "k2": "b", "k3": "c"})
+        cluster = mock.MagicMock(spec=RedisCluster)
+        cluster.keyslot.side_effect = lambda key: 1 if key == "k2" else 0
+        cluster.get_node_from_key.return_value = mock.Mock()
+        cluster.get_redis_connection.return_value = client
+        db.redis = cluster
+        with mock.patch.object(client, "mget", wraps=client.mget) as mget:
+            assert db._mget(["k3", "k2", "k1", "k4"]) == ["c", "b", "a", None]
+        assert sorted(call.args for call in mget.call_args_list) == [("k2",), ("k3", "k1", "k4")]
+
+    def test_get_matched_links_many(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        link = db.add_link(
+            dict_to_link_params(
+                {"type": "L", "targets": [{"type": "A", "name": "A"}, {"type": "A", "name": "B"}]}
+            )
+        )
+        db.commit()
+        node_a, node_b = link.targets
+        patterns = [
+            ("L", ["*", node_b]),
+            ("L", [node_a, node_b]),
+            ("L", [node_b, node_a]),
+            ("M", ["*", "*"]),
+            ("*", [node_a, "*"]),
+        ]
+        with mock.patch.object(db.redis, "pipeline", wraps=db.redis.pipeline) as pipeline:
+            results = db.get_matched_links_many(patterns, toplevel_only=True)
+        assert pipeline.call_count == 1
+        assert results == [{link.handle}, {link.handle}, set(), set(), {link.handle}]
+        assert results == [db.get_matched_links(t, targets) for t, targets in patterns]
+
+    def test_iter_matched_links_scans_lazily(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        for name in ["B", "C", "D", "E", "F"]:
+            targets = [{"type": "A", "name": "A"}, {"type": "A", "name": name}]
+            db.add_link(dict_to_link_params({"type": "L", "targets": targets}))
+        db.commit()
+        node_a = db.get_node_handle("A", "A")
+        expected = db.get_matched_links("L", [node_a, "*"])
+        assert len(expected) == 5
+        assert set(db.iter_matched_links("L", [node_a, "*"], count=2)) == expected
+        with mock.patch.object(db.redis, "sscan", wraps=db.redis.sscan) as sscan:
+            first = list(db.iter_matched_links("L", [node_a, "*"], count=2, limit=3))
+        assert len(first) == 3 and set(first) <= expected
+        assert sscan.call_count == 2
+        with mock.patch.object(db.redis, "sscan", wraps=db.redis.sscan) as sscan:
+            next(db.iter_matched_type("L", count=1))
+        assert sscan.call_count == 1
+        assert set(db.iter_matched_type("L", toplevel_only=True)) == db.get_matched_type("L")
+        assert set(db.iter_incoming_links(node_a, count=2)) == set(
+            db.get_incoming_links_handles(node_a)
+        )
+        concrete = list(db.iter_matched_links("L", db.get_link_targets(first[0])))
+        assert concrete == [first[0]]
+        assert list(db.iter_matched_links("L", [node_a, node_a])) == []
+        assert list(db.iter_incoming_links("missing")) == []
+
+    def test_iter_matched_links_concrete_pattern(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        inner = {"type": "L", "targets": [{"type": "A", "name": "A"}, {"type": "A", "name": "B"}]}
+        db.add_link(dict_to_link_params({"type": "M", "targets": [inner]}))
+        db.commit()
+        targets = [db.get_node_handle("A", "A"), db.get_node_handle("A", "B")]
+        inner_handle = db.get_link_handle("L", targets)
+        assert list(db.iter_matched_links("L", targets)) == [inner_handle]
+        assert list(db.iter_matched_links("L", targets, limit=1)) == [inner_handle]
+        assert list(db.iter_matched_links("L", targets, toplevel_only=True)) == []
+        outer = db.get_link_handle("M", [inner_handle])
+        assert list(db.iter_matched_links("M", [inner_handle], toplevel_only=True)) == [outer]
+
+    def test_sets_algebra(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        for link_type, name in [("L", "B"), ("L", "C"), ("M", "B"), ("M", "D")]:
+            targets = [{"type": "A", "name": "A"}, {"type": "A", "name": name}]
+            db.add_link(dict_to_link_params({"type": link_type, "targets": targets}))
+        db.commit()
+        node_a, node_b = db.get_node_handle("A", "A"), db.get_node_handle("A", "B")
+        of_b = ("incoming", node_b)
+        links_l = db.get_matched_type("L")
+        links_m = db.get_matched_type("M")
+        assert db.get_sets_intersection([("type", "L"), of_b]) == links_l & {
+            db.get_link_handle("L", [node_a, node_b])
+        }
+        assert db.get_sets_union([("type", "L"), ("type", "M")]) == links_l | links_m
+        assert db.get_sets_difference([("pattern", "*", [node_a, "*"]), ("type", "M")]) == links_l
+        assert db.count_sets_intersection([("pattern", "*", [node_a, "*"]), of_b]) == 2
+        assert db.count_sets_intersection([("pattern", "*", [node_a, "*"])], limit=3) == 3
+        assert db.get_sets_intersection([("type", "L"), ("type", "missing")]) == set()
+        with pytest.raises(ValueError):
+            db.get_sets_union([("pattern", "L", [node_a, node_b])])
+        with pytest.raises(ValueError):
+            db.get_sets_union([("unknown", "L")])
+        client = db.redis
+        operands = [("pattern", "*", [node_a, "*"]), ("type", "M"), of_b]
+        expected = db.get_sets_intersection(operands)
+        db.redis = mock.MagicMock(spec=RedisCluster)
+        with mock.patch.object(
+            db,
+            "_execute_redis_commands",
+            side_effect=lambda commands: [client.smembers(key) for _, key in commands],
+        ):
+            assert db.get_sets_intersection(operands) == expected
+            assert db.count_sets_intersection(operands) == 1
+            assert db.get_sets_difference([("type", "M"), of_b]) == links_m - expected
+
+    def test_count_sets(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        for name in ["B", "C", "D"]:
+            targets = [{"type": "A", "name": "A"}, {"type": "A", "name": name}]
+            db.add_link(dict_to_link_params({"type": "L", "targets": targets}))
+        db.commit()
+        node_a, node_b = db.get_node_handle("A", "A"), db.get_node_handle("A", "B")
+        with mock.patch.object(db.redis, "smembers") as smembers:
+            assert db.count_matched_links("L", [node_a, "*"]) == 3
+            assert db.count_matched_links("L", ["*", node_b], toplevel_only=True) == 1
+            assert db.count_matched_type("L") == 3
+            assert db.count_incoming_links(node_a) == 3
+            assert db.count_incoming_links("missing") == 0
+        smembers.assert_not_called()
+        assert db.count_matched_links("L", [node_a, node_b]) == 1
+        assert db.count_matched_links("L", [node_b, node_a]) == 0
+        operands = [("type", "L"), ("incoming", node_b), ("pattern", "M", ["*", "*"])]
+        with mock.patch.object(db.redis, "pipeline", wraps=db.redis.pipeline) as pipeline:
+            assert db.count_sets(operands) == [3, 1, 0]
+        assert pipeline.call_count == 1
+
+    def test_handle_queries_project_and_stream(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        db.mongo_find_batch_size = 2
+        for name in ["ab", "ac", "b"]:
+            db.add_node(dict_to_node_params({"type": "A", "name": name}))
+        link = db.add_link(
+            dict_to_link_params(
+                {"type": "L", "targets": [{"type": "A", "name": "ab"}, {"type": "A", "name": "b"}]}
+            )
+        )
+        db.commit()
+        handles = sorted(db.get_node_handle("A", name) for name in ["ab", "ac", "b"])
+        with mock.patch.object(
+            db.mongo_atoms_collection, "find", wraps=db.mongo_atoms_collection.find
+        ) as find:
+            names = db.iter_all_nodes_names("A")
+            find.assert_not_called()
+            assert sorted(names) == ["ab", "ac", "b"]
+            assert find.call_args.kwargs == {"projection": {"name": 1, "_id": 0}, "batch_size": 2}
+            assert sorted(db.get_all_nodes_handles("A")) == handles
+            assert find.call_args.kwargs["projection"] == {"_id": 1}
+        assert db.get_all_links("L") == {link.handle}
+        assert next(db.iter_all_links("L")) == link.handle
+        assert sorted(db.get_node_by_name_starting_with("A", "a")) == sorted(
+            db.get_node_by_name("A", "^a")
+        )
+        assert len(db.get_node_by_name_starting_with("A", "a")) == 2
+        query = [{"field": "named_type", "value": "L"}]
+        assert db.get_atoms_by_field(query) == [link.handle]
+        assert db.get_atoms_by_text_field("^b$", field="name") == [db.get_node_handle("A", "b")]
+
+    def test_get_atoms_by_index_keyset_pagination(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        expected = set()
+        for i in range(5):
+            for status in ["ready", "done"]:
+                node = db.add_node(
+                    dict_to_node_params(
+                        {"type": "A", "name": f"{status}{i}", "custom_attributes": {"s": status}}
+                    )
+                )
+                if status == "ready":
+                    expected.add(node.handle)
+        db.commit()
+        index_id = db.create_field_index("node", fields=["custom_attributes.s"])
+        query = [{"field": "custom_attributes.s", "value": "ready"}]
+        handles, cursors = [], []
+        cursor = 0
+        with mock.patch.object(db, "get_atoms") as get_atoms:
+            while True:
+                cursor, atoms = db.get_atoms_by_index(index_id, query, cursor, chunk_size=2)
+                handles.extend(atom.handle for atom in atoms)
+                cursors.append(cursor)
+                if cursor == 0:
+                    break
+        get_atoms.assert_not_called()
+        assert len(handles) == len(expected) and set(handles) == expected
+        assert handles == sorted(handles)
+        assert len(cursors) == 3 and all(isinstance(c, str) for c in cursors[:-1])
+        cursor, atoms = db.get_atoms_by_index(index_id, query, cursors[0], chunk_size=10)
+        assert cursor == 0 and [atom.handle for atom in atoms] == handles[2:]
+        with pytest.raises(ValueError):
+            db.get_atoms_by_index(index_id, query, "not-a-cursor")
+        other_index = db.create_field_index("node", fields=["name"])
+        with pytest.raises(ValueError):
+            db.get_atoms_by_index(other_index, [], cursors[0])
+
+    def test_get_atoms_by_index_keyset_pagination_mixed_types(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        expected = set()
+        for i, value in enumerate([None, "missing", 2.5, 1, "b", "a", True, False]):
+            attributes = {} if value in [None, "missing"] else {"custom_attributes": {"s": value}}
+            node = db.add_node(dict_to_node_params({"type": "A", "name": f"n{i}", **attributes}))
+            expected.add(node.handle)
+            if value is None:
+                null_handle = node.handle
+        db.add_node(dict_to_node_params({"type": "B", "name": "b"}))
+        db.commit()
+        db.mongo_atoms_collection.update_one(
+            {"_id": null_handle}, {"$set": {"custom_attributes.s": None}}
+        )
+        index_id = db.create_field_index("node", fields=["custom_attributes.s"], named_type="A")
+        collection = db.mongo_atoms_collection
+        for chunk_size in [1, 2, 3]:
+            handles: list[str] = []
+            cursor: int | str = 0
+            while True:
+                cursor, documents = db._retrieve_documents_by_index(
+                    collection, index_id, cursor=cursor, chunk_size=chunk_size
+                )
+                handles.extend(document["_id"] for document in documents)
+                if cursor == 0:
+                    break
+            assert len(handles) == len(expected) and set(handles) == expected
+
+    def test_get_atoms_by_index_rebuilds_legacy_index(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        for name in ["a", "b", "c"]:
+            db.add_node(dict_to_node_params({"type": "A", "name": name}))
+        db.commit()
+        index_id = db.create_field_index("node", fields=["name"], named_type="A")
+        # an index created by an older version, without the trailing `_id` key
+        collection = db.mongo_atoms_collection
+        collection.drop_index(index_id)
+        collection.create_index(
+            [("name", 1)],
+            name=index_id,
+            partialFilterExpression={"named_type": {"$eq": "A"}},
+        )
+        db._index_catalog_version = None
+        with pytest.raises(ValueError):
+            db.get_atoms_by_index(index_id, [], chunk_size=2)
+        version = int(db.redis.get(INDEX_CATALOG_VERSION_KEY) or 0)
+        assert db.create_field_index("node", fields=["name"], named_type="A") == index_id
+        assert db.redis.get(INDEX_CATALOG_VERSION_KEY) == version + 1
+        cursor, atoms = db.get_atoms_by_index(index_id, [], chunk_size=2)
+        assert len(atoms) == 2 and cursor != 0
+        cursor, atoms = db.get_atoms_by_index(index_id, [], cursor, chunk_size=2)
+        assert len(atoms) == 1 and cursor == 0
+
+    def test_index_catalog(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        db.add_node(dict_to_node_params({"type": "A", "name": "a"}))
+        db.commit()
+        index_id = db.create_field_index("node", fields=["name"], named_type="A")
+        stored = db.redis.get(f"custom_indexes:{index_id}")
+        assert stored.startswith("{") and _decode_index_props(stored)["fields"] == ["name"]
+        assert db.redis.get(INDEX_CATALOG_VERSION_KEY) == 1
+        assert db.create_field_index("node", fields=["name"], named_type="A") == index_id
+        assert db.redis.get(INDEX_CATALOG_VERSION_KEY) == 1
+        db.index_catalog_refresh_interval = 3600
+        query = [{"field": "name", "value": "a"}]
+        assert len(db.get_atoms_by_index(index_id, query)[1]) == 1
+        collection = db.mongo_atoms_collection
+        with mock.patch.object(
+            collection, "list_indexes", wraps=collection.list_indexes
+        ) as list_indexes, mock.patch.object(db.redis, "get", wraps=db.redis.get) as get:
+            assert len(db.get_atoms_by_index(index_id, query)[1]) == 1
+            list_indexes.assert_not_called()
+            get.assert_not_called()
+            with pytest.raises(ValueError):
+                db.get_atoms_by_index("missing", query)
+            assert list_indexes.call_count == 1
+            db.index_catalog_refresh_interval = 0
+            db.get_atoms_by_index(index_id, query)
+            assert list_indexes.call_count == 1
+            db.redis.incr(INDEX_CATALOG_VERSION_KEY)
+            db.get_atoms_by_index(index_id, query)
+            assert list_indexes.call_count == 2
+
+    def test_decode_legacy_index_props(self):
+        props = {"index_type": MongoIndexType.FIELD, "conditionals": {}, "fields": ["name"]}
+        legacy = base64.b64encode(pickle.dumps(props)).decode("utf-8")
+        assert _decode_index_props(legacy) == props
+        assert _decode_index_props(_encode_index_props(props)) == props
+
+    def test_atom_counters(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        link = db.add_link(
+            dict_to_link_params(
+                {"type": "L", "targets": [{"type": "A", "name": "a"}, {"type": "B", "name": "b"}]}
+            )
+        )
+        db.commit()
+        db.add_node(dict_to_node_params({"type": "A", "name": "a"}))
+        db.add_node(dict_to_node_params({"type": "A", "name": "c"}))
+        db.commit()
+        expected = {"atom_count": 4, "node_count": 3, "link_count": 1}
+        with mock.patch.object(db.mongo_atoms_collection, "count_documents") as count_documents:
+            assert db.count_atoms({"precise": True}) == expected
+            assert db.count_atoms({"per_type": True}) == {
+                "atom_count": 4,
+                "type_counts": {"A": 2, "B": 1, "L": 1},
+            }
+        count_documents.assert_not_called()
+        db.delete_atom(db.get_node_handle("B", "b"))
+        assert db.count_atoms({"precise": True, "per_type": True}) == {
+            "atom_count": 2,
+            "node_count": 2,
+            "link_count": 0,
+            "type_counts": {"A": 2},
+        }
+        assert link.handle not in db.get_all_links("L")
+        db.redis.hincrby(ATOM_COUNTERS_KEY, "node_count", 10)
+        assert db.recount() == {"node_count": 2, "link_count": 0, "type:A": 2}
+        assert db.count_atoms({"precise": True})["node_count"] == 2
+        db.redis.delete(ATOM_COUNTERS_KEY)
+        assert db.count_atoms({"precise": True})["node_count"] == 2
+        db.redis.delete(ATOM_COUNTERS_KEY)
+        db.add_node(dict_to_node_params({"type": "A", "name": "d"}))
+        db.commit()
+        assert db.count_atoms({"precise": True})["node_count"] == 3
+
+    def test_online_reindex(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        db.online_reindex = True
+        db.index_namespace_refresh_interval = 0
+        for name in ["a", "b", "c"]:
+            targets = [{"type": "A", "name": name}, {"type": "B", "name": "b"}]
+            db.add_link(dict_to_link_params({"type": "L", "targets": targets}))
+        db.commit()
+        b = db.get_node_handle("B", "b")
+        expected = set(db.get_matched_links("L", ["*", b]))
+        assert len(expected) == 3
+
+        original = db._reindex_range
+        calls = []
+
+        def fail_once(*args):
+            calls.append(args)
+            if len(calls) == 1:
+                raise RuntimeError("interrupted")
+            return original(*args)
+
+        with mock.patch.object(db, "_reindex_range", side_effect=fail_once):
+            with pytest.raises(RuntimeError):
+                db.reindex(online=True, workers=1, chunk_size=1)
+        assert db.redis.get(INDEX_BUILDING_NAMESPACE_KEY) == "ns1:"
+        assert set(db.get_matched_links("L", ["*", b])) == expected
+
+        # writes are sent to both namespaces while the new one is built
+        db.add_node(dict_to_node_params({"type": "A", "name": "d"}))
+        db.commit()
+        d = db.get_node_handle("A", "d")
+        assert db.redis.get(f"names:{d}") == "d"
+        assert db.redis.get(f"ns1:names:{d}") == "d"
+
+        with mock.patch.object(db, "_reindex_range", wraps=db._reindex_range) as reindex_range:
+            db.reindex(online=True, workers=2, chunk_size=1)
+        # only the interrupted range is walked again
+        assert reindex_range.call_count == 1
+        assert db.redis.get(INDEX_NAMESPACE_KEY) == "ns1:"
+        assert db.redis.get(INDEX_BUILDING_NAMESPACE_KEY) is None
+        assert db.redis.hgetall(REINDEX_CHECKPOINTS_KEY) == {}
+        assert not [key for key in db.redis.cache if key.startswith(("names:", "templates:"))]
+        assert set(db.get_matched_links("L", ["*", b])) == expected
+        assert set(db.get_matched_links("L", ["*", b], toplevel_only=True)) == expected
+        assert db.get_node_name(d) == "d"
+
+    def test_online_reindex_requires_option(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        db.add_node(dict_to_node_params({"type": "A", "name": "a"}))
+        db.commit()
+        with pytest.raises(InvalidOperationException):
+            db.reindex(online=True)
+        # the namespaces are not read again by clients not following online reindexes
+        db.index_namespace_refresh_interval = 0
+        with mock.patch.object(db.redis, "mget", wraps=db.redis.mget) as mget:
+            db.add_node(dict_to_node_params({"type": "A", "name": "b"}))
+            db.commit()
+        assert not [call for call in mget.call_args_list if INDEX_NAMESPACE_KEY in call.args[0]]
+
+    def test_online_reindex_fences_stale_writers(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        db.online_reindex = True
+        db.index_namespace_refresh_interval = 0
+        with mock.patch.object(
+            RedisMongoDB, "_connection_mongo_db", return_value=db.mongo_db
+        ), mock.patch.object(RedisMongoDB, "_connection_redis", return_value=db.redis):
+            stale = RedisMongoDB(online_reindex=True, index_namespace_refresh_interval=3600)
+        db.add_node(dict_to_node_params({"type": "A", "name": "a"}))
+        db.commit()
+        db.reindex(online=True, workers=1)
+        assert db.redis.get(INDEX_NAMESPACE_KEY) == "ns1:"
+        # the stale client still writes to the dropped namespace, then to the new one
+        assert stale._index_namespace == ""
+        stale.add_node(dict_to_node_params({"type": "A", "name": "b"}))
+        stale.commit()
+        b = stale.get_node_handle("A", "b")
+        assert db.redis.get(f"ns1:names:{b}") == "b"
+        assert stale._index_namespace == "ns1:"
+        assert db.get_node_name(b) == "b"
+
+    def test_incremental_template_reindex(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        for name in ["a", "b"]:
+            targets = [{"type": "A", "name": name}, {"type": "B", "name": "b"}]
+            db.add_link(dict_to_link_params({"type": "L", "targets": targets}))
+            targets = [{"type": "A", "name": name}, {"type": "A", "name": "c"}]
+            db.add_link(dict_to_link_params({"type": "M", "targets": targets}))
+        db.commit()
+        a = db.get_node_handle("A", "a")
+        default = {"field": "named_type", "value": "*", "positions": [0, 1, 2], "arity": 3}
+        by_target = {"field": "targets[0]", "value": a, "positions": [1], "arity": 2}
+        by_type = {"field": "named_type", "value": "L", "positions": [0], "arity": 2}
+
+        def pattern_sets():
+            return {
+                key: value
+                for key, value in db.redis.cache.items()
+                if key.startswith(("patterns:", "toplevel_patterns:")) and value
+            }
+
+        with mock.patch.object(db.redis, "flushall") as flushall, mock.patch.object(
+            db.mongo_atoms_collection, "find", wraps=db.mongo_atoms_collection.find
+        ) as find:
+            db.reindex([default, by_target])
+        flushall.assert_not_called()
+        # only the links having `a` as first target are read
+        assert find.call_count == 1
+        assert len(list(db.mongo_atoms_collection.find(find.call_args.args[0]))) == 2
+        incremental = pattern_sets()
+        db.reindex()
+        assert pattern_sets() == incremental
+        assert len(db.get_matched_links("*", [a, "*"])) == 2
+
+        db.reindex([by_type])
+        incremental = pattern_sets()
+        db.reindex()
+        assert pattern_sets() == incremental
+        assert db.get_matched_links("*", [a, "*"]) == set()
+
+    def test_delete_atoms(self, redis_mongo_db):  # noqa: F811
+        db = redis_mongo_db
+        inner = {
+            "type": "Inner",
+            "targets": [{"type": "Concept", "name": "x"}, {"type": "Concept", "name": "y"}],
+        }
+        outer = db.add_link(
+            dict_to_link_params(
+                {"type": "Outer", "targets": [inner, {"type": "Concept", "name": "z"}]}
+            )
+        )
+        db.commit()
+        x, y, z = [db.get_node_handle("Concept", name) for name in "xyz"]
+        inner_handle = outer.targets[0]
+        with mock.patch.object(
+            db.mongo_atoms_collection, "delete_many", wraps=db.mongo_atoms_collection.delete_many
+        ) as delete_many, mock.patch.object(
+            db.mongo_atoms_collection, "find_one_and_delete"
+        ) as find_one_and_delete:
+            # the links pointing to x, and the ones pointing to them, are deleted in cascade
+            assert db.delete_atoms([x, x, "missing"]) == 3
+        assert delete_many.call_count == 1
+        find_one_and_delete.assert_not_called()
+        assert db.count_atoms({"precise": True}) == {
+            "atom_count": 2,
+            "node_count": 2,
+            "link_count": 0,
+        }
+        for handle in [x, inner_handle, outer.handle]:
+            with pytest.raises(AtomDoesNotExist):
+                db.get_atom(handle)
+        assert not db.get_incoming_links_handles(y)
+        assert not db.get_incoming_links_handles(z)
+        assert not db.get_matched_type("Outer")
+        assert not db.get_matched_links("Inner", ["*", y])
+        assert db.redis.get(f"names:{x}") is None
+        assert db.delete_atoms(["missing"]) == 0
+        with pytest.raises(AtomDoesNotExist):
+            db.delete_atom(x)
+
+    def test_binary_handles(self, redis_mongo_db):  # noqa: F811
+        with mock.patch.object(
+            RedisMongoDB, "_connection_mongo_db", return_value=redis_mongo_db.mongo_db
+        ), mock.patch.object(
+            RedisMongoDB, "_connection_redis", return_value=redis_mongo_db.redis
+        ) as connection_redis:
+            db = RedisMongoDB(redis_binary_handles=True)
+        assert connection_redis.call_args.args[-1] is True
+        link = db.add_link(
+            dict_to_link_params(
+                {"type": "L", "targets": [{"type": "A", "name": "a"}, {"type": "B", "name": "b"}]}
+            )
+        )
+        db.commit()
+        a, b = link.targets
+        packed = _pack_handle(a)
+        assert packed.encode("utf-8", "surrogateescape") == bytes.fromhex(a)
+        assert _unpack_handle(packed) == a
+        incoming = db.redis.smembers(f"incoming_set:{packed}")
+        assert [member.encode("utf-8", "surrogateescape") for member in incoming] == [
+            bytes.fromhex(link.handle)
+        ]
+        outgoing = db.redis.get(f"outgoing_set:{_pack_handle(link.handle)}")
+        assert outgoing.encode("utf-8", "surrogateescape") == bytes.fromhex(a + b)
+        assert db.get_link_targets(link.handle) == [a, b]
+        assert db.get_links_targets([link.handle]) == {link.handle: [a, b]}
+        assert db.get_incoming_links_handles(a) == [link.handle]
+        assert db.get_matched_links("L", ["*", b]) == {link.handle}
+        assert list(db.iter_matched_type("L")) == [link.handle]
+        assert db.get_sets_intersection([("type", "L"), ("incoming", b)]) == {link.handle}
+        assert db.get_node_name(a) == "a"
+        assert db.delete_atoms([a]) == 2
+        assert not db.get_matched_links("L", ["*", b])
+
+    def test_integer_ids(self, redis_mongo_db):  # noqa: F811
+        with mock.patch.object(
+            RedisMongoDB, "_connection_mongo_db", return_value=redis_mongo_db.mongo_db
+        ), mock.patch.object(RedisMongoDB, "_connection_redis", return_value=redis_mongo_db.redis):
+            db = RedisMongoDB(redis_integer_ids=True, atom_id_block_size=2)
+        links = [
+            db.add_link(
+                dict_to_link_params(
+                    {
+                        "type": "L",
+                        "targets": [{"type": "A", "name": "a"}, {"type": "B", "name": name}],
+                    }
+                )
+            )
+            for name in ("b", "c", "d")
+        ]
+        db.commit()
+        handles = {link.handle for link in links}
+        a = links[0].targets[0]
+        incoming = db.redis.smembers(f"incoming_set:{a}")
+        assert sorted(int(member) for member in incoming) == [1, 2, 3]
+        ids = {document["_id"]: document["id"] for document in db.mongo_atom_ids_collection.find()}
+        assert set(ids) == handles
+        assert set(db.get_incoming_links_handles(a)) == handles
+        assert db.get_matched_links("L", [a, "*"]) == handles
+        assert set(db.iter_matched_type("L")) == handles
+        assert db.get_sets_intersection([("type", "L"), ("incoming", a)]) == handles
+
+        # another client reads the same dictionary
+        db._reset_atom_ids()
+        assert db.get_matched_links("L", ["*", links[1].targets[1]]) == {links[1].handle}
+        assert db.delete_atoms([links[0].handle]) == 1
+        assert db.get_matched_links("L", [a, "*"]) == {links[1].handle, links[2].handle}
+
+    def test_integer_ids_without_reindex(self, redis_mongo_db):  # noqa: F811
+        for name in ("b", "c"):
+            targets = [{"type": "A", "name": "a"}, {"type": "B", "name": name}]
+            redis_mongo_db.add_link(dict_to_link_params({"type": "L", "targets": targets}))
+        redis_mongo_db.commit()
+        with mock.patch.object(
+            RedisMongoDB, "_connection_mongo_db", return_value=redis_mongo_db.mongo_db
+        ), mock.patch.object(RedisMongoDB, "_connection_redis", return_value=redis_mongo_db.redis):
+            db = RedisMongoDB(redis_integer_ids=True)
+        a = db.get_node_handle("A", "a")
+        with pytest.raises(InvalidOperationException) as e:
+            db.get_matched_links("L", [a, "*"])
+        assert "reindex()" in e.value.args[0]
+        # links without an integer ID are removed without being assigned one
+        link = db.get_link_handle("L", [a, db.get_node_handle("B", "b")])
+        assert db.delete_atoms([link]) == 1
+        assert db.mongo_atom_ids_collection.count_documents({}) == 0
+        # as well as when pattern index templates are removed
+        db.reindex([{"field": "named_type", "value": "*", "positions": [0, 1, 2], "arity": 3}])
+        assert db.mongo_atom_ids_collection.count_documents({}) == 0
+
+    def test_integer_ids_small_cache(self, redis_mongo_db):  # noqa: F811
+        with mock.patch.object(
+            RedisMongoDB, "_connection_mongo_db", return_value=redis_mongo_db.mongo_db
+        ), mock.patch.object(RedisMongoDB, "_connection_redis", return_value=redis_mongo_db.redis):
+            db = RedisMongoDB(redis_integer_ids=True, atom_id_cache_size=3)
+        links = [
+            db.add_link(
+                dict_to_link_params(
+                    {
+                        "type": "L",
+                        "targets": [{"type": "A", "name": "a"}, {"type": "B", "name": name}],
+                    }
+                )
+            )
+            for name in ("b", "c", "d", "e", "f")
+        ]
+        db.commit()
+        handles = {link.handle for link in links}
+        a = links[0].targets[0]
+        assert len(db._atom_id_by_handle) <= 3
+        assert db.mongo_atom_ids_collection.count_documents({}) == 5
+        assert set(db.get_incoming_links_handles(a)) == handles
+        assert db.get_matched_links("L", [a, "*"]) == handles
+        db._reset_atom_ids()
+        assert db.get_matched_links("L", [a, "*"]) == handles
@@ -1,3 +1,5 @@
+import fnmatch
+import time
 from unittest import mock
 
 import mongomock
@@ -7,33 +9,85 @@ from hyperon_das_atomdb.adapters.ram_only import InMemoryDB
 from hyperon_das_atomdb.adapters.redis_mongo_db import RedisMongoDB
 
 
+class MockRedisPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        method = getattr(self.redis, name)
+
+        def queue(*args, **kwargs):
+            self.commands.append((method, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self, raise_on_error=True):
+        results = []
+        for method, args, kwargs in self.commands:
+            try:
+                results.append(method(*args, **kwargs))
+            except Exception as e:  # pylint: disable=broad-except
+                if raise_on_error:
+                    self.commands = []
+                    raise
+                results.append(e)
+        self.commands = []
+        return results
+
+
 class MockRedis:
     def __init__(self):
         self.cache = dict()
 
+    def pipeline(self, transaction=True):
+        return MockRedisPipeline(self)
+
     def get(self, key):
         if key in self.cache:
             return self.cache[key]
         return None
 
-    def set(self, key, value, *args, **kwargs):
+    def set(self, key, value, *args, nx=False, **kwargs):
         if isinstance(self.cache, dict):
+            if nx and key in self.cache:
+                return None
             self.cache[key] = value
             return "OK"
         return None
 
+    def mget(self, keys, *args):
+        keys = [keys, *args] if isinstance(keys, str) else [*keys, *args]
+        return [self.cache.get(key) for key in keys]
+
     def hget(self, hash, key):
         if hash in self.cache:
             if key in self.cache[hash]:
                 return self.cache[hash][key]
         return None
 
-    def hset(self, hash, key, value, *args, **kwargs):
+    def hset(self, hash, key=None, value=None, mapping=None, *args, **kwargs):
         if isinstance(self.cache, dict):
-            self.cache[hash][key] = value
-            return 1
+            items = dict(mapping or {})
+            if key is not None:
+                items[key] = value
+            self.cache.setdefault(hash, {}).update(items)
+            return len(items)
         return None
 
+    def hgetall(self, hash):
+        return dict(self.cache.get(hash, {}))
+
+    def hincrby(self, hash, key, amount=1):
+        values = self.cache.setdefault(hash, {})
+        values[key] = int(values.get(key, 0)) + amount
+        return values[key]
+
+    def incr(self, key, amount=1):
+        self.cache[key] = int(self.cache.get(key, 0)) + amount
+        return self.cache[key]
+
     def exists(self, key):
         if key in self.cache:
             return 1
@@ -55,6 +109,25 @@ class MockRedis:
             return self.cache[key]
         return set()
 
+    def scard(self, key):
+        return len(self.cache.get(key, set()))
+
+    def sinter(self, keys, *args):
+        sets = [self.smembers(key) for key in [*keys, *args]]
+        return set.intersection(*sets)
+
+    def sunion(self, keys, *args):
+        sets = [self.smembers(key) for key in [*keys, *args]]
+        return set.union(*sets)
+
+    def sdiff(self, keys, *args):
+        sets = [self.smembers(key) for key in [*keys, *args]]
+        return sets[0].difference(*sets[1:])
+
+    def sintercard(self, numkeys, keys, limit=0):
+        count = len(self.sinter(keys[:numkeys]))
+        return min(count, limit) if limit else count
+
     def flushall(self):
         self.cache.clear()
 
@@ -66,6 +139,13 @@ class MockRedis:
                 deleted_count += 1
         return deleted_count
 
+    def unlink(self, *keys):
+        return self.delete(*keys)
+
+    def scan_iter(self, match=None, count=None):
+        keys = [key for key in self.cache if match is None or fnmatch.fnmatchcase(key, match)]
+        yield from keys
+
     def getdel(self, key):
         value = self.cache.get(key)
         if key in self.cache:
@@ -94,6 +174,47 @@ class MockRedis:
 
         return (new_cursor, elements[start:end])
 
+    def xadd(self, name, fields, id="*", maxlen=None, approximate=True, *args, **kwargs):
+        entries = self.cache.setdefault(name, [])
+        entry_id = f"{len(entries) + 1}-0"
+        entries.append((entry_id, dict(fields)))
+        if maxlen is not None:
+            del entries[:-maxlen]
+        return entry_id
+
+    def xrevrange(self, name, max="+", min="-", count=None):
+        entries = list(reversed(self.cache.get(name, [])))
+        return entries[:count] if count else entries
+
+    def xread(self, streams, count=None, block=None):
+        response = []
+        for name, last_id in streams.items():
+            last = int(str(last_id).split("-")[0])
+            entries = [e for e in self.cache.get(name, []) if int(e[0].split("-")[0]) > last]
+            if entries:
+                response.append([name, entries[:count] if count else entries])
+        if not response and block:
+            time.sleep(block / 1000)
+        return response
+
+
+class MockRedisCluster(MockRedis):
+    """A single-node cluster, standing in for `RedisCluster` in connection tests."""
+
+    def __init__(self, **kwargs):
+        super().__init__()
+        self.node = mock.Mock()
+        self.node.name = "node-1"
+
+    def keyslot(self, key):
+        return 0
+
+    def get_node_from_key(self, key):
+        return self.node
+
+    def get_redis_connection(self, node):
+        return self
+
 
 def mongo_mock():
     return mongomock.MongoClient().db